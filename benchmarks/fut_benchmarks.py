@@ -0,0 +1,149 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic_data
+from fut_utils import histogram_renderer, snapshot_sidecar, squad_builder
+from fut_utils.fut_enums import FutAttr, League, Rarity
+from fut_utils.fut_manager import FutManager, SNAPSHOT_CACHE
+
+DEFAULT_SIZES: tuple = synthetic_data.SIZES
+SBC_TARGETS: tuple = (84, 80, 86, 88)
+FIND_PREDICATES: list = [(FutAttr.league, League.premier_league.value), (FutAttr.position, 'ST')]
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    rows: int
+    seconds: float
+    repeats: int
+
+
+def timed(function: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """
+    Wall time of a single call
+    :param function:
+    :param args:
+    :param kwargs:
+    :return: seconds, result
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def benchmark_cases(data_paths: List[Path], image_path: Path) -> Dict[str, float]:
+    """
+    Time every operation once from a cold cache, the first call pays for loading and derived data
+    :param data_paths: snapshots of one size, oldest first
+    :param image_path: scratch location for the histogram
+    :return: {case name: seconds}
+    """
+    data_path = data_paths[-1]
+    sidecar = snapshot_sidecar.sidecar_path(data_path)
+    sidecar.unlink(missing_ok=True)
+    SNAPSHOT_CACHE.invalidate()
+    fut_manager = FutManager(data_path=data_path, handle_downloads=False)
+    result = {'load_csv': timed(lambda: fut_manager.data)[0]}
+
+    snapshot_sidecar.write_sidecar(data_path)
+    SNAPSHOT_CACHE.invalidate()
+    result['load_sidecar'] = timed(lambda: fut_manager.data)[0]
+    sidecar.unlink()
+    SNAPSHOT_CACHE.invalidate()
+    fut_manager.data
+
+    result['summary'] = timed(lambda: fut_manager.summary)[0]
+    result['league_analyser'] = timed(fut_manager.league_analyser, league=League.premier_league)[0]
+    result['find'] = timed(fut_manager.find, FIND_PREDICATES)[0]
+    result['find_value'] = timed(fut_manager.find_value, FutAttr.rarity, Rarity.totw.value)[0]
+    result['list_frequencies'] = timed(fut_manager.list_frequencies, FutAttr.club)[0]
+    result['best_xi'] = timed(fut_manager.best_xi, squad_builder.FORMATIONS['4-3-3'])[0]
+    result['sbc_buckets'] = timed(fut_manager.sbc, SBC_TARGETS[0])[0]
+    result['sbc'] = sum(timed(fut_manager.sbc, x)[0] for x in SBC_TARGETS[1:]) / (len(SBC_TARGETS) - 1)
+    result['render_histogram'] = timed(histogram_renderer.render_histogram, fut_manager.player_ratings.to_numpy(),
+                                       image_path)[0]
+
+    if len(data_paths) > 1:
+        result['diff'] = timed(fut_manager.diff, old_path=data_paths[0])[0]
+
+    return result
+
+
+def run_benchmarks(sizes: Tuple[int, ...] = DEFAULT_SIZES, repeats: int = 3, snapshots: int = 2,
+                   seed: int = 0) -> List[BenchmarkResult]:
+    """
+    Best time of every case for each data size
+    :param sizes: rows per snapshot
+    :param repeats:
+    :param snapshots: snapshots generated per size
+    :param seed:
+    :return:
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = Path(temp_dir).joinpath('histogram.png')
+
+        for rows in sizes:
+            data_paths = synthetic_data.write_snapshots(rows, snapshots=snapshots, seed=seed)
+            timings: Dict[str, List[float]] = {}
+
+            for _ in range(repeats):
+                for name, seconds in benchmark_cases(data_paths, image_path).items():
+                    timings.setdefault(name, []).append(seconds)
+
+            results.extend(BenchmarkResult(name=name, rows=rows, seconds=min(values), repeats=repeats)
+                           for name, values in timings.items())
+            SNAPSHOT_CACHE.invalidate()
+
+    return results
+
+
+def environment() -> dict:
+    """
+    Versions recorded alongside the results so runs can be compared
+    :return:
+    """
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark FutManager on synthetic club-analyzer data')
+    parser.add_argument('sizes', nargs='*', type=int, default=list(DEFAULT_SIZES), help='rows per snapshot')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--snapshots', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=Path, help='write the results to a json file')
+    options = parser.parse_args(args)
+    results = run_benchmarks(tuple(options.sizes), repeats=options.repeats, snapshots=options.snapshots,
+                             seed=options.seed)
+
+    for result in results:
+        print(f'{result.name:<18}{result.rows:>10,} rows {result.seconds * 1000:>10.1f} ms')
+
+    if options.json:
+        report = {'environment': environment(), 'results': [result._asdict() for result in results]}
+        options.json.write_text(json.dumps(report, indent=2))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from core import PROJECT_ROOT
+
+IMPORT_BUDGETS: dict = {
+    'fut_utils.fut_manager': 150,
+    'fut_utils.fut_manager_ui': 600,  # PySide6.QtWidgets alone takes about 350 ms
+}
+HEAVY_MODULES: tuple = ('pandas', 'numpy', 'matplotlib', 'git')
+
+
+class ImportReport(NamedTuple):
+    module: str
+    milliseconds: float
+    budget: float
+    heavy_modules: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return self.milliseconds <= self.budget and not self.heavy_modules
+
+
+def measure_import(module: str, runs: int = 5) -> ImportReport:
+    """
+    Cold-start cost of importing a module in a fresh interpreter, best of several runs
+    :param module:
+    :param runs:
+    :return:
+    """
+    timings = []
+    imported = set()
+
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_ROOT,
+                                 capture_output=True, text=True, check=True)
+
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            name = name.strip()
+            imported.add(name)
+
+            if name == module:
+                timings.append(int(cumulative) / 1000)
+
+    heavy_modules = sorted(x for x in imported if x in HEAVY_MODULES)
+    return ImportReport(module=module, milliseconds=min(timings), budget=IMPORT_BUDGETS.get(module, float('inf')),
+                        heavy_modules=heavy_modules)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Import time report for the FUT entry points')
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGETS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', type=Path, help='write the report to a json file')
+    options = parser.parse_args(args)
+    reports = [measure_import(x, runs=options.runs) for x in options.modules]
+
+    for report in reports:
+        status = 'ok' if report.passed else 'OVER BUDGET'
+        heavy = f' (loads {", ".join(report.heavy_modules)})' if report.heavy_modules else ''
+        print(f'{report.module}: {report.milliseconds:.1f} ms / {report.budget} ms {status}{heavy}')
+
+    if options.json:
+        options.json.write_text(json.dumps([report._asdict() for report in reports], indent=2))
+
+    return 0 if all(report.passed for report in reports) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
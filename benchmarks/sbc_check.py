@@ -0,0 +1,130 @@
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+import sys
+
+from typing import List, NamedTuple, Optional
+
+from benchmarks.synthetic_data import SPECIAL_ID_OFFSET
+from fut_utils import sbc_solver
+from fut_utils.fut_enums import FutAttr
+from fut_utils.squad_builder import base_ids
+
+SBC_TARGETS: tuple = (80, 82, 84)
+EXACT_TARGETS: tuple = (80, 83)
+
+
+class CheckReport(NamedTuple):
+    solutions: int
+    invalid: int
+    inexact: int
+
+    @property
+    def passed(self) -> bool:
+        return not self.invalid and not self.inexact
+
+
+def multi_version_club(players: int, max_versions: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Club where every player has one to max_versions cards with unrelated ratings, special versions adding
+    multiples of SPECIAL_ID_OFFSET to the player id as in the exports
+    :param players:
+    :param max_versions:
+    :param seed:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    versions = rng.integers(1, max_versions + 1, size=players)
+    player_ids = np.repeat(np.arange(1000, 1000 + players), versions)
+    version = np.concatenate([np.arange(x) for x in versions])
+    rows = len(player_ids)
+    return pd.DataFrame({
+        FutAttr.id.value: player_ids + version * SPECIAL_ID_OFFSET,
+        FutAttr.surname.value: [f'Player {x} v{y}' for x, y in zip(player_ids, version)],
+        FutAttr.rating.value: rng.integers(74, 93, size=rows),
+        FutAttr.untradeable.value: rng.random(rows) < 0.4,
+        FutAttr.loans.value: np.zeros(rows, dtype=int),
+        FutAttr.discard_value.value: rng.integers(0, 500, size=rows),
+    })
+
+
+def is_valid(solution: sbc_solver.SbcSolution, target: int) -> bool:
+    """
+    Eleven different players reaching the target, the cost adding up the cost of the cards
+    :param solution:
+    :param target:
+    :return:
+    """
+    players = solution.players
+    ids = players[FutAttr.id.value].to_numpy().astype(np.int64)
+    return (len(players.index) == sbc_solver.SQUAD_SIZE and len(np.unique(base_ids(ids))) == sbc_solver.SQUAD_SIZE
+            and solution.rating >= target
+            and solution.rating == sbc_solver.team_rating(players[FutAttr.rating.value].to_numpy())
+            and abs(solution.cost - players[sbc_solver.CARD_COST].sum()) <= sbc_solver.SQUAD_SIZE)
+
+
+def cheapest(data: pd.DataFrame, target: int) -> float:
+    """
+    Lowest cost reaching the target by trying every squad, for small clubs only
+    :param data:
+    :param target:
+    :return: inf if no squad reaches it
+    """
+    costs = sbc_solver.card_costs(data)
+    ratings = data[FutAttr.rating.value].to_numpy()
+    versions = pd.Series(np.arange(len(data.index))).groupby(base_ids(data[FutAttr.id.value].to_numpy())).agg(list)
+    result = np.inf
+
+    for players in itertools.combinations(versions.tolist(), sbc_solver.SQUAD_SIZE):
+        for rows in itertools.product(*players):
+            rows = list(rows)
+            cost = costs[rows].sum()
+
+            if cost < result and sbc_solver.team_rating(ratings[rows]) >= target:
+                result = cost
+
+    return result
+
+
+def check(clubs: int = 20, seed: int = 0) -> CheckReport:
+    """
+    Solve clubs of players with several versions: every solution must be a valid squad and, on clubs small enough
+    to try every squad, the cheapest must match the lowest cost found that way
+    :param clubs: number of clubs of each kind
+    :param seed:
+    :return:
+    """
+    solutions = invalid = inexact = 0
+
+    for index in range(clubs):
+        data = multi_version_club(24, 3, seed=seed + index)
+
+        for target in SBC_TARGETS:
+            result = sbc_solver.solve(data, target, solutions=20)
+            solutions += len(result)
+            invalid += sum(not is_valid(x, target) for x in result)
+
+        data = multi_version_club(13, 2, seed=seed + clubs + index)
+
+        for target in EXACT_TARGETS:
+            result = sbc_solver.solve(data, target, solutions=1)
+            lowest = cheapest(data, target)
+            inexact += not np.isclose(result[0].cost if result else np.inf, lowest)
+
+    return CheckReport(solutions=solutions, invalid=invalid, inexact=inexact)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check the SBC solver on clubs of players with several versions')
+    parser.add_argument('--clubs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(args)
+    report = check(clubs=options.clubs, seed=options.seed)
+    print(f'{report.solutions} solutions, {report.invalid} invalid, {report.inexact} not the cheapest '
+          f'{"ok" if report.passed else "FAILED"}')
+    return 0 if report.passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import argparse
+import numpy as np
+import pandas as pd
+import sys
+
+from typing import List, NamedTuple, Optional
+
+from benchmarks.synthetic_data import SPECIAL_ID_OFFSET
+from fut_utils import squad_builder
+from fut_utils.fut_enums import FutAttr, League
+
+FORMATION: squad_builder.Formation = squad_builder.FORMATIONS['4-4-2']
+CHEMISTRY_WEIGHTS: tuple = (0, 0.0, 1, 2.5)
+CENTRE_BACK: int = 5
+STRIKER: int = 25
+FILLER_RATING: int = 70
+SHARED_PLAYER_SCORE: int = 779
+MAX_SQUADS: float = 3e5
+
+
+class CheckReport(NamedTuple):
+    squads: int
+    wrong: int
+
+    @property
+    def passed(self) -> bool:
+        return not self.wrong
+
+
+def shared_player_club() -> pd.DataFrame:
+    """
+    Club whose best centre back and best striker are two versions of the same player, taking the best card of each
+    position then fixing the clash gives 669 over the centre backs and strikers where 709 is possible, 779 with
+    the fillers of the other positions
+    :return:
+    """
+    rows = [(5000, CENTRE_BACK, 90), (5000 + SPECIAL_ID_OFFSET, STRIKER, 90), (1, CENTRE_BACK, 89),
+            (2, CENTRE_BACK, 50), (3, STRIKER, 60), (4, STRIKER, 10)]
+    others = [x for x in FORMATION if x not in (CENTRE_BACK, STRIKER)]
+    rows.extend((10 + index, position, FILLER_RATING) for index, position in enumerate(others))
+    return pd.DataFrame({
+        FutAttr.id.value: [x[0] for x in rows],
+        FutAttr.surname.value: [f'Player {x[0]}' for x in rows],
+        FutAttr.rating.value: [x[2] for x in rows],
+        FutAttr.position.value: [x[1] for x in rows],
+        FutAttr.club.value: 'Club',
+        FutAttr.league.value: 'League',
+        FutAttr.country.value: 'Country',
+    })
+
+
+def small_club(players: int = 16, seed: int = 0) -> pd.DataFrame:
+    """
+    Club of a few players with one or two versions over the positions of the formation, a tenth of them icons
+    :param players:
+    :param seed:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    versions = rng.integers(1, 3, size=players)
+    player_ids = np.repeat(np.arange(100, 100 + players), versions)
+    version = np.concatenate([np.arange(x) for x in versions])
+    rows = len(player_ids)
+    return pd.DataFrame({
+        FutAttr.id.value: player_ids + version * SPECIAL_ID_OFFSET,
+        FutAttr.surname.value: [f'Player {x} v{y}' for x, y in zip(player_ids, version)],
+        FutAttr.rating.value: rng.integers(80, 90, size=rows),
+        FutAttr.position.value: rng.choice(sorted(set(FORMATION)), size=rows),
+        FutAttr.club.value: [f'Club {x}' for x in rng.integers(3, size=rows)],
+        FutAttr.league.value: rng.choice(['League 1', 'League 2', League.icons.value], size=rows, p=[.45, .45, .1]),
+        FutAttr.country.value: [f'Country {x}' for x in rng.integers(3, size=rows)],
+    })
+
+
+def highest_score(data: pd.DataFrame, chemistry_weight: float) -> Optional[float]:
+    """
+    Highest score of the candidates by trying every eleven, for small clubs only
+    :param data:
+    :param chemistry_weight:
+    :return: -inf if the club cannot fill the formation, None if there are too many elevens to try
+    """
+    pools = [squad_builder.candidate_pools(data, FORMATION)[x] for x in FORMATION]
+
+    if np.prod([len(x.rows) for x in pools], dtype=float) > MAX_SQUADS:
+        return None
+
+    picks = np.stack([x.ravel() for x in np.indices([len(x.rows) for x in pools])], axis=-1)
+    ids = np.sort(np.stack([x.base_ids[picks[:, slot]] for slot, x in enumerate(pools)], axis=-1), axis=-1)
+    picks = picks[(ids[:, 1:] != ids[:, :-1]).all(-1)]
+
+    if not len(picks):
+        return -np.inf
+
+    clubs, leagues, nations, icons = (np.stack([getattr(x, name)[picks[:, slot]] for slot, x in enumerate(pools)],
+                                               axis=-1) for name in ('clubs', 'leagues', 'nations', 'icons'))
+    ratings = sum(x.ratings[picks[:, slot]] for slot, x in enumerate(pools))
+    chemistry = squad_builder.chemistry_points(clubs, leagues, nations, icons).sum(-1)
+    return float((ratings + chemistry_weight * chemistry).max())
+
+
+def check(clubs: int = 20, seed: int = 0) -> CheckReport:
+    """
+    Every weight, whole or not, must find the best eleven of the shared player club, and on clubs small enough to
+    try every eleven a proven eleven must match the highest score found that way
+    :param clubs:
+    :param seed:
+    :return:
+    """
+    squads = wrong = 0
+    data = shared_player_club()
+
+    for chemistry_weight in CHEMISTRY_WEIGHTS:
+        squad = squad_builder.best_xi(data, FORMATION, chemistry_weight=chemistry_weight)
+        squads += 1
+        wrong += squad is None or squad.total_rating != SHARED_PLAYER_SCORE or not squad.proven
+
+    for index in range(clubs):
+        data = small_club(seed=seed + index)
+
+        for chemistry_weight in (0, 1, 3):
+            highest = highest_score(data, chemistry_weight)
+
+            if highest is None:
+                continue
+
+            squad = squad_builder.best_xi(data, FORMATION, chemistry_weight=chemistry_weight)
+            squads += 1
+            score = -np.inf if squad is None else squad.score
+            wrong += squad is not None and not squad.proven or not np.isclose(score, highest)
+
+    return CheckReport(squads=squads, wrong=wrong)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check the best eleven on clubs small enough to try every eleven')
+    parser.add_argument('--clubs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(args)
+    report = check(clubs=options.clubs, seed=options.seed)
+    print(f'{report.squads} squads, {report.wrong} not the best {"ok" if report.passed else "FAILED"}')
+    return 0 if report.passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import argparse
+import numpy as np
+import pandas as pd
+import sys
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from fut_utils import CACHE_DIR, POSITION_DICT
+from fut_utils.fut_enums import FutAttr, League, Rarity
+
+SYNTHETIC_DIR: Path = CACHE_DIR.joinpath('benchmarks')
+SYNTHETIC_STEM: str = 'synthetic'
+SIZES: tuple = (1_000, 10_000, 100_000, 1_000_000)
+START_DATE: date = date(2024, 1, 1)
+COLUMNS: list = [
+    'Id', 'Lastname', 'Name', 'Rating', 'Position', 'Rarity', 'Skill Moves', 'Weak Foot', 'Chemistry', 'Country',
+    'League', 'Club', 'Untradeable', 'Loans', 'Bought For', 'Price Range', 'Discard Value', 'Location',
+]
+RARITY_WEIGHTS: dict = {
+    Rarity.common: 0.62,
+    Rarity.rare: 0.22,
+    Rarity.totw: 0.06,
+    Rarity.tots: 0.03,
+    Rarity.tots_moments: 0.02,
+    Rarity.futties: 0.03,
+    Rarity.futties_hero: 0.01,
+    Rarity.futties_icon: 0.01,
+    Rarity.futties_premium: 0.02,
+}
+RARITY_RATING: dict = {Rarity.common: (66, 7), Rarity.rare: (72, 6)}
+SPECIAL_RATING: tuple = (88, 4)
+POSITION_SHARES: dict = {
+    'GK': 0.1, 'RWB': 0.016, 'RB': 0.066, 'CB': 0.178, 'LB': 0.062, 'LWB': 0.012, 'CDM': 0.087, 'RM': 0.041,
+    'CM': 0.127, 'LM': 0.047, 'CAM': 0.053, 'CF': 0.013, 'RW': 0.03, 'ST': 0.141, 'LW': 0.028,
+}
+POSITION_WEIGHTS: dict = {code: POSITION_SHARES[name] for code, name in POSITION_DICT.items()}
+POPULAR_LEAGUES: tuple = (League.premier_league, League.la_liga, League.bundesliga, League.serie_a, League.ligue_1)
+LEAGUE_ORDER: tuple = POPULAR_LEAGUES + tuple(x for x in League if x not in POPULAR_LEAGUES)
+LEAGUE_WEIGHTS: dict = {league: 1 / (rank + 1) ** 0.8 for rank, league in enumerate(LEAGUE_ORDER)}
+COUNTRIES: tuple = (
+    'England', 'Spain', 'Germany', 'France', 'Italy', 'Brazil', 'Argentina', 'Portugal', 'Netherlands', 'Belgium',
+    'United States', 'Scotland', 'Türkiye', 'Saudi Arabia', 'Denmark', 'Norway', 'Japan', 'Nigeria',
+)
+LOCATIONS: dict = {'CLUB': 0.93, 'TRADEPILE': 0.05, 'WATCHLIST': 0.02}
+SYLLABLES: tuple = ('ka', 'ro', 'mi', 'lo', 'sa', 'ne', 'ti', 'va', 'do', 'ri', 'bel', 'mar', 'son', 'gar', 'ez')
+CLUBS_PER_LEAGUE: int = 18
+SPECIAL_ID_OFFSET: int = 2**24
+SNAPSHOT_CHURN: float = 0.02
+
+
+def synthetic_path(rows: int, snapshot: int = 0, data_dir: Path = SYNTHETIC_DIR) -> Path:
+    """
+    Location of a synthetic data file, dated one day apart per snapshot
+    :param rows:
+    :param snapshot:
+    :param data_dir:
+    :return:
+    """
+    snapshot_date = START_DATE + timedelta(days=snapshot)
+    return data_dir.joinpath(f'{SYNTHETIC_STEM}-{rows}_{snapshot_date:%Y_%m_%d}.csv')
+
+
+def _choice(rng: np.random.Generator, weights: dict, size: int) -> np.ndarray:
+    """
+    Weighted sample of the keys of a dict
+    :param rng:
+    :param weights:
+    :param size:
+    :return:
+    """
+    probabilities = np.array(list(weights.values()), dtype=float)
+    return rng.choice(len(weights), size=size, p=probabilities / probabilities.sum())
+
+
+def _names(rng: np.random.Generator, count: int) -> np.ndarray:
+    """
+    Pool of pronounceable names
+    :param rng:
+    :param count:
+    :return:
+    """
+    syllables = np.array(SYLLABLES, dtype=object)
+    parts = rng.integers(len(SYLLABLES), size=(count, 3))
+    return np.array([''.join(syllables[x]).capitalize() for x in parts], dtype=object)
+
+
+def generate_club(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Deterministic club in the club-analyzer schema
+    Leagues, rarities and positions follow the enums and POSITION_DICT with weights resembling a real club
+    Some cards appear twice with a different location, as in the exports
+    :param rows:
+    :param seed:
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    rarities = list(RARITY_WEIGHTS)
+    rarity_index = _choice(rng, RARITY_WEIGHTS, rows)
+    special = rarity_index >= 2
+
+    ratings = np.empty(rows, dtype=np.int64)
+    for index, rarity in enumerate(rarities):
+        mask = rarity_index == index
+        mean, spread = RARITY_RATING.get(rarity, SPECIAL_RATING)
+        ratings[mask] = rng.normal(mean, spread, size=int(mask.sum())).round()
+    ratings = ratings.clip(45, 99)
+
+    positions = np.array(list(POSITION_WEIGHTS))[_choice(rng, POSITION_WEIGHTS, rows)]
+    leagues = np.array([x.value for x in LEAGUE_WEIGHTS], dtype=object)
+    league_index = _choice(rng, LEAGUE_WEIGHTS, rows)
+    clubs = np.array([f'{league} {n + 1}' for league in leagues for n in range(CLUBS_PER_LEAGUE)], dtype=object)
+    club_index = league_index * CLUBS_PER_LEAGUE + rng.integers(CLUBS_PER_LEAGUE, size=rows)
+    name_pool = _names(rng, max(rows // 4, 64))
+    base_ids = rng.choice(np.arange(1, 300_000), size=rows, replace=rows > 299_999)
+    ids = base_ids + special * rng.integers(1, 40, size=rows) * SPECIAL_ID_OFFSET
+    duplicates = rng.random(rows) < 0.01
+    ids[duplicates] = np.roll(ids, 1)[duplicates]
+    untradeable = rng.random(rows) < np.where(special, 0.6, 0.3)
+    discard = np.where(ratings >= 75, ratings * 10, ratings * 2)
+
+    data = pd.DataFrame({
+        'Id': ids,
+        'Lastname': name_pool[rng.integers(len(name_pool), size=rows)],
+        'Name': name_pool[rng.integers(len(name_pool), size=rows)],
+        'Rating': ratings,
+        'Position': positions,
+        'Rarity': np.array([x.value for x in rarities], dtype=object)[rarity_index],
+        'Skill Moves': rng.integers(1, 6, size=rows),
+        'Weak Foot': rng.integers(1, 6, size=rows),
+        'Chemistry': np.where(positions == 0, 'GK Basic', 'Basic'),
+        'Country': np.array(COUNTRIES, dtype=object)[rng.integers(len(COUNTRIES), size=rows)],
+        'League': leagues[league_index],
+        'Club': clubs[club_index],
+        'Untradeable': np.where(untradeable, 'true', 'false'),
+        'Loans': np.where(rng.random(rows) < 0.01, rng.integers(1, 10, size=rows), 0),
+        'Bought For': np.where(untradeable, 0, (rng.integers(1, 200, size=rows) * 50)),
+        'Price Range': np.where(ratings >= 75, '700-10000', '150-10000'),
+        'Discard Value': np.where(untradeable, 0, discard),
+        'Location': np.array(list(LOCATIONS), dtype=object)[_choice(rng, LOCATIONS, rows)],
+    })
+    return data.sort_values(FutAttr.rating.value, ascending=False, kind='stable', ignore_index=True)[COLUMNS]
+
+
+def evolve_club(data: pd.DataFrame, seed: int, churn: float = SNAPSHOT_CHURN) -> pd.DataFrame:
+    """
+    Next snapshot of a club: a fraction of the cards are replaced and a few ratings change
+    :param data:
+    :param seed:
+    :param churn: fraction of cards replaced
+    :return:
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(data.index)
+    replaced = max(int(rows * churn), 1)
+    kept = data.drop(index=rng.choice(rows, size=replaced, replace=False))
+    added = generate_club(replaced, seed=seed)
+    result = pd.concat([kept, added], ignore_index=True)
+    upgraded = rng.random(len(result.index)) < churn / 2
+    result.loc[upgraded, FutAttr.rating.value] = (result.loc[upgraded, FutAttr.rating.value] + 1).clip(upper=99)
+    return result.sort_values(FutAttr.rating.value, ascending=False, kind='stable', ignore_index=True)
+
+
+def write_snapshots(rows: int, snapshots: int = 1, seed: int = 0, data_dir: Path = SYNTHETIC_DIR,
+                    force: bool = False) -> List[Path]:
+    """
+    Write a series of synthetic snapshots, reusing files that already exist
+    :param rows:
+    :param snapshots:
+    :param seed:
+    :param data_dir:
+    :param force: regenerate existing files
+    :return:
+    """
+    data_dir.mkdir(parents=True, exist_ok=True)
+    result = [synthetic_path(rows, snapshot=x, data_dir=data_dir) for x in range(snapshots)]
+
+    if not force and all(x.exists() for x in result):
+        return result
+
+    data = generate_club(rows, seed=seed)
+
+    for snapshot, csv_path in enumerate(result):
+        if snapshot:
+            data = evolve_club(data, seed=seed + snapshot)
+        data.to_csv(csv_path.as_posix(), index=False)
+
+    return result
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Generate synthetic club-analyzer data files')
+    parser.add_argument('sizes', nargs='*', type=int, default=list(SIZES))
+    parser.add_argument('--snapshots', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, default=SYNTHETIC_DIR)
+    parser.add_argument('--force', action='store_true', help='regenerate existing files')
+    options = parser.parse_args(args)
+
+    for rows in options.sizes:
+        for csv_path in write_snapshots(rows, snapshots=options.snapshots, seed=options.seed,
+                                        data_dir=options.output, force=options.force):
+            print(csv_path)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,4 +10,3 @@ def image_path(image_name: str) -> Path:
 
 
 CREATOR: str = 'Robosoft'
-Path.home().joinpath('Autodesk/Bifrost/Compounds').mkdir(parents=True, exist_ok=True)
@@ -1,14 +1,57 @@
+from __future__ import annotations
+
+import hashlib
 import os
-from git import Repo
-from typing import List
+import threading
+
+from contextlib import contextmanager
+from typing import AbstractSet, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 from pathlib import Path
 
 from core import PROJECT_ROOT, DROPBOX
+from core.lazy_import import lazy_import
+
+git = lazy_import('git')
+
+_lock: threading.Lock = threading.Lock()
+
+
+class IndexStat(NamedTuple):
+    mtime_ns: int
+    size: int
+    binsha: bytes
+
+
+class DirectoryStatus(NamedTuple):
+    new: Tuple[Path, ...]
+    modified: Tuple[Path, ...]
+    missing: Tuple[Path, ...]
+
+    @property
+    def changed(self) -> Tuple[Path, ...]:
+        return self.new + self.modified
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.modified or self.missing)
+
+
+def blob_sha(file_path: Path) -> bytes:
+    """
+    Git blob id of a file, the same hash git stores in the index
+    :param file_path:
+    :return:
+    """
+    content = file_path.read_bytes()
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).digest()
 
 
 class GitManager:
     def __init__(self):
-        self.repo: Repo = Repo(PROJECT_ROOT.as_posix())
+        self.repo: git.Repo = git.Repo(PROJECT_ROOT.as_posix())
+        self._lock: threading.RLock = threading.RLock()
+        self._index_entries: Dict[Path, IndexStat] = {}
+        self._index_signature: Optional[Tuple[int, int]] = None
+        self._local: threading.local = threading.local()
 
     def __repr__(self) -> str:
         info = f'Name: {self.name}'
@@ -36,8 +79,53 @@ class GitManager:
         return [commit.hexsha for commit in self.repo.iter_commits()]
 
     @property
-    def files_in_repo(self):
-        return [Path(blob[1].path) for blob in self.repo.index.iter_blobs()]
+    def _pending(self) -> Optional[List[Path]]:
+        """
+        Files added inside the batch of the current thread, None outside of a batch
+        :return:
+        """
+        return getattr(self._local, 'pending', None)
+
+    @property
+    def index_file(self) -> Path:
+        return Path(self.repo.git_dir).joinpath('index')
+
+    @property
+    def index_entries(self) -> Dict[Path, IndexStat]:
+        """
+        Stat and blob id of every path in the git index, re-read only when the index file changes
+        :return:
+        """
+        with self._lock:
+            signature = self._read_index_signature()
+
+            if signature != self._index_signature:
+                self._index_entries = {
+                    Path(entry.path): IndexStat(mtime_ns=entry.mtime[0] * 10**9 + entry.mtime[1], size=entry.size,
+                                                binsha=entry.binsha)
+                    for entry in self.repo.index.entries.values()}
+                self._index_signature = signature
+
+            return self._index_entries
+
+    @property
+    def index_paths(self) -> AbstractSet[Path]:
+        return self.index_entries.keys()
+
+    @property
+    def files_in_repo(self) -> List[Path]:
+        return sorted(self.index_paths)
+
+    def _read_index_signature(self) -> Optional[Tuple[int, int]]:
+        """
+        Modification time and size of the index file, None if there is no index yet
+        :return:
+        """
+        try:
+            stat = self.index_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
     def check_directory_for_new_files(self, directory: Path) -> List[Path]:
         """
@@ -45,13 +133,72 @@ class GitManager:
         :param directory:
         :return:
         """
-        absolute_path = self.root.joinpath(directory)
-        local_files = [x.relative_to(absolute_path) for x in absolute_path.iterdir()]
-        repo_files = [self.root.joinpath(x) for x in self.files_in_repo]
-        filtered = [x.relative_to(absolute_path) for x in repo_files if absolute_path in x.parents]
-        new_files = [x for x in local_files if x not in filtered]
+        relative_path = self.root.joinpath(directory).relative_to(self.root)
+        return [x.relative_to(relative_path) for x in self.scan_directories(relative_path).new]
+
+    def scan_directories(self, *directories: Path) -> DirectoryStatus:
+        """
+        Compare the files of several directories with the index in one pass
+        A file is modified if its stat differs from the index and its content hash does too
+        Files matched by .gitignore are not reported as new
+        :param directories: paths relative to the root, or absolute paths inside it
+        :return:
+        """
+        directories = [x.relative_to(self.root) if x.is_absolute() else x for x in map(Path, directories)]
+        index_entries = self.index_entries
+        new, modified, local = [], [], set()
+
+        for directory in directories:
+            for dir_path, _, file_names in os.walk(self.root.joinpath(directory)):
+                for file_name in file_names:
+                    absolute_path = Path(dir_path, file_name)
+                    file_path = absolute_path.relative_to(self.root)
+                    local.add(file_path)
+                    entry = index_entries.get(file_path)
+
+                    if entry is None:
+                        new.append(file_path)
+                    elif self._is_modified(absolute_path, entry):
+                        modified.append(file_path)
+
+        if new:
+            ignored = {Path(x) for x in self.repo.ignored(*new)}
+            new = [x for x in new if x not in ignored]
+
+        missing = [x for x in index_entries if x not in local and any(x.is_relative_to(d) for d in directories)]
+        return DirectoryStatus(new=tuple(sorted(new)), modified=tuple(sorted(modified)), missing=tuple(sorted(missing)))
+
+    @staticmethod
+    def _is_modified(file_path: Path, entry: IndexStat) -> bool:
+        """
+        Returns True if a file differs from its index entry, hashing only when the stat does not match
+        :param file_path:
+        :param entry:
+        :return:
+        """
+        stat = file_path.stat()
+
+        if stat.st_size != entry.size:
+            return True
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return False
+        return blob_sha(file_path) != entry.binsha
 
-        return new_files
+    def sync(self, *directories: Path, dry_run: bool = False) -> DirectoryStatus:
+        """
+        Stage every new and modified file of several directories with a single index write
+        Missing files are reported but not removed from the index
+        :param directories: paths relative to the root
+        :param dry_run: report without staging
+        :return:
+        """
+        with self._lock:
+            status = self.scan_directories(*directories)
+
+            if status.changed and not dry_run:
+                self._write_index(status.changed)
+
+        return status
 
     def is_file_in_repo(self, file_path: Path) -> bool:
         """
@@ -59,15 +206,81 @@ class GitManager:
         :param file_path:
         :return:
         """
-        return file_path in self.files_in_repo
+        return file_path in self.index_paths
 
     def add(self, file_path: Path):
         """
         Add a file to the current changelist
+        Inside a batch of the calling thread the file is staged when the batch closes
         :param file_path:
         """
-        if not self.is_file_in_repo(file_path) and self.root.joinpath(file_path).exists():
-            self.repo.index.add([file_path])
+        self.add_many([file_path])
+
+    def add_many(self, file_paths: Iterable[Path]):
+        """
+        Add several files to the current changelist, writing the index once
+        Inside a batch of the calling thread the files are staged when the batch closes
+        :param file_paths:
+        """
+        if self._pending is not None:
+            self._pending.extend(file_paths)
+            return
+
+        with self._lock:
+            index_paths = self.index_paths
+            new_files = list(dict.fromkeys(x for x in file_paths
+                                           if x not in index_paths and self.root.joinpath(x).exists()))
+
+            if new_files:
+                self._write_index(new_files)
+
+    def _write_index(self, file_paths: Sequence[Path]):
+        """
+        Stage files in one index write, the cached entries are re-read on next access
+        :param file_paths:
+        """
+        with self._lock:
+            self.repo.index.add(list(file_paths))
+            self._index_signature = None
+
+    @contextmanager
+    def batch(self) -> Iterator[GitManager]:
+        """
+        Collect every file the calling thread adds inside the block and stage them with a single index write
+        Each thread has its own batch, and nested batches are staged by the outermost one
+        Nothing is staged if the block raises
+        :return:
+        """
+        if self._pending is not None:
+            yield self
+            return
+
+        self._local.pending = []
+
+        try:
+            yield self
+        except BaseException:
+            self._local.pending = None
+            raise
+
+        pending, self._local.pending = self._local.pending, None
+        self.add_many(pending)
+
+
+_git_manager: Optional[GitManager] = None
+
+
+def git_manager() -> GitManager:
+    """
+    Long-lived GitManager shared by every thread and module that stages files
+    :return:
+    """
+    global _git_manager
+
+    with _lock:
+        if _git_manager is None:
+            _git_manager = GitManager()
+        return _git_manager
 
 
 if __name__ == '__main__':
@@ -0,0 +1,167 @@
+import functools
+import json
+import marshal
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from core.lazy_import import lazy_import
+
+tracemalloc = lazy_import('tracemalloc')  # only used when instrumentation traces memory
+
+ENVIRONMENT_VARIABLE: str = 'FUT_INSTRUMENT'
+TIME_ONLY: str = 'time'
+_MODE: str = os.environ.get(ENVIRONMENT_VARIABLE, '').lower()
+ENABLED: bool = _MODE in ('1', 'true', 'yes', 'on', TIME_ONLY)
+TRACE_MEMORY: bool = ENABLED and _MODE != TIME_ONLY
+
+
+class CallStats(NamedTuple):
+    name: str
+    calls: int
+    total_seconds: float
+    own_seconds: float
+    max_seconds: float
+    peak_bytes: int
+    location: Tuple[str, int, str]
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class _Frame:
+    __slots__ = ('start_bytes', 'peak_bytes', 'child_seconds')
+
+    def __init__(self, start_bytes: int):
+        self.start_bytes: int = start_bytes
+        self.peak_bytes: int = start_bytes
+        self.child_seconds: float = 0.0
+
+
+_lock: threading.Lock = threading.Lock()
+_stats: Dict[str, CallStats] = {}
+_local: threading.local = threading.local()
+
+
+def _record(name: str, location: Tuple[str, int, str], seconds: float, own_seconds: float, peak_bytes: int):
+    """
+    Accumulate one call into the statistics
+    :param name:
+    :param location:
+    :param seconds:
+    :param own_seconds:
+    :param peak_bytes:
+    """
+    with _lock:
+        stats = _stats.get(name)
+
+        if stats is None:
+            _stats[name] = CallStats(name=name, calls=1, total_seconds=seconds, own_seconds=own_seconds,
+                                     max_seconds=seconds, peak_bytes=peak_bytes, location=location)
+        else:
+            _stats[name] = stats._replace(calls=stats.calls + 1, total_seconds=stats.total_seconds + seconds,
+                                          own_seconds=stats.own_seconds + own_seconds,
+                                          max_seconds=max(stats.max_seconds, seconds),
+                                          peak_bytes=max(stats.peak_bytes, peak_bytes))
+
+
+def instrument(function: Optional[Callable] = None, name: Optional[str] = None) -> Callable:
+    """
+    Record call count, wall time and tracemalloc peak of a function when instrumentation is enabled
+    The function is returned untouched when it is disabled, so there is no overhead
+    Apply below @property or @staticmethod so the getter itself is wrapped
+    Peaks are measured per thread of calls but tracemalloc counts allocations from every thread
+    Set the environment variable to "time" to skip tracemalloc, which slows imports down considerably
+    :param function:
+    :param name: defaults to the qualified name of the function
+    :return:
+    """
+    if function is None:
+        return functools.partial(instrument, name=name)
+
+    if not ENABLED:
+        return function
+
+    name = name or function.__qualname__
+    code = function.__code__
+    location = (code.co_filename, code.co_firstlineno, function.__qualname__)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stack: List[_Frame] = getattr(_local, 'stack', None)
+
+        if stack is None:
+            stack = _local.stack = []
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        if stack:
+            stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak)
+
+        tracemalloc.reset_peak()
+        frame = _Frame(current)
+        stack.append(frame)
+        start = time.perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+            frame.peak_bytes = max(frame.peak_bytes, tracemalloc.get_traced_memory()[1])
+
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, frame.peak_bytes)
+                stack[-1].child_seconds += seconds
+
+            _record(name, location, seconds, seconds - frame.child_seconds, frame.peak_bytes - frame.start_bytes)
+
+    return wrapper
+
+
+def stats() -> List[CallStats]:
+    """
+    Recorded statistics, slowest total first
+    :return:
+    """
+    with _lock:
+        return sorted(_stats.values(), key=lambda x: x.total_seconds, reverse=True)
+
+
+def reset():
+    """
+    Clear the recorded statistics
+    """
+    with _lock:
+        _stats.clear()
+
+
+def dump_json(file_path: Path) -> Path:
+    """
+    Write the statistics to a json file
+    :param file_path:
+    :return:
+    """
+    records = [{key: value for key, value in x._asdict().items() if key != 'location'} for x in stats()]
+    file_path.write_text(json.dumps(records, indent=2))
+    return file_path
+
+
+def dump_pstats(file_path: Path) -> Path:
+    """
+    Write the statistics in the marshalled format read by pstats.Stats and profile viewers
+    Call counts and times are recorded per function without callers
+    :param file_path:
+    :return:
+    """
+    entries = {x.location: (x.calls, x.calls, x.own_seconds, x.total_seconds, {}) for x in stats()}
+    file_path.write_bytes(marshal.dumps(entries))
+    return file_path
+
+
+if TRACE_MEMORY:
+    tracemalloc.start()
@@ -0,0 +1,39 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    _lock: threading.RLock = threading.RLock()
+
+    def __getattr__(self, attr: str):
+        """
+        Import the real module on first access to a missing attribute and take over its namespace
+        The import runs under a lock so threads racing on first access all see the complete module
+        :param attr:
+        :return:
+        """
+        with self._lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first attribute access rather than immediately
+    Use attribute access (module.name) on the result, "from module import name" loads it straight away
+    Safe to use from several threads, unlike importlib.util.LazyLoader before Python 3.12
+    :param name: full module name
+    :return:
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+
+    return LazyModule(name)
@@ -2,6 +2,9 @@ from pathlib import Path
 
 DATA_DIR: Path = Path(__file__).parent.joinpath('data')
 PLOTS_DIR: Path = Path(__file__).parent.joinpath('plots')
+CACHE_DIR: Path = Path(__file__).parent.joinpath('cache')
+STORE_DIR: Path = Path(__file__).parent.joinpath('store')
+DATA_FILE_STEM: str = 'club-analyzer'
 POSITION_DICT: dict = {
     0: 'GK',
     2: 'RWB',
@@ -0,0 +1,5 @@
+import sys
+
+from fut_utils.cli import main
+
+sys.exit(main())
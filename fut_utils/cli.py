@@ -0,0 +1,261 @@
+import argparse
+import logging
+import pandas as pd
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from pandas.core.frame import DataFrame
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fut_utils import DATA_DIR
+from fut_utils.fut_enums import FutAttr
+from fut_utils.fut_manager import FutManager
+from fut_utils import league_positions
+from fut_utils import snapshot_ingest
+from fut_utils import snapshot_store
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+SNAPSHOT: str = 'Snapshot'
+OLD_SNAPSHOT: str = 'Old Snapshot'
+VALUE: str = 'Value'
+COUNT: str = 'Count'
+MEMBERSHIP_SEPARATOR: str = ','
+
+
+class OutputFormat(Enum):
+    json = 'json'
+    csv = 'csv'
+    markdown = 'markdown'
+
+
+def parse_predicate(text: str) -> Tuple[str, str]:
+    """
+    Split a Column=value predicate, commas in the value list alternatives
+    :param text:
+    :return: (column, value)
+    """
+    column, separator, value = text.partition('=')
+
+    if not separator:
+        raise argparse.ArgumentTypeError(f'Expected Column=value, got {text!r}')
+    return column_name(column), value
+
+
+def column_name(text: str) -> str:
+    """
+    Column of an attribute given by column name or FutAttr member name, e.g. Rating or rating
+    :param text:
+    :return:
+    """
+    text = text.strip()
+    return FutAttr[text].value if text in FutAttr.__members__ else text
+
+
+def typed_value(data: DataFrame, column: str, value: str):
+    """
+    Convert a predicate value to the type of its column, integer columns taking numbers and booleans true/false
+    Positions may also be given by name, see snapshot_query.normalize_predicate
+    :param data:
+    :param column:
+    :param value:
+    :return:
+    """
+    values = value.split(MEMBERSHIP_SEPARATOR) if MEMBERSHIP_SEPARATOR in value else [value]
+    dtype = data[column].dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        values = [x.strip().lower() == 'true' for x in values]
+    elif pd.api.types.is_integer_dtype(dtype):
+        values = [int(x) if x.strip().lstrip('-').isdigit() else x for x in values]
+
+    return values if len(values) > 1 else values[0]
+
+
+def summary_rows(fut_manager: FutManager, **_) -> DataFrame:
+    return DataFrame([fut_manager.summary._asdict()])
+
+
+def league_rows(fut_manager: FutManager, league: str, **_) -> DataFrame:
+    table = league_positions.league_table(fut_manager.league_analyser(league=league))
+    return table.drop(columns=league_positions.POSITION_ORDER)
+
+
+def find_rows(fut_manager: FutManager, predicates: List[Tuple[str, str]], columns: Optional[List[str]] = None,
+              **_) -> DataFrame:
+    data = fut_manager.data
+    result = fut_manager.find([(column, typed_value(data, column, value)) for column, value in predicates])
+    return result[columns] if columns else result
+
+
+def frequency_rows(fut_manager: FutManager, attribute: str, **_) -> DataFrame:
+    counts = fut_manager.projection([attribute]).data[attribute].value_counts()
+    counts = counts[counts > 0]
+    return DataFrame({VALUE: counts.index.astype(object), COUNT: counts.to_numpy()})
+
+
+def diff_rows(fut_manager: FutManager, old_path: Path, **_) -> DataFrame:
+    diff = fut_manager.diff(old_path=old_path)
+    return DataFrame([{OLD_SNAPSHOT: old_path.stem, 'Added': diff.num_added, 'Removed': diff.num_removed,
+                       'Changed': diff.num_changed, 'Upgraded': diff.num_upgraded,
+                       'Downgraded': diff.num_downgraded}])
+
+
+COMMANDS: Dict[str, Callable[..., DataFrame]] = {
+    'summary': summary_rows,
+    'league': league_rows,
+    'find': find_rows,
+    'frequencies': frequency_rows,
+    'diff': diff_rows,
+}
+
+
+def run(command: str, data_path: Path, arguments: dict) -> DataFrame:
+    """
+    Rows of one command over one snapshot, the first column naming the snapshot
+    Module level so it can run in a process pool
+    :param command: COMMANDS key
+    :param data_path:
+    :param arguments: keyword arguments of the command
+    :return:
+    """
+    fut_manager = FutManager(data_path=data_path, handle_downloads=False)
+    result = COMMANDS[command](fut_manager, **arguments).reset_index(drop=True)
+    result.insert(0, SNAPSHOT, data_path.stem)
+    return result
+
+
+def run_all(command: str, jobs: List[Tuple[Path, dict]], max_workers: Optional[int] = None) -> DataFrame:
+    """
+    Run a command over several snapshots across a process pool, rows in job order
+    :param command:
+    :param jobs: (data path, arguments) per snapshot
+    :param max_workers:
+    :return:
+    """
+    if len(jobs) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(run, [command] * len(jobs), *zip(*jobs)))
+    else:
+        frames = [run(command, data_path, arguments) for data_path, arguments in jobs]
+
+    frames = [x for x in frames if not x.empty]
+    return pd.concat(frames, ignore_index=True) if frames else DataFrame(columns=[SNAPSHOT])
+
+
+def to_markdown(data: DataFrame) -> str:
+    """
+    Pipe table with numeric columns right aligned
+    :param data:
+    :return:
+    """
+    def cell(value) -> str:
+        return str(value).replace('|', '\\|').replace('\n', ' ')
+
+    alignment = ['---:' if pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x) else '---'
+                 for x in data.dtypes]
+    lines = [f'| {" | ".join(cell(x) for x in data.columns)} |', f'| {" | ".join(alignment)} |']
+    lines.extend(f'| {" | ".join(cell(x) for x in row)} |' for row in data.itertuples(index=False))
+    return '\n'.join(lines) + '\n'
+
+
+def render(data: DataFrame, output_format: OutputFormat) -> str:
+    """
+    Format rows as JSON records, CSV or a markdown table
+    :param data:
+    :param output_format:
+    :return:
+    """
+    if output_format == OutputFormat.json:
+        return data.to_json(orient='records', indent=2, force_ascii=False) + '\n'
+    if output_format == OutputFormat.csv:
+        return data.to_csv(index=False)
+    return to_markdown(data)
+
+
+def build_jobs(command: str, data_paths: List[Path], arguments: dict, old_path: Optional[Path]) \
+        -> List[Tuple[Path, dict]]:
+    """
+    One job per snapshot, diffs comparing each snapshot with the one before it unless an old snapshot is given
+    :param command:
+    :param data_paths: oldest first
+    :param arguments:
+    :param old_path:
+    :return:
+    """
+    if command != 'diff':
+        return [(x, arguments) for x in data_paths]
+
+    if old_path is not None:
+        return [(x, {**arguments, 'old_path': old_path}) for x in data_paths]
+
+    archived = snapshot_store.snapshot_paths(DATA_DIR)
+    jobs = []
+
+    for data_path in data_paths:
+        earlier = [x for x in archived if x.stem < data_path.stem]
+
+        if earlier:
+            jobs.append((data_path, {**arguments, 'old_path': earlier[-1]}))
+        else:
+            logging.info(f'No snapshot before {data_path.stem} to diff against')
+
+    return jobs
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--snapshot', '-s', action='append', type=Path, default=[],
+                        help='data file, repeat for several, the latest snapshot by default')
+    common.add_argument('--all-snapshots', action='store_true', help='every archived snapshot, in parallel')
+    common.add_argument('--workers', type=int, default=None, help='processes for several snapshots')
+    common.add_argument('--format', '-f', choices=[x.value for x in OutputFormat], default=OutputFormat.markdown.value)
+    common.add_argument('--output', '-o', type=Path, default=None, help='file to write, stdout by default')
+    parser = argparse.ArgumentParser(prog='python -m fut_utils', description='Batch analytics over club snapshots')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('summary', parents=[common], help='rating and rarity summary')
+    league = commands.add_parser('league', parents=[common], help='players of a league by position')
+    league.add_argument('league')
+    find = commands.add_parser('find', parents=[common], help='cards matching every Column=value predicate')
+    find.add_argument('predicates', nargs='+', type=parse_predicate, metavar='Column=value')
+    find.add_argument('--columns', type=lambda x: [column_name(y) for y in x.split(',')], default=None,
+                      help='comma separated columns to output')
+    frequencies = commands.add_parser('frequencies', parents=[common], help='number of cards per value of a column')
+    frequencies.add_argument('attribute', type=column_name)
+    diff = commands.add_parser('diff', parents=[common],
+                               help='cards added, removed and changed since the previous snapshot')
+    diff.add_argument('--old', type=Path, default=None, help='snapshot to compare with instead of the previous')
+    options = parser.parse_args(args)
+    unknown = [x for x in [getattr(options, 'attribute', None)] + [x for x, _ in getattr(options, 'predicates', [])] +
+               (getattr(options, 'columns', None) or []) if x is not None and x not in snapshot_ingest.EXPECTED_COLUMNS]
+
+    if unknown:
+        parser.error(f'Unknown columns {", ".join(unknown)}, choose from {", ".join(snapshot_ingest.EXPECTED_COLUMNS)}')
+
+    archived = snapshot_store.snapshot_paths(DATA_DIR)
+    data_paths = archived if options.all_snapshots else options.snapshot or archived[-1:]
+    missing = [x for x in data_paths if snapshot_store.resolve(x) == x and not x.exists()]
+
+    if missing or not data_paths:
+        logging.error(f'No such snapshot: {", ".join(x.as_posix() for x in missing) or DATA_DIR.as_posix()}')
+        return 1
+
+    arguments = {key: value for key, value in vars(options).items()
+                 if key in ('league', 'predicates', 'columns', 'attribute')}
+    jobs = build_jobs(options.command, data_paths, arguments, getattr(options, 'old', None))
+    text = render(run_all(options.command, jobs, max_workers=options.workers), OutputFormat(options.format))
+
+    if options.output is None:
+        sys.stdout.write(text)
+    else:
+        options.output.write_text(text, encoding='utf-8')
+        logging.info(f'Written {options.output}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
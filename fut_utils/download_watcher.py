@@ -0,0 +1,218 @@
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from core.lazy_import import lazy_import
+from fut_utils.fut_manager import FutManager, DOWNLOADED_DATA_FILE
+
+histogram_renderer = lazy_import('fut_utils.histogram_renderer')
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+POLL_INTERVAL: float = 2.0
+SETTLE_INTERVAL: float = 0.5
+SETTLE_CHECKS: int = 2
+SETTLE_TIMEOUT: float = 120.0
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_NONBLOCK: int = os.O_NONBLOCK
+IN_CLOEXEC: int = 0o2000000
+EVENT_HEADER: struct.Struct = struct.Struct('iIII')
+
+
+def file_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Modification time and size of a file, None if it does not exist
+    :param file_path:
+    :return:
+    """
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def wait_until_complete(file_path: Path, interval: float = SETTLE_INTERVAL, checks: int = SETTLE_CHECKS,
+                        timeout: float = SETTLE_TIMEOUT) -> bool:
+    """
+    Wait for a file being written to stop changing
+    A browser writes a download in several steps, the file is complete once its size and modification time have
+    held for a number of consecutive checks
+    :param file_path:
+    :param interval: seconds between checks
+    :param checks: consecutive unchanged checks required
+    :param timeout: seconds before giving up
+    :return: False if the file disappeared or was still changing at the timeout
+    """
+    deadline = time.monotonic() + timeout
+    signature, unchanged = file_signature(file_path), 0
+
+    while unchanged < checks:
+        if signature is None or time.monotonic() > deadline:
+            return False
+
+        time.sleep(interval)
+        current = file_signature(file_path)
+        unchanged = unchanged + 1 if current == signature and current[1] else 0
+        signature = current
+
+    return True
+
+
+def archive_download(download_path: Path = DOWNLOADED_DATA_FILE) -> Optional[Path]:
+    """
+    Wait for the download to be complete then validate, archive and stage it
+    Runs on a worker thread or in the headless watcher, the shared caches are safe to use from either
+    :param download_path:
+    :return: archived data file, None if there was nothing to archive
+    """
+    if not wait_until_complete(download_path):
+        return None
+    return FutManager(data_path=None, use_last_data=False, handle_downloads=False).archive_download(download_path)
+
+
+class InotifyWatcher:
+    def __init__(self, directory: Path):
+        """
+        Minimal inotify reader reporting the names of files written, created or moved into a directory
+        Linux only, construct it inside try/except OSError and fall back to polling
+        :param directory:
+        """
+        library = ctypes.util.find_library('c')
+
+        if library is None or not sys.platform.startswith('linux'):
+            raise OSError('inotify is not available')
+
+        self.libc = ctypes.CDLL(library, use_errno=True)
+        self.fd: int = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f'Cannot watch {directory}')
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Names of the files changed, waiting up to the timeout for the first event
+        :param timeout: seconds
+        :return:
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names, offset = [], 0
+
+        while offset < len(buffer):
+            _, _, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            names.append(buffer[offset:offset + length].rstrip(b'\0').decode(errors='replace'))
+            offset += length
+
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def download_events(download_path: Path = DOWNLOADED_DATA_FILE, stop: Optional[threading.Event] = None,
+                    poll_interval: float = POLL_INTERVAL, use_inotify: bool = True) -> Iterator[Path]:
+    """
+    Yield the download path whenever it appears or changes
+    Uses inotify on the downloads directory when available, otherwise compares the file signature every interval
+    :param download_path:
+    :param stop: ends the iteration when set
+    :param poll_interval: seconds between checks when polling, and the longest wait between stop checks
+    :param use_inotify:
+    :return:
+    """
+    stop = stop or threading.Event()
+    watcher = None
+
+    if use_inotify:
+        try:
+            watcher = InotifyWatcher(download_path.parent)
+        except OSError as error:
+            logging.info(f'Polling {download_path.parent}: {error}')
+
+    try:
+        last_signature = None
+
+        while not stop.is_set():
+            signature = file_signature(download_path)
+
+            if signature is not None and signature != last_signature:
+                yield download_path
+                signature = file_signature(download_path)
+
+            last_signature = signature
+
+            if watcher is None:
+                stop.wait(poll_interval)
+            else:
+                watcher.read(poll_interval)
+    finally:
+        if watcher is not None:
+            watcher.close()
+
+
+def watch(callback: Callable[[Path], None], download_path: Path = DOWNLOADED_DATA_FILE,
+          stop: Optional[threading.Event] = None, poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+    """
+    Archive every download as it arrives and pass the archived data file to the callback
+    :param callback:
+    :param download_path:
+    :param stop: ends the loop when set
+    :param poll_interval:
+    :param use_inotify:
+    """
+    for path in download_events(download_path, stop=stop, poll_interval=poll_interval, use_inotify=use_inotify):
+        data_path = archive_download(path)
+
+        if data_path is not None:
+            callback(data_path)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Archive club-analyzer downloads as they arrive')
+    parser.add_argument('--poll', action='store_true', help='poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='seconds between checks')
+    options = parser.parse_args(args)
+    logging.info(f'Watching {DOWNLOADED_DATA_FILE}')
+
+    def archived(data_path: Path):
+        logging.info(f'Archived {data_path.name}')
+        histogram_renderer.render_missing()
+
+    try:
+        watch(archived, poll_interval=options.interval, use_inotify=not options.poll)
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,8 @@ from enum import Enum
 
 class FutAttr(Enum):
     club: str = 'Club'
+    country: str = 'Country'
+    discard_value: str = 'Discard Value'
     id: str = 'Id'
     league: str = 'League'
     loans: str = 'Loans'
@@ -10,7 +12,10 @@ class FutAttr(Enum):
     position: str = 'Position'
     rarity: str = 'Rarity'
     rating: str = 'Rating'
+    skill_moves: str = 'Skill Moves'
     surname: str = 'Lastname'
+    untradeable: str = 'Untradeable'
+    weak_foot: str = 'Weak Foot'
 
 
 class Rarity(Enum):
@@ -1,41 +1,69 @@
-import pandas as pd
+from __future__ import annotations
+
 import os
 import logging
-import matplotlib.pyplot as plt
-import shutil
-import statistics
 
+from collections import OrderedDict
 from datetime import datetime
-from pandas.core.frame import DataFrame
 from pathlib import Path
-from typing import Tuple, Optional, Union, List
+from typing import Tuple, Optional, Union, List, Iterable, TYPE_CHECKING
 
 from core.enums import FileExtension
 from core import PROJECT_ROOT
-from fut_utils import POSITION_DICT
+from core.instrumentation import instrument
+from core.lazy_import import lazy_import
+from fut_utils import POSITION_DICT, DATA_FILE_STEM
 from fut_utils.fut_enums import FutAttr, League, Rarity
-from core import git_utils
+from fut_utils.snapshot_cache import SnapshotCache, Snapshot
+
+if TYPE_CHECKING:
+    import numpy as np
+    from pandas.core.frame import DataFrame
+    from pandas.core.series import Series
+    from fut_utils.sbc_solver import SbcSolution
+    from fut_utils.snapshot_diff import SnapshotDiff
+    from fut_utils.snapshot_query import SnapshotIndex, Predicate
+    from fut_utils.snapshot_summary import SnapshotSummary
+    from fut_utils.squad_builder import Squad
+
+pd = lazy_import('pandas')
+git_utils = lazy_import('core.git_utils')
+histogram_renderer = lazy_import('fut_utils.histogram_renderer')
+league_positions = lazy_import('fut_utils.league_positions')
+snapshot_catalog = lazy_import('fut_utils.snapshot_catalog')
+snapshot_diff = lazy_import('fut_utils.snapshot_diff')
+snapshot_history = lazy_import('fut_utils.snapshot_history')
+sbc_solver = lazy_import('fut_utils.sbc_solver')
+snapshot_ingest = lazy_import('fut_utils.snapshot_ingest')
+squad_builder = lazy_import('fut_utils.squad_builder')
+snapshot_query = lazy_import('fut_utils.snapshot_query')
+snapshot_sidecar = lazy_import('fut_utils.snapshot_sidecar')
+snapshot_store = lazy_import('fut_utils.snapshot_store')
+snapshot_summary = lazy_import('fut_utils.snapshot_summary')
 
 logging.basicConfig()
 logging.getLogger().setLevel(logging.INFO)
 
-DATA_FILE_STEM = 'club-analyzer'
 DATA_FILE_FILENAME = f'{DATA_FILE_STEM}{FileExtension.csv.value}'
 DATA_DIR: Path = Path(__file__).parent.joinpath('data')
 DEFAULT_DATA_FILE: Path = DATA_DIR.joinpath(DATA_FILE_FILENAME)
 DOWNLOADED_DATA_FILE: Path = Path.home().joinpath('Downloads', DATA_FILE_FILENAME)
 PLOTS_DIR: Path = Path(__file__).parent.joinpath('plots')
+SNAPSHOT_CACHE: SnapshotCache = SnapshotCache(loader=lambda path, columns: snapshot_store.load(path, columns=columns))
 
 
 class FutManager:
-    def __init__(self, data_path: Optional[Path] = DEFAULT_DATA_FILE, use_last_data: bool = True):
-        self._handle_downloaded_data_file()
+    def __init__(self, data_path: Optional[Path] = DEFAULT_DATA_FILE, use_last_data: bool = True,
+                 handle_downloads: bool = True):
+        if handle_downloads:
+            self._handle_downloaded_data_file()
+
         self.use_last_data: bool = use_last_data
         self.data_path: Path or None = data_path
 
     @property
     def last_data_file(self) -> Path:
-        return list(DATA_DIR.glob(f'{DATA_FILE_STEM}*'))[-1]
+        return snapshot_store.snapshot_paths(data_dir=DATA_DIR)[-1]
 
     @property
     def data_path(self) -> Path or None:
@@ -55,30 +83,57 @@ class FutManager:
             self._data_path = self.last_data_file if self.use_last_data else None
 
     @property
+    def snapshot(self) -> Snapshot:
+        return SNAPSHOT_CACHE.get(snapshot_store.resolve(self.data_path))
+
+    def projection(self, columns: Iterable[str]) -> Snapshot:
+        """
+        Snapshot holding at least the columns listed, the whole snapshot if it is already loaded
+        :param columns:
+        :return:
+        """
+        return SNAPSHOT_CACHE.get(snapshot_store.resolve(self.data_path), columns=columns)
+
+    @property
+    @instrument
     def data(self) -> DataFrame:
-        return pd.read_csv(self.data_path.as_posix())
+        return self.snapshot.data
 
-    def _handle_downloaded_data_file(self):
+    def _handle_downloaded_data_file(self, download_path: Path = DOWNLOADED_DATA_FILE) \
+            -> Optional[snapshot_ingest.IngestResult]:
         """
-        If the club analyzer file is in the downloads directory, transfer it locally
+        If the club analyzer file is in the downloads directory, validate it and transfer it locally
+        :param download_path:
+        :return: outcome of the ingest, None if there was no download to handle
         """
-        if DOWNLOADED_DATA_FILE.exists() and not DEFAULT_DATA_FILE.exists():
-            result = self._validate_data_file(DOWNLOADED_DATA_FILE)
+        if download_path.exists() and not DEFAULT_DATA_FILE.exists():
+            return snapshot_ingest.ingest(download_path, DEFAULT_DATA_FILE, data_dir=DATA_DIR)
+        return None
 
-            if result:
-                shutil.move(DOWNLOADED_DATA_FILE, DEFAULT_DATA_FILE)
-            else:
-                logging.error('Downloaded data file invalid.')
+    @instrument
+    def archive_download(self, download_path: Path = DOWNLOADED_DATA_FILE) -> Optional[Path]:
+        """
+        Validate the downloaded data file, archive it by date and add it to the changelist
+        The current data path becomes the archived file
+        :param download_path:
+        :return: archived data file, None if the download was missing, invalid or a duplicate
+        """
+        result = self._handle_downloaded_data_file(download_path)
+
+        if result is None or result.status is not snapshot_ingest.IngestStatus.ingested:
+            return None
+
+        self.data_path = DEFAULT_DATA_FILE
+        return self.data_path
 
     @staticmethod
-    def _validate_data_file(csv_path: Path):
-        data: DataFrame = pd.read_csv(csv_path.as_posix())
-        return len(data.index) > 1
+    def _validate_data_file(csv_path: Path) -> bool:
+        return snapshot_ingest.validate(csv_path).valid
 
     def _rename_default_data_file(self, data_path: Path):
         """
-        Renames the data file by date
-        Adds to the changelist
+        Renames the data file by date and renders its histogram
+        Adds both to the changelist in a single index write
         :param data_path:
         """
         if data_path.exists():
@@ -86,7 +141,15 @@ class FutManager:
             nice_date = datetime.utcfromtimestamp(creation_date).strftime('%Y_%m_%d')
             self.data_path: Path = data_path.parent.joinpath(f'{data_path.stem}_{nice_date}{FileExtension.csv.value}')
             os.rename(data_path.as_posix(), self.data_path.as_posix())
-            git_utils.GitManager().add(self.data_path.relative_to(PROJECT_ROOT))
+            SNAPSHOT_CACHE.invalidate(data_path)
+
+            with git_utils.git_manager().batch():
+                git_utils.git_manager().add(self.data_path.relative_to(PROJECT_ROOT))
+                self.generate_histogram()
+
+            snapshot_sidecar.write_sidecar(self.data_path)
+            snapshot_history.SnapshotHistory().update()
+            snapshot_catalog.entry(self.data_path)
 
     @property
     def bins(self) -> list[int]:
@@ -100,82 +163,104 @@ class FutManager:
 
     @property
     def rating_range(self) -> Tuple[int]:
-        result = self.data[FutAttr.rating.value].min(), self.data[FutAttr.rating.value].max()
-        return result
+        ratings = self.player_ratings
+        return int(ratings.min()), int(ratings.max())
 
     @property
     def player_count(self) -> int:
         return len(self.data.index)
 
+    @property
+    @instrument
+    def summary(self) -> SnapshotSummary:
+        return self.projection(snapshot_summary.SUMMARY_COLUMNS).derive('summary',
+                                                                        snapshot_summary.SnapshotSummary.from_data)
+
     @property
     def total_player_rating(self) -> int:
-        return self.player_ratings.sum()
+        return self.summary.total_rating
 
     @property
     def mean_player_rating(self) -> float:
-        return self.player_ratings.mean()
+        return self.summary.mean_rating
 
     @property
     def median_player_rating(self) -> int:
-        return int(self.player_ratings.median())
+        return self.summary.median_rating
 
     @property
     def mode_player_rating(self) -> int:
-        return statistics.mode(self.player_ratings.tolist())
+        return self.summary.mode_rating
 
     @property
     def num_totw(self) -> int:
-        return len(self.find_value(attribute=FutAttr.rarity, value=Rarity.totw.value))
+        return self.summary.num_totw
 
     @property
     def num_tots(self) -> int:
-        tots = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.tots.value))
-        moments = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.tots_moments.value))
-        return tots + moments
+        return self.summary.num_tots
 
     @property
     def num_futties(self) -> int:
-        futties = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.futties.value))
-        premium = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.futties_premium.value))
-        hero = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.futties_hero.value))
-        icon = len(self.find_value(attribute=FutAttr.rarity, value=Rarity.futties_icon.value))
-        return futties + premium + hero + icon
+        return self.summary.num_futties
 
     @property
     def num_gold(self) -> int:
-        return len(list(filter(lambda x: 75 <= x <= 100, self.player_ratings.to_list())))
+        return self.summary.num_gold
 
     @property
     def num_silver(self) -> int:
-        return len(list(filter(lambda x: 65 <= x <= 74, self.player_ratings.to_list())))
+        return self.summary.num_silver
 
     @property
     def num_bronze(self) -> int:
-        return len(list(filter(lambda x: 0 <= x <= 64, self.player_ratings.to_list())))
+        return self.summary.num_bronze
 
     @property
-    def player_ratings(self) -> List[int]:
-        return self.data[FutAttr.rating.value]
+    def player_ratings(self) -> Series:
+        return self.projection([FutAttr.rating.value]).data[FutAttr.rating.value]
+
+    @instrument
+    def diff(self, old_path: Path, new_path: Optional[Path] = None) -> SnapshotDiff:
+        """
+        Players added, removed and changed between two snapshots
+        The result is memoized on the newer snapshot
+        :param old_path:
+        :param new_path: defaults to the current data path
+        :return:
+        """
+        columns = snapshot_diff.DIFF_COLUMNS
+        old_snapshot = SNAPSHOT_CACHE.get(snapshot_store.resolve(old_path), columns=columns)
+        new_snapshot = SNAPSHOT_CACHE.get(snapshot_store.resolve(new_path or self.data_path), columns=columns)
+        return new_snapshot.derive(('diff', old_snapshot.key), lambda data: snapshot_diff.SnapshotDiff.from_data(
+            old_data=old_snapshot.data, new_data=data))
 
     @property
     def histogram_path(self) -> Path:
-        return PLOTS_DIR.joinpath(f'{self.data_path.stem}{FileExtension.png.value}')
+        return histogram_renderer.histogram_path(self.data_path, plots_dir=PLOTS_DIR)
 
-    def generate_histogram(self, show: bool = False):
+    @instrument
+    def generate_histogram(self, show: bool = False) -> Optional[np.ndarray]:
         """
         Create the histogram image
         Add to changelist
+        :return: RGBA pixels of the image
         """
         if self.data_path is not None:
-            self.histogram_path.parent.mkdir(parents=True, exist_ok=True)
-            result = pd.DataFrame({FutAttr.rating.value: self.data[FutAttr.rating.value]})
-            result[FutAttr.rating.value].hist(bins=self.bins)
-            plt.savefig(self.histogram_path)
-            git_utils.GitManager().add(self.histogram_path.relative_to(PROJECT_ROOT))
+            pixels = histogram_renderer.render_histogram(self.player_ratings.to_numpy(), self.histogram_path)
+            git_utils.git_manager().add(self.histogram_path.relative_to(PROJECT_ROOT))
 
             if show:
+                import matplotlib.pyplot as plt
+                plt.imshow(pixels)
+                plt.axis('off')
                 plt.show()
 
+            return pixels
+
+        return None
+
+    @instrument
     def find_max(self, attribute: FutAttr, value: int, input_data: Optional[DataFrame] = None,
                  format_data: bool = False) -> DataFrame:
         """
@@ -186,8 +271,8 @@ class FutManager:
         :param format_data:
         :return:
         """
-        data = input_data if input_data else self.data
-        result = data.loc[self.data[attribute.value] <= value]
+        data = input_data if input_data is not None else self.data
+        result = data.loc[data[attribute.value] <= value]
 
         if format_data:
             self.format_data(data=result)
@@ -202,6 +287,7 @@ class FutManager:
         for idx, row in data.iterrows():
             print(f'Index: {idx}\n{row}\n\n')
 
+    @instrument
     def find_value(self, attribute: FutAttr, value: Union[str, int], input_data: Optional[DataFrame] = None,
                    format_data: bool = False) -> DataFrame:
         """
@@ -212,14 +298,32 @@ class FutManager:
         :param format_data:
         :return:
         """
-        data = input_data if input_data else self.data
-        result = data.loc[data[attribute.value] == value]
+        if input_data is None:
+            result = self.query([(attribute, value)])
+        else:
+            result = input_data.loc[input_data[attribute.value] == value]
 
         if format_data:
             self.format_data(data=result)
 
         return result
 
+    @property
+    @instrument
+    def index(self) -> SnapshotIndex:
+        return self.snapshot.derive('index', snapshot_query.SnapshotIndex)
+
+    @instrument
+    def query(self, predicates: Iterable[Predicate]) -> DataFrame:
+        """
+        Find rows matching every (attribute, value) predicate in a single mask
+        A list, tuple or set value matches any of its members
+        :param predicates:
+        :return:
+        """
+        return self.index.query(predicates)
+
+    @instrument
     def find(self, key_value_pairs: list, first_only: bool = False) -> DataFrame:
         """
         Find items that match key-value pairs
@@ -227,16 +331,11 @@ class FutManager:
         :param first_only:
         :return:
         """
-        player_list = self.data
-
-        for pair in key_value_pairs:
-            key, value = pair
-            players = player_list.loc[player_list[key] == value]
-            player_list = players
+        player_list = self.query(key_value_pairs)
 
         if first_only:
+            player_list = player_list.head(1)
             self.format_player(player_list)
-            return player_list[0]
 
         return player_list
 
@@ -268,6 +367,7 @@ class FutManager:
                 print(f'{key}: {value}')
         return result
 
+    @instrument
     def list_frequencies(self, key: FutAttr, input_data: Optional[DataFrame] = None):
         """
         Produces a dictionary with the frequencies of the supplied key in the data
@@ -276,25 +376,62 @@ class FutManager:
         :return:
         """
         data = input_data if input_data is not None else self.data
-        result = data[key.value].value_counts().to_dict()
+        counts = data[key.value].value_counts()
+        result = counts[counts > 0].to_dict()
         return result
 
+    @property
+    @instrument
+    def league_positions(self) -> dict:
+        return self.projection(league_positions.GROUP_COLUMNS).derive('league_positions',
+                                                                      league_positions.build_league_positions)
+
+    @instrument
     def league_analyser(self, league: League or str, format_data: bool = False):
+        """
+        Players of a league by position, sorted by rating with identical cards collapsed into a count
+        :param league:
+        :param format_data:
+        :return:
+        """
         league = league.value if type(league) is League else league
-        df = self.find_value(FutAttr.league, value=league)
-        positions = list(set(df[FutAttr.position.value].to_list()))
-        position_map = {POSITION_DICT.get(i): self.find([(FutAttr.league.value, league),
-                                                         (FutAttr.position.value, i)]) for i in positions}
+        position_map = self.league_positions.get(league, OrderedDict())
 
         if format_data:
             for key, value in position_map.items():
-                values = value.iterrows()
-                player_data = [f'{row[FutAttr.surname.value]} [{row[FutAttr.rating.value]}]' for i, row in values]
+                columns = [value[FutAttr.surname.value], value[FutAttr.rating.value], value[league_positions.COUNT]]
+                player_data = [f'{surname} [{rating}]{f" x{count}" if count > 1 else ""}'
+                               for surname, rating, count in zip(*columns)]
                 print(f'{key}: {", ".join(player_data)}')
 
         return position_map
 
+    @instrument
+    def best_xi(self, formation: Iterable[int], chemistry_weight: float = 1.0) -> Optional[Squad]:
+        """
+        Highest scoring eleven of the club for a formation of POSITION_DICT codes, see squad_builder.best_xi
+        :param formation:
+        :param chemistry_weight: rating points per chemistry point
+        :return: None if the club cannot fill the formation
+        """
+        formation = tuple(formation)
+        return self.snapshot.derive(('best_xi', formation, chemistry_weight),
+                                    lambda data: squad_builder.best_xi(data, formation, chemistry_weight))
+
+    @instrument
+    def sbc(self, target: int, solutions: int = 5) -> List[SbcSolution]:
+        """
+        Cheapest sets of eleven cards reaching a squad rating, see sbc_solver.solve
+        The rating buckets are built once per snapshot and shared by every target
+        :param target: squad rating
+        :param solutions: number of alternatives
+        :return: cheapest first, empty if the club cannot reach the target
+        """
+        buckets = self.snapshot.derive('sbc_buckets', sbc_solver.build_buckets)
+        return sbc_solver.solve(self.data, target, solutions=solutions, buckets=buckets)
+
     @property
+    @instrument
     def leagues(self) -> List[str]:
         result = list(set(self.data[FutAttr.league.value].to_list()))
         result.sort()
@@ -309,6 +446,7 @@ class FutManager:
         for key, value in x.to_dict().items():
             print(f'{key}: {list(value.values())[0]}')
 
+    @instrument
     def value_list(self, attr: FutAttr) -> List[str]:
         """
         Returns a unique list of all the values of an attribute
@@ -1,57 +1,131 @@
 import logging
 from PySide6.QtWidgets import QSizePolicy, QComboBox, QLabel, QTabWidget
-from PySide6.QtCore import QSettings
+from PySide6.QtCore import QSettings, QFileSystemWatcher
 from PySide6.QtGui import QPixmap
-from typing import List
+from typing import List, Optional
 from pathlib import Path
 
 from fut_utils.fut_widgets.fut_summary_widget import FutSummaryWidget
 from fut_utils.fut_widgets.fut_league_widget import FutLeagueWidget
+from fut_utils.fut_widgets.fut_debug_widget import FutDebugWidget
 from widgets.generic_widget import GenericWidget
+from widgets.worker_pool import WorkerPool
 from core.enums import Alignment, FileExtension
-from fut_utils.fut_manager import FutManager
+from fut_utils.fut_manager import FutManager, DOWNLOADED_DATA_FILE
 from fut_utils import DATA_DIR
 from core import image_path, CREATOR
+from core import instrumentation
+from core.lazy_import import lazy_import
 
 logging.basicConfig()
 logging.getLogger().setLevel(logging.INFO)
 
+download_watcher = lazy_import('fut_utils.download_watcher')
+histogram_renderer = lazy_import('fut_utils.histogram_renderer')
+snapshot_catalog = lazy_import('fut_utils.snapshot_catalog')
+snapshot_store = lazy_import('fut_utils.snapshot_store')
+
 
 class FutManagerUI(GenericWidget):
     TITLE: str = 'FUT Manager'
     SUMMARY: str = 'Summary'
     LEAGUES: str = 'Leagues'
+    DEBUG: str = 'Debug'
     TAB_INDEX: str = 'tab_index'
+    DOWNLOAD: str = 'download'
 
     def __init__(self):
         super(FutManagerUI, self).__init__(title=self.TITLE, margin=4)
         self.settings: QSettings = QSettings(CREATOR, self.TITLE)
         logging.debug(self.settings.fileName())
         self.fut_manager: FutManager = FutManager()
+        self.worker_pool: WorkerPool = WorkerPool(parent=self)
         self.tab_widget: QTabWidget = self.add_widget(QTabWidget())
-        self.tab_widget.addTab(FutSummaryWidget(fut_manager_ui=self), self.SUMMARY)
+        self.summary_widget: FutSummaryWidget = FutSummaryWidget(fut_manager_ui=self)
+        self.tab_widget.addTab(self.summary_widget, self.SUMMARY)
         self.tab_widget.addTab(FutLeagueWidget(fut_manager_ui=self), self.LEAGUES)
+
+        if instrumentation.ENABLED:
+            self.tab_widget.addTab(FutDebugWidget(fut_manager_ui=self), self.DEBUG)
+
         self.info_label: QLabel = self.add_label(f'{self.TITLE} ready...')
+        self.worker_pool.progress.connect(self.info_label.setText)
+        self.download_watcher: QFileSystemWatcher = QFileSystemWatcher(self)
+        self._download_signature: Optional[tuple] = None
         self.setup_ui()
 
     def setup_ui(self):
         """
         Initialize the interface
         """
-        self.fut_manager.generate_histogram()   # get latest histogram
+        self.worker_pool.submit('histograms', histogram_renderer.render_missing, self.histograms_rendered,
+                                message='Rendering histograms')   # get latest histograms
+        self.worker_pool.submit('catalog', snapshot_catalog.update, self.catalog_updated,
+                                message='Updating snapshot catalog')
         self.tab_widget.setCurrentIndex(self.settings.value(self.TAB_INDEX, 0))
         self.tab_widget.currentChanged.connect(self.tab_widget_changed)
+
+        if DOWNLOADED_DATA_FILE.parent.exists():
+            self.download_watcher.addPath(DOWNLOADED_DATA_FILE.parent.as_posix())
+
+        self.download_watcher.directoryChanged.connect(self.downloads_changed)
         self.setStyleSheet('font: 10pt "Verdana";')
 
     @property
     def data_files(self) -> List[Path]:
-        result = [x.stem for x in DATA_DIR.glob('club-analyzer*')]
-        result.sort()
-        return result
+        return [x.stem for x in snapshot_store.snapshot_paths(data_dir=DATA_DIR)]
 
     def tab_widget_changed(self, arg):
         self.settings.setValue(self.TAB_INDEX, arg)
 
+    def downloads_changed(self, path: Optional[str] = None):
+        """
+        Archive a new download on the worker pool, one at a time
+        A download that cannot be archived is not retried until it changes
+        :param path: watched directory
+        """
+        signature = download_watcher.file_signature(DOWNLOADED_DATA_FILE)
+
+        if signature is None or signature == self._download_signature or self.worker_pool.is_busy(self.DOWNLOAD):
+            return
+
+        self._download_signature = signature
+        self.worker_pool.submit(self.DOWNLOAD, download_watcher.archive_download, self.download_archived,
+                                message='Archiving download')
+
+    def download_archived(self, data_path: Optional[Path]):
+        """
+        Add an archived snapshot to the combo boxes and check for a download that arrived meanwhile
+        :param data_path:
+        """
+        if data_path is not None:
+            self.info_label.setText(f'Archived {data_path.stem}')
+            self.summary_widget.add_data_file(data_path)
+
+        self.downloads_changed()
+
+    def histograms_rendered(self, result: List[Path]):
+        """
+        Log the histograms rendered in the background
+        :param result:
+        """
+        logging.debug(f'Histograms rendered: {[x.name for x in result]}')
+
+    def catalog_updated(self, result: List[Path]):
+        """
+        Log the snapshots added to the catalog in the background
+        :param result:
+        """
+        logging.debug(f'Snapshots catalogued: {[x.name for x in result]}')
+
+    def closeEvent(self, event):
+        """
+        Override for closeEvent, waits for running background tasks
+        :param event:
+        """
+        self.worker_pool.shutdown()
+        super(FutManagerUI, self).closeEvent(event)
+
 
 if __name__ == '__main__':
     from PySide6.QtWidgets import QApplication
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QListWidget, QSizePolicy, QTableView
+from typing import List, Optional
+
+from core.enums import Alignment, FileExtension
+from core.instrumentation import instrument
+from core.lazy_import import lazy_import
+from fut_utils import DATA_DIR, DATA_FILE_STEM
+from fut_utils.fut_widgets import fut_tasks
+from fut_utils.fut_widgets.fut_data_widget import FutDataWidget
+from widgets.generic_widget import GenericWidget
+from widgets.table_model import TableModel
+
+pd = lazy_import('pandas')
+
+
+class FutComparisonWidget(GenericWidget):
+    METRIC: str = 'Metric'
+    COMPARISON: str = 'comparison'
+    DEFAULT_SELECTION: int = 2
+
+    def __init__(self, fut_manager_ui: GenericWidget):
+        """
+        Summary metrics of several snapshots side by side, one column per selected snapshot
+        :param fut_manager_ui:
+        """
+        super(FutComparisonWidget, self).__init__(alignment=Alignment.horizontal, spacing=2)
+        self.fut_manager_ui = fut_manager_ui
+        self.snapshot_list: QListWidget = self.add_widget(QListWidget())
+        self.table_model: TableModel = TableModel([self.METRIC], parent=self)
+        self.table_view: QTableView = self.add_widget(QTableView())
+        self.result: Optional[fut_tasks.ComparisonResult] = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        """
+        Set up ui
+        """
+        self.snapshot_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.snapshot_list.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Preferred)
+        self.snapshot_list.itemSelectionChanged.connect(self.update_comparison)
+        self.table_view.setModel(self.table_model)
+        self.table_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table_view.verticalHeader().setVisible(False)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+
+    @property
+    def selected_files(self) -> List[str]:
+        return sorted(x.text() for x in self.snapshot_list.selectedItems())
+
+    def set_data_files(self, data_files: List[str]):
+        """
+        Fill the snapshot list, keeping the selection or selecting the latest snapshots
+        :param data_files: newest first
+        """
+        selected = set(self.selected_files) or set(data_files[:self.DEFAULT_SELECTION])
+        self.snapshot_list.blockSignals(True)
+        self.snapshot_list.clear()
+        self.snapshot_list.addItems(data_files)
+
+        for row, data_file in enumerate(data_files):
+            self.snapshot_list.item(row).setSelected(data_file in selected)
+
+        self.snapshot_list.blockSignals(False)
+
+        if self.isVisible():
+            self.update_comparison()
+
+    @instrument
+    def update_comparison(self):
+        """
+        Summarize the selected snapshots on the worker pool
+        """
+        data_paths = tuple(DATA_DIR.joinpath(f'{x}{FileExtension.csv.value}') for x in self.selected_files)
+        worker_pool = self.fut_manager_ui.worker_pool
+
+        if not data_paths:
+            worker_pool.cancel(self.COMPARISON)
+            self.table_model.set_columns([[]], headers=[self.METRIC])
+            return
+
+        worker_pool.submit(self.COMPARISON, fut_tasks.load_comparison, self.apply_comparison, data_paths,
+                           message=f'Comparing {len(data_paths)} snapshots')
+
+    @instrument
+    def apply_comparison(self, result: fut_tasks.ComparisonResult):
+        """
+        Reset the table with the metrics of each snapshot
+        :param result:
+        """
+        self.result = result
+        values = [FutDataWidget.summary_values(x) for x in result.summaries]
+        headers = [self.METRIC] + [x.stem[len(DATA_FILE_STEM) + 1:] for x in result.data_paths]
+        columns = [list(values[0]) if values else []] + [list(x.values()) for x in values]
+        self.table_model.set_columns(columns, headers=headers)
+
+    def showEvent(self, event):
+        """
+        Override for showEvent, the comparison is refreshed whenever the widget is shown
+        :param event:
+        """
+        self.update_comparison()
+        super(FutComparisonWidget, self).showEvent(event)
+
+    @property
+    def data_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(dict(zip(self.table_model.headers, self.table_model.columns)))
+
+    @property
+    def data_to_text(self) -> str:
+        markdown = self.data_frame.to_markdown(index=False, tablefmt='pipe')
+        return '\n'.join(markdown.split('\n')[2:])
+
+    @property
+    def data_to_csv(self) -> str:
+        return self.data_frame.to_csv(index=False)
@@ -1,13 +1,21 @@
-from typing import Union
-from pandas import DataFrame
+from __future__ import annotations
+
+from PySide6.QtWidgets import QLabel
+from typing import Dict, Union, Optional, TYPE_CHECKING
 from pathlib import Path
 from collections import OrderedDict
-import pandas as pd
 
+from core.lazy_import import lazy_import
+from core.instrumentation import instrument
 from widgets.grid_widget import GridWidget
 from widgets.generic_widget import GenericWidget
 from fut_utils.fut_manager import FutManager
 
+if TYPE_CHECKING:
+    from fut_utils.snapshot_summary import SnapshotSummary
+
+pd = lazy_import('pandas')
+
 
 class FutDataWidget(GridWidget):
     PLAYER_COUNT = 'Player Count'
@@ -26,6 +34,8 @@ class FutDataWidget(GridWidget):
     def __init__(self, fut_manager: FutManager):
         super(FutDataWidget, self).__init__()
         self.fut_manager: FutManager = fut_manager
+        self.summary: Optional[SnapshotSummary] = None
+        self.value_labels: Dict[str, QLabel] = {}
         self.add_row(self.PLAYER_COUNT)
         self.add_row(self.TOTAL_VALUE)
         self.add_row(self.MEAN)
@@ -45,37 +55,48 @@ class FutDataWidget(GridWidget):
         """
         num_rows = self.layout().rowCount()
         self.addLabel(label, row=num_rows, col=0)
-        self.addLabel('<value>', row=num_rows, col=1)
+        self.value_labels[label] = self.addLabel('<value>', row=num_rows, col=1)
 
+    @instrument
     def update_data(self, data_path: Path):
         """
         Set the values in the grid from the data
         :param data_path:
         """
         self.fut_manager.data_path = data_path
-        self.set_value(self.PLAYER_COUNT, f'{self.fut_manager.player_count:,}')
-        self.set_value(self.TOTAL_VALUE, f'{self.fut_manager.total_player_rating:,}')
-        self.set_value(self.MEAN, f'{self.fut_manager.mean_player_rating:.1f}')
-        self.set_value(self.MEDIAN, self.fut_manager.median_player_rating)
-        self.set_value(self.MODE, self.fut_manager.mode_player_rating)
-        self.set_value(self.GOLD, self.fut_manager.num_gold)
-        self.set_value(self.SILVER, self.fut_manager.num_silver)
-        self.set_value(self.BRONZE, self.fut_manager.num_bronze)
-        self.set_value(self.TOTW, self.fut_manager.num_totw)
-        self.set_value(self.TOTS, self.fut_manager.num_tots)
-        self.set_value(self.FUTTIES, self.fut_manager.num_futties)
+        self.set_summary(self.fut_manager.summary)
 
-    @property
-    def row_count(self) -> int:
-        return self.layout().rowCount()
+    @instrument
+    def set_summary(self, summary: SnapshotSummary):
+        """
+        Set the values in the grid from a precomputed summary
+        :param summary:
+        """
+        self.summary = summary
 
-    def get_row_index(self, key: str):
+        for key, value in self.summary_values(self.summary).items():
+            self.set_value(key, value)
+
+    @classmethod
+    def summary_values(cls, summary: SnapshotSummary) -> OrderedDict:
         """
-        Get the index of a row by the key
-        :param key:
+        Display values of a summary keyed by row label
+        :param summary:
         :return:
         """
-        return next(i for i in range(1, self.row_count) if self.get_item(i, 0) == key)
+        return OrderedDict([
+            (cls.PLAYER_COUNT, f'{summary.player_count:,}'),
+            (cls.TOTAL_VALUE, f'{summary.total_rating:,}'),
+            (cls.MEAN, f'{summary.mean_rating:.1f}'),
+            (cls.MEDIAN, str(summary.median_rating)),
+            (cls.MODE, str(summary.mode_rating)),
+            (cls.GOLD, str(summary.num_gold)),
+            (cls.SILVER, str(summary.num_silver)),
+            (cls.BRONZE, str(summary.num_bronze)),
+            (cls.TOTW, str(summary.num_totw)),
+            (cls.TOTS, str(summary.num_tots)),
+            (cls.FUTTIES, str(summary.num_futties)),
+        ])
 
     def set_value(self, key: str, value: Union[str, int]):
         """
@@ -83,31 +104,26 @@ class FutDataWidget(GridWidget):
         :param key:
         :param value:
         """
-        self.layout().itemAtPosition(self.get_row_index(key), 1).widget().setText(str(value))
+        self.value_labels[key].setText(str(value))
 
-    def get_item(self, row: int, column: int) -> str:
-        return self.layout().itemAtPosition(row, column).widget().text()
+    @property
+    def displayed_values(self) -> OrderedDict:
+        """
+        Values shown in the grid keyed by row label, the placeholders until the first summary arrives
+        :return:
+        """
+        if self.summary is None:
+            return OrderedDict((key, label.text()) for key, label in self.value_labels.items())
+        return self.summary_values(self.summary)
 
     @property
     def data_to_text(self) -> str:
-        data_dict = OrderedDict()
-
-        for i in range(self.row_count):
-            if self.layout().itemAtPosition(i, 1) is not None:
-                data_dict[self.get_item(i, 0)] = self.get_item(i, 1)
-
-        df = DataFrame(data_dict.items())
+        df = pd.DataFrame(self.displayed_values.items())
         markdown = df.to_markdown(index=False, tablefmt='pipe', colalign=['center']*len(df.columns))
 
         return '\n'.join(markdown.split('\n')[2:])
 
     @property
     def data_to_csv(self) -> str:
-        data_dict = OrderedDict()
-
-        for i in range(self.row_count):
-            if self.layout().itemAtPosition(i, 1) is not None:
-                data_dict[self.get_item(i, 0)] = self.get_item(i, 1)
-
-        df = DataFrame(data_dict.items())
+        df = pd.DataFrame(self.displayed_values.items())
         return df.to_csv()
@@ -0,0 +1,94 @@
+from datetime import datetime
+from pathlib import Path
+
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QSizePolicy, QTableWidget, QTableWidgetItem
+from PySide6.QtCore import Qt
+
+from core import instrumentation
+from core.enums import Alignment
+from fut_utils import CACHE_DIR
+from widgets.generic_widget import GenericWidget
+
+
+class FutDebugWidget(GenericWidget):
+    HEADERS: tuple = ('Name', 'Calls', 'Total ms', 'Own ms', 'Mean ms', 'Max ms', 'Peak KiB')
+    DUMP_STEM: str = 'instrumentation'
+
+    def __init__(self, fut_manager_ui: GenericWidget):
+        """
+        Table of the call statistics recorded by core.instrumentation
+        :param fut_manager_ui:
+        """
+        super(FutDebugWidget, self).__init__()
+        self.fut_manager_ui = fut_manager_ui
+        button_bar: GenericWidget = self.add_widget(GenericWidget(alignment=Alignment.horizontal, spacing=2))
+        button_bar.add_button('Refresh', event=self.update_table)
+        button_bar.add_button('Reset', event=self.reset_button_clicked)
+        button_bar.add_button('Dump JSON', event=self.json_button_clicked)
+        button_bar.add_button('Dump pstats', event=self.pstats_button_clicked)
+        button_bar.add_stretch()
+        button_bar.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
+        self.table: QTableWidget = self.add_widget(QTableWidget(0, len(self.HEADERS)))
+        self.setup_ui()
+
+    def setup_ui(self):
+        """
+        Set up ui
+        """
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(self.HEADERS.index('Total ms'), Qt.SortOrder.DescendingOrder)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+    def showEvent(self, event):
+        """
+        Override for showEvent, the table is refreshed whenever the tab is shown
+        :param event:
+        """
+        self.update_table()
+        super(FutDebugWidget, self).showEvent(event)
+
+    def update_table(self):
+        """
+        Fill the table with the current statistics
+        """
+        records = instrumentation.stats()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(records))
+
+        for row, stats in enumerate(records):
+            values = (stats.calls, stats.total_seconds * 1000, stats.own_seconds * 1000, stats.mean_seconds * 1000,
+                      stats.max_seconds * 1000, stats.peak_bytes / 1024)
+            self.table.setItem(row, 0, QTableWidgetItem(stats.name))
+
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, round(value, 1))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        self.table.setSortingEnabled(True)
+
+    def reset_button_clicked(self):
+        instrumentation.reset()
+        self.update_table()
+
+    def json_button_clicked(self):
+        self.report_dump(instrumentation.dump_json(self.dump_path('.json')))
+
+    def pstats_button_clicked(self):
+        self.report_dump(instrumentation.dump_pstats(self.dump_path('.pstats')))
+
+    def dump_path(self, extension: str) -> Path:
+        """
+        Timestamped location for a dump in the cache directory
+        :param extension:
+        :return:
+        """
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return CACHE_DIR.joinpath(f'{self.DUMP_STEM}_{datetime.now():%Y_%m_%d_%H%M%S}{extension}')
+
+    def report_dump(self, file_path: Path):
+        self.fut_manager_ui.info_label.setText(f'Saved {file_path.name}')
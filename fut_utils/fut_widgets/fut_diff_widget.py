@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from PySide6.QtWidgets import QLabel
+from typing import Optional, TYPE_CHECKING
+
+from core.lazy_import import lazy_import
+from core.instrumentation import instrument
+from widgets.grid_widget import GridWidget
+from fut_utils.fut_enums import FutAttr
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from fut_utils.snapshot_diff import SnapshotDiff
+
+snapshot_diff = lazy_import('fut_utils.snapshot_diff')
+
+
+class FutDiffWidget(GridWidget):
+    ADDED = 'Added'
+    REMOVED = 'Removed'
+    CHANGED = 'Changed'
+    UPGRADED = 'Upgraded'
+    DOWNGRADED = 'Downgraded'
+    BY_RARITY = 'By Rarity'
+    BY_LEAGUE = 'By League'
+    BREAKDOWN_SIZE: int = 5
+
+    def __init__(self):
+        super(FutDiffWidget, self).__init__()
+        self.value_labels: dict = {}
+
+        for label in (self.ADDED, self.REMOVED, self.CHANGED, self.UPGRADED, self.DOWNGRADED, self.BY_RARITY,
+                      self.BY_LEAGUE):
+            self.add_row(label)
+
+    def add_row(self, label: str):
+        """
+        Create a row in the grid with a title
+        :param label:
+        """
+        num_rows = self.layout().rowCount()
+        self.addLabel(label, row=num_rows, col=0)
+        value_label: QLabel = self.addLabel('-', row=num_rows, col=1)
+        value_label.setWordWrap(True)
+        self.value_labels[label] = value_label
+
+    @instrument
+    def update_diff(self, diff: Optional[SnapshotDiff]):
+        """
+        Show the changes between two snapshots, or clear the grid if there is no comparison
+        :param diff:
+        """
+        if diff is None:
+            for value_label in self.value_labels.values():
+                value_label.setText('-')
+            return
+
+        self.value_labels[self.ADDED].setText(str(diff.num_added))
+        self.value_labels[self.REMOVED].setText(str(diff.num_removed))
+        self.value_labels[self.CHANGED].setText(str(diff.num_changed))
+        self.value_labels[self.UPGRADED].setText(str(diff.num_upgraded))
+        self.value_labels[self.DOWNGRADED].setText(str(diff.num_downgraded))
+        self.value_labels[self.BY_RARITY].setText(self.format_breakdown(diff.breakdown(FutAttr.rarity)))
+        self.value_labels[self.BY_LEAGUE].setText(self.format_breakdown(diff.breakdown(FutAttr.league)))
+
+    @classmethod
+    def format_breakdown(cls, breakdown: DataFrame) -> str:
+        """
+        Summarize the most affected values of a breakdown
+        :param breakdown:
+        :return:
+        """
+        items = []
+
+        for key, row in breakdown.head(cls.BREAKDOWN_SIZE).iterrows():
+            changed = f' ~{row[snapshot_diff.CHANGED]}' if row[snapshot_diff.CHANGED] else ''
+            items.append(f'{key} +{row[snapshot_diff.ADDED]} -{row[snapshot_diff.REMOVED]}{changed}')
+
+        return ', '.join(items) if items else '-'
@@ -1,13 +1,14 @@
 import logging
 
-from PySide6.QtWidgets import QComboBox, QLabel
-from PySide6.QtCore import Qt
-from collections import OrderedDict
+from PySide6.QtWidgets import QAbstractItemView, QComboBox, QHeaderView, QLineEdit, QSizePolicy, QTableView
+from PySide6.QtCore import QSortFilterProxyModel, Qt
 
+from core.enums import Alignment
+from core.instrumentation import instrument
 from fut_utils.fut_manager import FutManager
-from fut_utils.fut_enums import FutAttr, Rarity
+from fut_utils.fut_widgets import fut_tasks
 from widgets.generic_widget import GenericWidget
-from widgets.grid_widget import GridWidget
+from widgets.table_model import TableModel
 
 
 logging.basicConfig()
@@ -17,22 +18,44 @@ logging.getLogger().setLevel(logging.INFO)
 class FutLeagueWidget(GenericWidget):
     LEAGUE: str = 'league'
 
+    HEADERS: tuple = ('Position', 'Player', 'Rating', 'Rarity', 'Count')
+
     def __init__(self, fut_manager_ui: GenericWidget):
         super(FutLeagueWidget, self).__init__()
         self.fut_manager_ui = fut_manager_ui
-        self.league_combo_box: QComboBox = self.add_widget(QComboBox())
-        self.grid_widget: GridWidget = self.add_widget(GridWidget())
-        self.add_stretch()
+        combo_bar: GenericWidget = self.add_widget(GenericWidget(alignment=Alignment.horizontal, spacing=2))
+        self.league_combo_box: QComboBox = combo_bar.add_widget(QComboBox())
+        self.filter_line_edit: QLineEdit = combo_bar.add_widget(QLineEdit())
+        combo_bar.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
+        self.table_model: TableModel = TableModel(self.HEADERS, parent=self)
+        self.proxy_model: QSortFilterProxyModel = QSortFilterProxyModel(self)
+        self.table_view: QTableView = self.add_widget(QTableView())
         self.setup_ui()
 
     def setup_ui(self):
         """
         Set up ui
         """
+        self.proxy_model.setSourceModel(self.table_model)
+        self.proxy_model.setSortRole(TableModel.SORT_ROLE)
+        self.proxy_model.setFilterKeyColumn(-1)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.table_view.setModel(self.proxy_model)
+        self.table_view.setSortingEnabled(True)
+        self.table_view.sortByColumn(self.HEADERS.index('Position'), Qt.SortOrder.AscendingOrder)
+        self.table_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_view.verticalHeader().setVisible(False)
+        self.table_view.horizontalHeader().setSectionResizeMode(self.HEADERS.index('Player'),
+                                                                QHeaderView.ResizeMode.Stretch)
+        self.filter_line_edit.setPlaceholderText('Filter')
+        self.filter_line_edit.setClearButtonEnabled(True)
+        self.filter_line_edit.textChanged.connect(self.proxy_model.setFilterFixedString)
         self.update_league_combo_box()
         self.league_combo_box_index_changed(self.league_combo_box.currentText())
         self.league_combo_box.currentTextChanged.connect(self.league_combo_box_index_changed)
 
+    @instrument
     def update_league_combo_box(self):
         """
         Update league combo box
@@ -44,52 +67,24 @@ class FutLeagueWidget(GenericWidget):
         if last_league in self.fut_manager_ui.fut_manager.leagues:
             self.league_combo_box.setCurrentText(last_league)
 
+    @instrument
     def league_combo_box_index_changed(self, arg):
         """
         Event for league combo box selection change
         :param arg:
         """
         self.fut_manager_ui.settings.setValue(self.LEAGUE, arg)
-        position_map = self.fut_manager.league_analyser(league=arg)
-        info = []
-        player_dict = OrderedDict()
-
-        for key, value in position_map.items():
-            value.sort_values(by=FutAttr.rating.value, ascending=False, inplace=True)
-            player_data = [self.format_player(row) for i, row in value.iterrows()]
-            player_info = []
-            idx = 0
-
-            while idx < len(player_data):
-                player = player_data[idx]
-                count = player_data.count(player)
-                player_info.append(f"{player}{f' x{count}' if count > 1 else ''}")
-                idx += count
-
-            info.append(f'{key}:\t{", ".join(player_info)}')
-            player_dict[key] = player_info
-
-        self.grid_widget.clear()
-        row = 0
-
-        for position, info in player_dict.items():
-            position_label: QLabel = self.grid_widget.addLabel(position if position else 'Unknown', row=row, col=0)
-            position_label.setFixedWidth(80)
-            info_label: QLabel = self.grid_widget.addLabel(', '.join(info), row=row, col=1)
-            info_label.setWordWrap(True)
-            info_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-            row += 1
+        self.fut_manager_ui.worker_pool.submit('league', fut_tasks.load_league, self.update_table,
+                                               self.fut_manager.data_path, arg, message=f'Loading {arg}')
 
-    @staticmethod
-    def format_player(row) -> str:
+    @instrument
+    def update_table(self, result: fut_tasks.LeagueResult):
         """
-        Returns a string representing a player
-        :param row:
-        :return:
+        Reset the model with the players of a league, positions sort in their usual order
+        :param result:
         """
-        rarity = row[FutAttr.rarity.value]
-        rarity_tag = f'[{row[FutAttr.rarity.value]}]' if rarity not in (Rarity.common.value, Rarity.rare.value) else ''
-        return f'{row[FutAttr.name.value]} {row[FutAttr.surname.value]} [{row[FutAttr.rating.value]}]{rarity_tag}'
+        position_column = self.HEADERS.index('Position')
+        self.table_model.set_columns(result.columns, sort_columns={position_column: result.position_order})
 
     @property
     def fut_manager(self) -> FutManager:
@@ -1,18 +1,25 @@
 from PySide6.QtWidgets import QSizePolicy, QComboBox, QLabel
-from typing import List
+from typing import List, Optional
 from pathlib import Path
-import pyperclip
 
 from core.enums import Alignment, FileExtension
+from core.instrumentation import instrument
+from core.lazy_import import lazy_import
 from fut_utils.fut_manager import FutManager
+from fut_utils.fut_widgets.fut_comparison_widget import FutComparisonWidget
 from fut_utils.fut_widgets.fut_data_widget import FutDataWidget
+from fut_utils.fut_widgets.fut_diff_widget import FutDiffWidget
+from fut_utils.fut_widgets import fut_tasks
 from fut_utils import DATA_DIR, PLOTS_DIR
 from widgets.generic_widget import GenericWidget
 from widgets.image_label import ImageLabel
 
+pyperclip = lazy_import('pyperclip')
+
 
 class FutSummaryWidget(GenericWidget):
     LIST_SIZE: int = 20
+    NO_COMPARISON: str = 'No Comparison'
 
     def __init__(self, fut_manager_ui: GenericWidget):
         super(FutSummaryWidget, self).__init__()
@@ -21,18 +28,27 @@ class FutSummaryWidget(GenericWidget):
         self.copy_button = button_bar.add_button('Copy Data As Text', event=self.copy_button_clicked)
         self.csv_button = button_bar.add_button('Copy Data As CSV', event=self.csv_button_clicked)
         button_bar.add_stretch()
-        self.data_combo_box: QComboBox = self.add_widget(QComboBox())
+        self.comparison_button = button_bar.add_button('Compare Snapshots', event=self.comparison_button_clicked)
+        self.combo_bar: GenericWidget = self.add_widget(GenericWidget(alignment=Alignment.horizontal, spacing=2))
+        self.data_combo_box: QComboBox = self.combo_bar.add_widget(QComboBox())
+        self.compare_combo_box: QComboBox = self.combo_bar.add_widget(QComboBox())
         button_bar.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
-        data_panel: GenericWidget = self.add_widget(GenericWidget(alignment=Alignment.horizontal))
-        self.data_widget: FutDataWidget = data_panel.add_widget(FutDataWidget(fut_manager=self.fut_manager))
-        self.histogram: ImageLabel = data_panel.add_widget(ImageLabel(None))
+        self.data_panel: GenericWidget = self.add_widget(GenericWidget(alignment=Alignment.horizontal))
+        self.data_widget: FutDataWidget = self.data_panel.add_widget(FutDataWidget(fut_manager=self.fut_manager))
+        self.histogram: ImageLabel = self.data_panel.add_widget(ImageLabel(None))
+        self.diff_widget: FutDiffWidget = self.add_widget(FutDiffWidget())
+        self.comparison_widget: FutComparisonWidget = self.add_widget(FutComparisonWidget(fut_manager_ui))
         self.setup_ui()
 
     def setup_ui(self):
         self.update_data_combo_box()
         self.update_data()
         self.data_combo_box.currentTextChanged.connect(self.data_combo_box_changed)
+        self.compare_combo_box.currentTextChanged.connect(self.compare_combo_box_changed)
         self.data_widget.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
+        self.diff_widget.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
+        self.comparison_button.setCheckable(True)
+        self.comparison_widget.setVisible(False)
 
     @property
     def fut_manager(self) -> FutManager:
@@ -42,15 +58,34 @@ class FutSummaryWidget(GenericWidget):
     def current_data_path(self) -> Path:
         return DATA_DIR.joinpath(f'{self.data_combo_box.currentText()}{FileExtension.csv.value}')
 
+    @property
+    def compare_data_path(self) -> Optional[Path]:
+        if self.compare_combo_box.currentIndex() < 1:
+            return None
+        return DATA_DIR.joinpath(f'{self.compare_combo_box.currentText()}{FileExtension.csv.value}')
+
     @property
     def current_histogram(self) -> Path:
         return PLOTS_DIR.joinpath(f'{self.data_combo_box.currentText()}{FileExtension.png.value}')
 
+    @property
+    def comparison_mode(self) -> bool:
+        return self.comparison_button.isChecked()
+
     def copy_button_clicked(self):
-        pyperclip.copy(self.data_widget.data_to_text)
+        pyperclip.copy((self.comparison_widget if self.comparison_mode else self.data_widget).data_to_text)
 
     def csv_button_clicked(self):
-        pyperclip.copy(self.data_widget.data_to_csv)
+        pyperclip.copy((self.comparison_widget if self.comparison_mode else self.data_widget).data_to_csv)
+
+    def comparison_button_clicked(self):
+        """
+        Switch between the single snapshot summary and the side by side comparison
+        """
+        for widget in (self.combo_bar, self.data_panel, self.diff_widget):
+            widget.setVisible(not self.comparison_mode)
+
+        self.comparison_widget.setVisible(self.comparison_mode)
 
     def data_combo_box_changed(self):
         """
@@ -59,17 +94,76 @@ class FutSummaryWidget(GenericWidget):
         self.update_data()
         self.data_combo_box.setFocus()
 
+    def compare_combo_box_changed(self):
+        """
+        Event for compare combo box
+        """
+        self.update_diff()
+        self.compare_combo_box.setFocus()
+
+    @instrument
     def update_data(self):
         """
-        Update the data widget and histogram
+        Load the summary and histogram on the worker pool
+        """
+        data_path = self.current_data_path
+        self.fut_manager_ui.worker_pool.submit('summary', fut_tasks.load_summary, self.apply_summary, data_path,
+                                               message=f'Loading {data_path.stem}')
+
+    @instrument
+    def apply_summary(self, result: fut_tasks.SummaryResult):
+        """
+        Update the data widget and histogram with a loaded summary
+        :param result:
+        """
+        self.fut_manager.data_path = result.data_path
+        self.data_widget.set_summary(result.summary)
+
+        if result.histogram is not None:
+            self.histogram.set_pixels(result.histogram, name=result.histogram_path.stem)
+        else:
+            self.histogram.path = result.histogram_path
+
+        self.update_diff()
+
+    @instrument
+    def update_diff(self):
+        """
+        Update the diff widget with the changes since the compared snapshot
         """
-        self.data_widget.update_data(data_path=self.current_data_path)
+        compare_data_path = self.compare_data_path
+        worker_pool = self.fut_manager_ui.worker_pool
+
+        if compare_data_path is None:
+            worker_pool.cancel('diff')
+            self.diff_widget.update_diff(None)
+        else:
+            worker_pool.submit('diff', fut_tasks.load_diff, self.diff_widget.update_diff, compare_data_path,
+                               self.current_data_path, message=f'Comparing with {compare_data_path.stem}')
+
+    def add_data_file(self, data_path: Path):
+        """
+        Insert a newly archived snapshot at the top of the combo boxes, selecting it if the latest was shown
+        :param data_path:
+        """
+        if self.data_combo_box.findText(data_path.stem) >= 0:
+            return
+
+        show_latest = self.data_combo_box.currentIndex() < 1
+        self.data_combo_box.insertItem(0, data_path.stem)
+        self.compare_combo_box.insertItem(1, data_path.stem)
+
+        while self.data_combo_box.count() > self.LIST_SIZE:
+            self.data_combo_box.removeItem(self.data_combo_box.count() - 1)
+            self.compare_combo_box.removeItem(self.compare_combo_box.count() - 1)
 
-        if not self.current_histogram.exists():
-            self.fut_manager.generate_histogram()
+        self.comparison_widget.set_data_files([self.data_combo_box.itemText(x)
+                                               for x in range(self.data_combo_box.count())])
 
-        self.histogram.path = self.current_histogram
+        if show_latest:
+            self.data_combo_box.setCurrentIndex(0)
 
+    @instrument
     def update_data_combo_box(self):
         """
         Get a list of the data files and populate the combo box
@@ -78,3 +172,6 @@ class FutSummaryWidget(GenericWidget):
         data_files.reverse()
         self.data_combo_box.clear()
         self.data_combo_box.addItems(data_files)
+        self.compare_combo_box.clear()
+        self.compare_combo_box.addItems([self.NO_COMPARISON] + data_files)
+        self.comparison_widget.set_data_files(data_files)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from core.lazy_import import lazy_import
+from core.instrumentation import instrument
+from fut_utils.fut_enums import FutAttr
+from fut_utils.fut_manager import FutManager
+
+if TYPE_CHECKING:
+    import numpy as np
+    from fut_utils.snapshot_diff import SnapshotDiff
+    from fut_utils.snapshot_summary import SnapshotSummary
+
+histogram_renderer = lazy_import('fut_utils.histogram_renderer')
+league_positions = lazy_import('fut_utils.league_positions')
+snapshot_catalog = lazy_import('fut_utils.snapshot_catalog')
+
+
+class SummaryResult(NamedTuple):
+    data_path: Path
+    summary: SnapshotSummary
+    histogram_path: Path
+    histogram: Optional[np.ndarray]
+
+
+class ComparisonResult(NamedTuple):
+    data_paths: Tuple[Path, ...]
+    summaries: Tuple[SnapshotSummary, ...]
+
+
+class LeagueResult(NamedTuple):
+    data_path: Path
+    league: str
+    columns: Tuple[list, ...]
+    position_order: list
+
+
+@instrument
+def load_summary(data_path: Path) -> SummaryResult:
+    """
+    Worker task reading the summary of a snapshot from the catalog and rendering its histogram if it is missing or
+    stale, the data file is only read when either has to be computed
+    A freshly rendered histogram is returned as pixels so it is shown without reading the image back
+    :param data_path:
+    :return:
+    """
+    fut_manager = FutManager(data_path=data_path, handle_downloads=False)
+    histogram = None
+
+    if histogram_renderer.is_stale(data_path, fut_manager.histogram_path):
+        histogram = fut_manager.generate_histogram()
+
+    return SummaryResult(data_path=data_path, summary=snapshot_catalog.entry(data_path).summary,
+                         histogram_path=fut_manager.histogram_path,
+                         histogram=histogram)
+
+
+@instrument
+def load_league(data_path: Path, league: str) -> LeagueResult:
+    """
+    Worker task building the table of the players of a league by position
+    :param data_path:
+    :param league:
+    :return: columns in the order of FutLeagueWidget.HEADERS
+    """
+    fut_manager = FutManager(data_path=data_path, handle_downloads=False)
+    table = league_positions.league_table(fut_manager.league_analyser(league=league))
+    names = table[FutAttr.name.value].astype(object).fillna('').astype(str) + ' ' + \
+        table[FutAttr.surname.value].astype(object).fillna('').astype(str)
+    columns = (table[FutAttr.position.value].tolist(), names.str.strip().tolist(),
+               table[FutAttr.rating.value].astype(int).tolist(), table[FutAttr.rarity.value].astype(str).tolist(),
+               table[league_positions.COUNT].astype(int).tolist())
+    return LeagueResult(data_path=data_path, league=league, columns=columns,
+                        position_order=table[league_positions.POSITION_ORDER].tolist())
+
+
+@instrument
+def load_diff(old_path: Path, new_path: Path) -> SnapshotDiff:
+    """
+    Worker task comparing two snapshots
+    :param old_path:
+    :param new_path:
+    :return:
+    """
+    return FutManager(data_path=new_path, handle_downloads=False).diff(old_path=old_path)
+
+
+@instrument
+def load_comparison(data_paths: Tuple[Path, ...]) -> ComparisonResult:
+    """
+    Worker task summarizing several snapshots from the shared catalog, loaded once per process
+    Only the selected snapshots that are missing or stale are read, in one catalog update
+    :param data_paths:
+    :return:
+    """
+    catalog = snapshot_catalog.catalog()
+    catalog.update(list(data_paths))
+    summaries = [catalog.entry(x).summary for x in data_paths]
+    return ComparisonResult(data_paths=tuple(data_paths), summaries=tuple(summaries))
@@ -0,0 +1,159 @@
+import logging
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core import PROJECT_ROOT
+from core.instrumentation import instrument
+from core import git_utils
+from core.enums import FileExtension
+from fut_utils import DATA_DIR, PLOTS_DIR
+from fut_utils.fut_enums import FutAttr
+from fut_utils import snapshot_store
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+
+def histogram_path(data_path: Path, plots_dir: Path = PLOTS_DIR) -> Path:
+    """
+    Location of the histogram image of a data file
+    :param data_path:
+    :param plots_dir:
+    :return:
+    """
+    return plots_dir.joinpath(f'{data_path.stem}{FileExtension.png.value}')
+
+
+def is_stale(data_path: Path, image_path: Path) -> bool:
+    """
+    Returns True if the histogram is missing or older than its data file, or its stored version
+    :param data_path:
+    :param image_path:
+    :return:
+    """
+    return not image_path.exists() or image_path.stat().st_mtime < snapshot_store.resolve(data_path).stat().st_mtime
+
+
+def rating_histogram(ratings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Counts per rating with the edges FutManager.bins always used, one edge per rating from the lowest to the highest
+    np.histogram closes the last bin, so the highest two ratings share it, as they did in the pandas histogram
+    :param ratings:
+    :return: counts, bin edges
+    """
+    low, high = int(ratings.min()), int(ratings.max())
+    edges = np.arange(low, max(high, low + 1) + 1)
+    return np.histogram(ratings, bins=edges)
+
+
+def create_figure(ratings: np.ndarray) -> Figure:
+    """
+    Draw the rating histogram on a standalone figure, independent of the pyplot state
+    :param ratings:
+    :return:
+    """
+    counts, edges = rating_histogram(ratings)
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.bar(edges[:-1], counts, width=np.diff(edges), align='edge')
+    axes.grid(True)
+    return figure
+
+
+@instrument
+def render_buffer(ratings: np.ndarray) -> np.ndarray:
+    """
+    Draw the rating histogram in memory
+    :param ratings:
+    :return: RGBA pixels as a (height, width, 4) uint8 array sharing the renderer's buffer
+    """
+    figure = create_figure(ratings)
+    figure.canvas.draw()
+    return np.asarray(figure.canvas.buffer_rgba())
+
+
+@instrument
+def render_histogram(ratings: np.ndarray, image_path: Path) -> np.ndarray:
+    """
+    Save the rating histogram image, replacing any existing image in one step
+    The figure is drawn once and its pixels encoded directly, so they can also be shown without reading the file
+    :param ratings:
+    :param image_path:
+    :return: RGBA pixels of the image
+    """
+    pixels = render_buffer(ratings)
+    image_path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(suffix=FileExtension.png.value, dir=image_path.parent.as_posix())
+
+    with os.fdopen(handle, 'wb') as temp_file:
+        imsave(temp_file, pixels, format='png')
+
+    os.chmod(temp_name, 0o644)
+    Path(temp_name).replace(image_path)
+    return pixels
+
+
+def load_ratings(data_path: Path) -> np.ndarray:
+    """
+    Read only the Rating column of a data file
+    :param data_path:
+    :return:
+    """
+    return snapshot_store.load(data_path, columns=[FutAttr.rating.value])[FutAttr.rating.value].to_numpy()
+
+
+def _render_file(data_path: str, image_path: str) -> str:
+    """
+    Process pool task rendering the histogram of one data file
+    :param data_path:
+    :param image_path:
+    :return:
+    """
+    render_histogram(load_ratings(Path(data_path)), Path(image_path))
+    return image_path
+
+
+@instrument
+def render_missing(data_dir: Path = DATA_DIR, plots_dir: Path = PLOTS_DIR, max_workers: Optional[int] = None,
+                   stage: bool = True) -> List[Path]:
+    """
+    Render the histograms that are missing or stale for every snapshot
+    Several images are rendered across a process pool and new images are staged in one batch
+    The pool spawns its processes, forking is unsafe once the UI has started its threads
+    :param data_dir:
+    :param plots_dir:
+    :param max_workers:
+    :param stage: add new images to the changelist
+    :return:
+    """
+    jobs = [(x, histogram_path(x, plots_dir=plots_dir)) for x in snapshot_store.snapshot_paths(data_dir=data_dir)]
+    jobs = [(data_path.as_posix(), image_path.as_posix()) for data_path, image_path in jobs
+            if is_stale(data_path, image_path)]
+
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            result = [Path(x) for x in pool.map(_render_file, *zip(*jobs))]
+    else:
+        result = [Path(_render_file(*job)) for job in jobs]
+
+    if result:
+        logging.info(f'Histograms rendered: {len(result)}')
+
+        if stage:
+            git_utils.git_manager().add_many([x.relative_to(PROJECT_ROOT) for x in result])
+
+    return result
+
+
+if __name__ == '__main__':
+    render_missing()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+from pandas.core.frame import DataFrame
+
+from fut_utils import POSITION_DICT
+from fut_utils.fut_enums import FutAttr
+
+COUNT: str = 'Count'
+POSITION_ORDER: str = 'Position Order'
+UNKNOWN_POSITION: str = 'Unknown'
+PLAYER_COLUMNS: list = [FutAttr.name.value, FutAttr.surname.value, FutAttr.rating.value, FutAttr.rarity.value]
+GROUP_COLUMNS: list = [FutAttr.league.value, FutAttr.position.value] + PLAYER_COLUMNS
+SORT_ORDER: dict = {
+    FutAttr.league.value: True,
+    FutAttr.position.value: True,
+    FutAttr.rating.value: False,
+    FutAttr.surname.value: True,
+    FutAttr.name.value: True,
+}
+
+
+def build_league_positions(data: DataFrame) -> dict:
+    """
+    Position maps for every league in one groupby over (League, Position)
+    Identical cards are collapsed into a Count column and each position is sorted by Rating
+    Every (League, Position) group is a contiguous slice of the sorted counts
+    :param data:
+    :return: {league: OrderedDict({position name: DataFrame})}
+    """
+    counts = data.groupby(GROUP_COLUMNS, observed=True, sort=False, dropna=False).size()
+    players = counts.reset_index(name=COUNT)
+    players = players.sort_values(list(SORT_ORDER), ascending=list(SORT_ORDER.values()), kind='stable',
+                                  ignore_index=True)
+    result = {}
+
+    if players.empty:
+        return result
+
+    leagues = players[FutAttr.league.value].to_numpy(dtype=object)
+    positions = players[FutAttr.position.value].to_numpy()
+    players = players[PLAYER_COLUMNS + [COUNT]]
+    starts = np.flatnonzero((leagues[1:] != leagues[:-1]) | (positions[1:] != positions[:-1])) + 1
+    bounds = zip(np.concatenate([[0], starts]), np.concatenate([starts, [len(players.index)]]))
+
+    for start, stop in bounds:
+        position_map = result.setdefault(leagues[start], OrderedDict())
+        position_map[POSITION_DICT.get(positions[start])] = players.iloc[start:stop].reset_index(drop=True)
+
+    return result
+
+
+def league_table(position_map: dict) -> DataFrame:
+    """
+    Position map of one league as a single table with one row per distinct card, positions in map order
+    :param position_map: {position name: DataFrame}
+    :return: Position, Position Order, the player columns and Count
+    """
+    columns = [FutAttr.position.value, POSITION_ORDER] + PLAYER_COLUMNS + [COUNT]
+
+    if not position_map:
+        return DataFrame(columns=columns)
+
+    sizes = [len(x.index) for x in position_map.values()]
+    names = [x if x is not None else UNKNOWN_POSITION for x in position_map]
+    result = pd.concat(position_map.values(), ignore_index=True)
+    result[FutAttr.position.value] = np.repeat(np.array(names, dtype=object), sizes)
+    result[POSITION_ORDER] = np.repeat(np.arange(len(sizes)), sizes)
+    return result[columns]
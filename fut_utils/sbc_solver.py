@@ -0,0 +1,381 @@
+import argparse
+import heapq
+import logging
+import numpy as np
+import sys
+
+from pandas.core.frame import DataFrame
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.lazy_import import lazy_import
+from fut_utils.fut_enums import FutAttr
+from fut_utils.squad_builder import base_ids
+
+fut_manager = lazy_import('fut_utils.fut_manager')
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+SQUAD_SIZE: int = 11
+SOLUTIONS: int = 5
+VALUE_BASE_RATING: int = 75
+VALUE_AT_BASE: float = 100.0
+VALUE_DOUBLING: float = 2.0
+UNTRADEABLE_FACTOR: float = 0.5
+DUPLICATE_FACTOR: float = 0.25
+MAX_TOTAL: int = SQUAD_SIZE * 99
+CARD_COST: str = 'Cost'
+
+
+class SbcBuckets(NamedTuple):
+    ratings: List[int]
+    rows: List[np.ndarray]
+    costs: List[np.ndarray]
+    base_ids: List[np.ndarray]
+    lowest: List[np.ndarray]
+
+
+class SbcSolution(NamedTuple):
+    rating: int
+    cost: float
+    counts: Dict[int, int]
+    players: DataFrame
+
+
+def team_rating(ratings: Sequence[int]) -> int:
+    """
+    FUT squad rating: players above the average add their excess to the total once more, the total is rounded and
+    divided by the squad size, rounding down
+    :param ratings:
+    :return:
+    """
+    ratings = np.asarray(ratings, dtype=float)
+    total = float(ratings.sum())
+    excess = float(np.maximum(ratings - total / SQUAD_SIZE, 0).sum())
+    return int(np.floor(total + excess + 0.5)) // SQUAD_SIZE
+
+
+def card_costs(data: DataFrame) -> np.ndarray:
+    """
+    Cost of handing in each card, NaN for loan cards which cannot be used
+    A card is valued by its rating, the value doubling every VALUE_DOUBLING points, reduced for untradeable cards
+    which cannot be sold and for spare copies of a card held more than once, plus the Discard Value lost by not
+    quick selling it
+    :param data:
+    :return:
+    """
+    ratings = data[FutAttr.rating.value].to_numpy(dtype=float)
+    ids = data[FutAttr.id.value].to_numpy()
+    _, inverse, counts = np.unique(ids, return_inverse=True, return_counts=True)
+    value = VALUE_AT_BASE * 2 ** ((ratings - VALUE_BASE_RATING) / VALUE_DOUBLING)
+    value *= np.where(data[FutAttr.untradeable.value].to_numpy(dtype=bool), UNTRADEABLE_FACTOR, 1.0)
+    value *= np.where(counts[inverse] > 1, DUPLICATE_FACTOR, 1.0)
+    cost = value + data[FutAttr.discard_value.value].to_numpy(dtype=float)
+    return np.where(data[FutAttr.loans.value].to_numpy() > 0, np.nan, cost)
+
+
+def lowest_costs(ratings: List[int], costs: List[np.ndarray]) -> List[np.ndarray]:
+    """
+    Lowest cost of k cards, k up to SQUAD_SIZE, from the buckets from each index on with ratings adding up to at
+    least s, as one (SQUAD_SIZE + 1, MAX_TOTAL + 1) table per index plus an empty table at the end
+    :param ratings: highest first
+    :param costs: cheapest first within each bucket
+    :return:
+    """
+    exact = np.full((SQUAD_SIZE + 1, MAX_TOTAL + 1), np.inf)
+    exact[0, 0] = 0.0
+    result = [exact]
+
+    for rating, bucket in zip(reversed(ratings), reversed(costs)):
+        cumulative = np.cumsum(bucket[:SQUAD_SIZE])
+        previous, exact = exact, exact.copy()
+
+        for count, cost in enumerate(cumulative, start=1):
+            shift = count * rating
+            np.minimum(exact[count:, shift:], previous[:SQUAD_SIZE + 1 - count, :MAX_TOTAL + 1 - shift] + cost,
+                       out=exact[count:, shift:])
+
+        result.append(exact)
+
+    return [np.minimum.accumulate(x[:, ::-1], axis=1)[:, ::-1] for x in reversed(result)]
+
+
+def build_buckets(data: DataFrame) -> SbcBuckets:
+    """
+    Cheapest cards of every rating, highest rating first, with one card per player and rating
+    A squad takes a player once, so in a rating it only ever needs the cheapest version of a player, and the
+    SQUAD_SIZE cheapest players of a rating always leave enough cards free of the players picked at other ratings
+    :param data:
+    :return:
+    """
+    costs = card_costs(data)
+    ratings = data[FutAttr.rating.value].to_numpy()
+    player_ids = base_ids(data[FutAttr.id.value].to_numpy().astype(np.int64))
+    usable = np.flatnonzero(~np.isnan(costs))
+    usable = usable[np.lexsort((costs[usable], ratings[usable], player_ids[usable]))]
+    first = np.ones(len(usable), dtype=bool)
+    first[1:] = (player_ids[usable][1:] != player_ids[usable][:-1]) | (ratings[usable][1:] != ratings[usable][:-1])
+    usable = usable[first]
+    usable = usable[np.lexsort((costs[usable], -ratings[usable]))]
+    bucket_ratings, starts, sizes = np.unique(-ratings[usable], return_index=True, return_counts=True)
+    rows = [usable[start:start + min(size, SQUAD_SIZE)] for start, size in zip(starts, sizes)]
+    bucket_costs = [costs[x] for x in rows]
+    bucket_ratings = [-int(x) for x in bucket_ratings]
+    return SbcBuckets(ratings=bucket_ratings, rows=rows, costs=bucket_costs, base_ids=[player_ids[x] for x in rows],
+                      lowest=lowest_costs(bucket_ratings, bucket_costs))
+
+
+def min_cost_assignment(costs: np.ndarray) -> np.ndarray:
+    """
+    Hungarian algorithm: the column given to each row so that no column is used twice and the total is lowest
+    :param costs: (rows, columns) with at least as many columns as rows
+    :return: column of each row
+    """
+    rows, columns = costs.shape
+    row_potential, column_potential = np.zeros(rows + 1), np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=int)  # row + 1 holding each column, column 0 is a sentinel
+    previous = np.zeros(columns + 1, dtype=int)
+
+    for row in range(1, rows + 1):
+        owner[0], column = row, 0
+        slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+
+        while owner[column]:
+            used[column] = True
+            current = owner[column]
+            reduced = costs[current - 1] - row_potential[current] - column_potential[1:]
+            better = ~used[1:] & (reduced < slack[1:])
+            slack[1:][better] = reduced[better]
+            previous[1:][better] = column
+            free = np.flatnonzero(~used)
+            following = free[np.argmin(slack[free])]
+            delta = slack[following]
+            row_potential[owner[used]] += delta
+            column_potential[used] -= delta
+            slack[~used] -= delta
+            column = following
+
+        while column:
+            owner[column] = owner[previous[column]]
+            column = previous[column]
+
+    result = np.zeros(rows, dtype=int)
+    held = np.flatnonzero(owner[1:])
+    result[owner[1:][held] - 1] = held
+    return result
+
+
+def assign(buckets: SbcBuckets, counts: tuple) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Cheapest cards for rating counts with every player at most once, None if the club has too few players
+    The cheapest cards of each rating are taken unless a player comes up at several ratings, in which case the
+    slots are matched to players exactly
+    :param buckets:
+    :param counts: ((rating, count), ...)
+    :return: (rows, card costs)
+    """
+    indices = [buckets.ratings.index(rating) for rating, _ in counts]
+    cheapest = [(index, slice(0, count)) for index, (_, count) in zip(indices, counts)]
+    players = np.concatenate([buckets.base_ids[index][part] for index, part in cheapest])
+
+    if len(np.unique(players)) == SQUAD_SIZE:
+        return (np.concatenate([buckets.rows[index][part] for index, part in cheapest]),
+                np.concatenate([buckets.costs[index][part] for index, part in cheapest]))
+
+    players = np.unique(np.concatenate([buckets.base_ids[index] for index in indices]))
+
+    if len(players) < SQUAD_SIZE:
+        return None
+
+    unavailable = 1.0 + 2.0 * sum(float(buckets.costs[index].sum()) for index in indices)
+    slot_costs, slot_rows = [], []
+
+    for index, (_, count) in zip(indices, counts):
+        columns = np.searchsorted(players, buckets.base_ids[index])
+        costs = np.full(len(players), unavailable)
+        rows = np.zeros(len(players), dtype=int)
+        costs[columns], rows[columns] = buckets.costs[index], buckets.rows[index]
+        slot_costs.extend([costs] * count)
+        slot_rows.extend([rows] * count)
+
+    slot_costs = np.array(slot_costs)
+    chosen = min_cost_assignment(slot_costs)
+    costs = slot_costs[np.arange(SQUAD_SIZE), chosen]
+
+    if (costs >= unavailable).any():
+        return None
+    return np.array(slot_rows)[np.arange(SQUAD_SIZE), chosen], costs
+
+
+def solve_counts(buckets: SbcBuckets, target: int, solutions: int = SOLUTIONS) -> List[tuple]:
+    """
+    Cheapest rating counts reaching the target squad rating
+    Branch and bound over the buckets from the highest rating, choosing how many cards each contributes
+    In elevenths the squad reaches the target when 11 * total + sum(max(11 * rating - total, 0)) >= 121 * target - 5
+    The left side never falls as the total grows, so for the cards picked so far and a rating cap on the open places
+    it gives the smallest total the open places need, and the lowest cost table prices that total
+    The bound lets a player be picked at several ratings, each complete squad is then priced by assign, which never
+    costs less, so the bound stays a lower bound
+    :param buckets:
+    :param target: squad rating
+    :param solutions: number of distinct rating counts returned
+    :return: [(cost, ((rating, count), ...), rows, card costs)] cheapest first
+    """
+    ratings, lowest = buckets.ratings, buckets.lowest
+    cumulative = [np.concatenate(([0.0], np.cumsum(x[:SQUAD_SIZE]))).tolist() for x in buckets.costs]
+    need = SQUAD_SIZE * SQUAD_SIZE * target - SQUAD_SIZE // 2
+    kept: List[tuple] = []  # max heap on cost via negation
+    picked: List[tuple] = []
+
+    def smallest_total(total: int, remaining: int, cap: int) -> Optional[int]:
+        """
+        Smallest squad total reaching the target with the open places rated at most cap, None if none does
+        The left side is piecewise linear in the total, with a break at 11 times each rating, walked from the bottom
+        """
+        points = picked + [(cap, remaining)] if remaining else picked
+        weight, scaled = SQUAD_SIZE, sum(SQUAD_SIZE * r * n for r, n in points)
+        highest = total + remaining * cap
+
+        if scaled >= need:
+            return total
+
+        for index in range(len(points) - 1, -1, -1):
+            rating, count = points[index]
+            weight -= count
+            scaled -= SQUAD_SIZE * rating * count
+
+            if weight < SQUAD_SIZE:
+                smallest = max(-((scaled - need) // (SQUAD_SIZE - weight)), total)
+
+                if smallest <= min(SQUAD_SIZE * points[index - 1][0] if index else smallest, highest):
+                    return smallest
+
+        return None
+
+    def bound(index: int, remaining: int, total: int, cost: float) -> float:
+        """
+        Lowest cost of any squad completing the picked cards with cards from the index on, inf if none reaches
+        """
+        if remaining and index == len(ratings):
+            return np.inf
+
+        smallest = smallest_total(total, remaining, ratings[index] if remaining else 0)
+
+        if smallest is None or (not remaining and smallest > total):
+            return np.inf
+        return cost + lowest[index][remaining, smallest - total]
+
+    def worst() -> float:
+        return -kept[0][0] if len(kept) == solutions else np.inf
+
+    def search(index: int, remaining: int, total: int, cost: float):
+        if not remaining:
+            assigned = assign(buckets, tuple(picked))
+
+            if assigned is None or assigned[1].sum() >= worst():
+                return
+
+            entry = (-float(assigned[1].sum()), tuple(picked)) + assigned
+
+            if len(kept) < solutions:
+                heapq.heappush(kept, entry)
+            else:
+                heapq.heappushpop(kept, entry)
+            return
+
+        rating = ratings[index]
+        children = []
+
+        for count in range(min(len(cumulative[index]) - 1, remaining) + 1):
+            if count:
+                picked.append((rating, count))
+
+            child_cost = cost + cumulative[index][count]
+            child_bound = bound(index + 1, remaining - count, total + count * rating, child_cost)
+
+            if count:
+                picked.pop()
+
+            if child_bound < worst():
+                children.append((child_bound, count, child_cost))
+
+        for child_bound, count, child_cost in sorted(children):
+            if child_bound >= worst():
+                break
+
+            if count:
+                picked.append((rating, count))
+
+            search(index + 1, remaining - count, total + count * rating, child_cost)
+
+            if count:
+                picked.pop()
+
+    if ratings and bound(0, SQUAD_SIZE, 0, 0.0) < np.inf:
+        search(0, SQUAD_SIZE, 0, 0.0)
+
+    return sorted(((-cost, counts, rows, prices) for cost, counts, rows, prices in kept), key=lambda x: x[:2])
+
+
+def _players(data: DataFrame, rows: np.ndarray, costs: np.ndarray) -> DataFrame:
+    """
+    Cards of a solution with their cost
+    :param data:
+    :param rows: positions in data
+    :param costs: card_costs of the rows
+    :return:
+    """
+    players = data.iloc[rows].reset_index(drop=True)
+    players[CARD_COST] = costs.round().astype(int)
+    return players
+
+
+def solve(data: DataFrame, target: int, solutions: int = SOLUTIONS, buckets: Optional[SbcBuckets] = None) \
+        -> List[SbcSolution]:
+    """
+    Cheapest sets of eleven cards reaching a squad rating, cheapest first
+    :param data:
+    :param target: squad rating
+    :param solutions: number of alternatives
+    :param buckets: build_buckets(data), pass it to reuse it between targets
+    :return: empty if the club cannot reach the target
+    """
+    buckets = build_buckets(data) if buckets is None else buckets
+    result = []
+
+    for _, counts, rows, costs in solve_counts(buckets, target, solutions):
+        players = _players(data, rows, costs)
+        ids = players[FutAttr.id.value].to_numpy().astype(np.int64)
+
+        if len(players.index) != SQUAD_SIZE or len(np.unique(base_ids(ids))) != SQUAD_SIZE:
+            raise ValueError(f'Solution is not {SQUAD_SIZE} distinct players: {ids.tolist()}')
+
+        result.append(SbcSolution(rating=team_rating(players[FutAttr.rating.value].to_numpy()),
+                                  cost=float(costs.sum()), counts=dict(counts), players=players))
+
+    return result
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Cheapest cards of the club reaching a squad rating')
+    parser.add_argument('target', type=int, help='squad rating')
+    parser.add_argument('--solutions', type=int, default=SOLUTIONS, help='number of alternatives')
+    options = parser.parse_args(args)
+    result = fut_manager.FutManager().sbc(options.target, solutions=options.solutions)
+
+    if not result:
+        logging.error(f'The club cannot reach {options.target}')
+        return 1
+
+    for solution in result:
+        counts = ', '.join(f'{n}x{rating}' for rating, n in solution.counts.items())
+        print(f'Rating {solution.rating}, cost {solution.cost:,.0f}: {counts}')
+        print(solution.players[[FutAttr.surname.value, FutAttr.rating.value, FutAttr.untradeable.value,
+                                CARD_COST]].to_string(index=False))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
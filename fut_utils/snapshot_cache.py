@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Tuple, Any, Optional, Hashable, FrozenSet, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas.core.frame import DataFrame
+
+
+class Snapshot:
+    def __init__(self, path: Path, key: Tuple[str, int, int], data: DataFrame,
+                 columns: Optional[FrozenSet[str]] = None, derived: Optional[dict] = None):
+        """
+        Parsed club-analyzer file plus any values derived from it
+        The data is shared between all users and threads of the cache so treat it as read-only
+        :param path: Path
+        :param key: (resolved path, mtime, size)
+        :param data: DataFrame
+        :param columns: columns loaded, None when the whole file was
+        :param derived: values already derived from the same version of the file
+        """
+        self.path: Path = path
+        self.key: Tuple[str, int, int] = key
+        self.data: DataFrame = data
+        self.columns: Optional[FrozenSet[str]] = columns
+        self._derived: dict = dict(derived or {})
+        self._lock: threading.RLock = threading.RLock()
+
+    def covers(self, columns: Optional[FrozenSet[str]]) -> bool:
+        """
+        Returns True if the snapshot holds every column requested
+        :param columns: None for every column
+        :return:
+        """
+        return self.columns is None or (columns is not None and columns <= self.columns)
+
+    def __repr__(self) -> str:
+        return f'Snapshot({self.path.name}, rows={len(self.data.index)})'
+
+    def derive(self, name: Hashable, factory: Callable[[DataFrame], Any]) -> Any:
+        """
+        Memoize a value computed from the snapshot data
+        :param name: hashable key of the value
+        :param factory: function taking the snapshot data
+        :return:
+        """
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = factory(self.data)
+            return self._derived[name]
+
+
+class SnapshotCache:
+    def __init__(self, loader: Callable[[Path, Optional[list]], DataFrame], max_size: int = 8):
+        """
+        Thread-safe LRU cache of parsed snapshots keyed by path, modification time and size
+        A snapshot may hold only some columns, a request for more loads the union and replaces it
+        :param loader: function that parses a data file, or only the columns listed
+        :param max_size: number of snapshots kept in memory
+        """
+        self.loader: Callable[[Path, Optional[list]], DataFrame] = loader
+        self.max_size: int = max_size
+        self._snapshots: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        info = f'Snapshots: {len(self)}/{self.max_size}'
+        info += f'\nHits: {self.hits}'
+        info += f'\nMisses: {self.misses}'
+        return info
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    @staticmethod
+    def snapshot_key(path: Path) -> Tuple[str, int, int]:
+        """
+        Key identifying a version of a data file on disk
+        :param path:
+        :return:
+        """
+        stat = path.stat()
+        return path.resolve().as_posix(), stat.st_mtime_ns, stat.st_size
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'max_size': self.max_size}
+
+    def get(self, path: Path, columns: Optional[Iterable[str]] = None) -> Snapshot:
+        """
+        Return the snapshot for a data file, parsing it only if it is new, has changed on disk or lacks a column
+        :param path:
+        :param columns: columns needed, every column by default
+        :return:
+        """
+        key = self.snapshot_key(path)
+        columns = None if columns is None else frozenset(columns)
+        derived = None
+
+        with self._lock:
+            snapshot: Optional[Snapshot] = self._snapshots.get(key[0])
+
+            if snapshot is not None and snapshot.key == key:
+                if snapshot.covers(columns):
+                    self.hits += 1
+                    self._snapshots.move_to_end(key[0])
+                    return snapshot
+
+                columns = None if columns is None else columns | snapshot.columns
+                derived = snapshot
+
+            self.misses += 1
+
+        if derived is not None:
+            with derived._lock:
+                derived = derived._derived.copy()
+
+        data = self.loader(path, None if columns is None else sorted(columns))
+        snapshot = Snapshot(path=path, key=key, data=data, columns=columns, derived=derived)
+
+        with self._lock:
+            current: Optional[Snapshot] = self._snapshots.get(key[0])
+
+            if current is not None and current.key == key and current.covers(columns):
+                return current   # loaded meanwhile by another thread
+
+            self._snapshots[key[0]] = snapshot
+            self._snapshots.move_to_end(key[0])
+
+            while len(self._snapshots) > self.max_size:
+                self._snapshots.popitem(last=False)
+
+        return snapshot
+
+    def invalidate(self, path: Optional[Path] = None):
+        """
+        Drop a snapshot from the cache, or every snapshot if no path is passed
+        :param path:
+        """
+        with self._lock:
+            if path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(path.resolve().as_posix(), None)
+
+    def reset_stats(self):
+        """
+        Zero the hit and miss counters
+        """
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,261 @@
+import json
+import logging
+import multiprocessing
+import numpy as np
+import sys
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.instrumentation import instrument
+from fut_utils import DATA_DIR, CACHE_DIR
+from fut_utils.fut_enums import FutAttr
+from fut_utils import snapshot_ingest
+from fut_utils import snapshot_sidecar
+from fut_utils import snapshot_store
+from fut_utils import snapshot_summary
+from fut_utils.snapshot_summary import SnapshotSummary
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+CATALOG_PATH: Path = CACHE_DIR.joinpath('catalog.json')
+CATALOG_VERSION: int = 1
+CATALOG_COLUMNS: tuple = snapshot_summary.SUMMARY_COLUMNS + (FutAttr.league.value,)
+VERSION_KEY: str = 'version'
+SNAPSHOTS_KEY: str = 'snapshots'
+
+_lock: threading.Lock = threading.Lock()
+
+
+class CatalogEntry(NamedTuple):
+    content_hash: str
+    signature: Tuple[int, int]
+    summary: SnapshotSummary
+    leagues: Dict[str, int]
+    rarities: Dict[str, int]
+
+    def to_json(self) -> dict:
+        return {'content_hash': self.content_hash, 'signature': list(self.signature),
+                'summary': self.summary._asdict(), 'leagues': self.leagues, 'rarities': self.rarities}
+
+    @classmethod
+    def from_json(cls, value: dict) -> 'CatalogEntry':
+        return cls(content_hash=value['content_hash'], signature=tuple(value['signature']),
+                   summary=SnapshotSummary(**value['summary']), leagues=value['leagues'], rarities=value['rarities'])
+
+
+def signature(data_path: Path) -> Tuple[int, int]:
+    """
+    Modification time and size of the file a snapshot is read from, its csv or its stored version
+    :param data_path:
+    :return:
+    """
+    return tuple(snapshot_sidecar.source_signature(snapshot_store.resolve(data_path)).tolist())
+
+
+def content_hash(data_path: Path) -> str:
+    """
+    Hash of the csv content of a snapshot, read from the metadata of a stored snapshot rather than recomputed
+    :param data_path:
+    :return:
+    """
+    path = snapshot_store.resolve(data_path)
+
+    if path.suffix == snapshot_store.STORE_EXTENSION:
+        with np.load(path.as_posix()) as arrays:
+            return snapshot_store.read_meta(arrays).source_hash
+    return snapshot_ingest.file_hash(path)
+
+
+def compute_entry(data_path: Path) -> CatalogEntry:
+    """
+    Statistics of one snapshot, reading only the columns they need
+    Module level so it can run in a process pool
+    :param data_path:
+    :return:
+    """
+    data = snapshot_store.load(data_path, columns=list(CATALOG_COLUMNS))
+
+    def counts(column: str) -> Dict[str, int]:
+        values = data[column].value_counts()
+        return {str(key): int(value) for key, value in values[values > 0].items()}
+
+    return CatalogEntry(content_hash=content_hash(data_path), signature=signature(data_path),
+                        summary=SnapshotSummary.from_data(data), leagues=counts(FutAttr.league.value),
+                        rarities=counts(FutAttr.rarity.value))
+
+
+class SnapshotCatalog:
+    def __init__(self, path: Path = CATALOG_PATH):
+        """
+        Persisted statistics of every archived snapshot keyed by data file name and content hash
+        Archived snapshots never change, so an entry is reused for as long as its file signature or content matches
+        :param path: Path
+        """
+        self.path: Path = path
+        self._entries: Optional[Dict[str, CatalogEntry]] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f'Snapshots: {len(self.entries)}'
+
+    @property
+    def entries(self) -> Dict[str, CatalogEntry]:
+        if self._entries is None:
+            self.load()
+        return self._entries
+
+    def load(self):
+        """
+        Read the persisted catalog, starting empty if there is none or it is from another version
+        """
+        self._entries = {}
+
+        if self.path.exists():
+            try:
+                content = json.loads(self.path.read_text(encoding='utf-8'))
+            except ValueError as error:
+                logging.error(f'Unreadable catalog {self.path.name}: {error}')
+                return
+
+            if content.get(VERSION_KEY) == CATALOG_VERSION:
+                self._entries = {key: CatalogEntry.from_json(value) for key, value in content[SNAPSHOTS_KEY].items()}
+
+    def save(self):
+        """
+        Persist the catalog
+        """
+        content = {VERSION_KEY: CATALOG_VERSION,
+                   SNAPSHOTS_KEY: {key: self.entries[key].to_json() for key in sorted(self.entries)}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp.json')
+        temp_path.write_text(json.dumps(content, indent=1, ensure_ascii=False), encoding='utf-8')
+        temp_path.replace(self.path)
+
+    def current_entry(self, data_path: Path, entries: Optional[Dict[str, CatalogEntry]] = None) \
+            -> Optional[CatalogEntry]:
+        """
+        Entry of a data file if it is up to date, None if it is missing or stale
+        A file whose signature changed, e.g. a csv packed into the store, is checked by content hash and its entry
+        returned with the new signature when the content is the same
+        :param data_path:
+        :param entries: defaults to the entries of the catalog
+        :return:
+        """
+        entry = (self.entries if entries is None else entries).get(data_path.stem)
+
+        if entry is None:
+            return None
+
+        current = signature(data_path)
+
+        if entry.signature == current:
+            return entry
+
+        if entry.content_hash == content_hash(data_path):
+            return entry._replace(signature=current)
+
+        return None
+
+    @instrument
+    def update(self, data_paths: Optional[List[Path]] = None, max_workers: Optional[int] = None,
+               save: bool = True) -> List[Path]:
+        """
+        Compute the entries of new and changed snapshots, several at a time across a process pool
+        The lock is only held to read and merge the entries, so lookups are never held up by a fill in progress
+        The pool spawns its processes, forking is unsafe once the UI has started its threads
+        :param data_paths: every archived snapshot by default
+        :param max_workers:
+        :param save: persist the catalog if anything changed
+        :return: snapshots computed
+        """
+        data_paths = snapshot_store.snapshot_paths(DATA_DIR) if data_paths is None else data_paths
+
+        with self._lock:
+            entries = dict(self.entries)
+
+        changed, stale = {}, []
+
+        for data_path in data_paths:
+            entry = self.current_entry(data_path, entries)
+
+            if entry is None:
+                stale.append(data_path)
+            elif entry != entries[data_path.stem]:
+                changed[data_path.stem] = entry
+
+        if len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                changed.update(zip([x.stem for x in stale], pool.map(compute_entry, stale)))
+        else:
+            changed.update((x.stem, compute_entry(x)) for x in stale)
+
+        if stale:
+            logging.info(f'Catalog updated: {len(stale)} snapshots')
+
+        if changed:
+            with self._lock:
+                self.entries.update(changed)
+
+                if save:
+                    self.save()
+
+        return stale
+
+    def entry(self, data_path: Path) -> CatalogEntry:
+        """
+        Statistics of a snapshot, computed and persisted first if missing or stale
+        :param data_path:
+        :return:
+        """
+        with self._lock:
+            entries = dict(self.entries)
+
+        entry = self.current_entry(data_path, entries)
+
+        if entry is None or entry != entries[data_path.stem]:
+            self.update([data_path])
+            return self.entries[data_path.stem]
+        return entry
+
+
+_catalog: Optional[SnapshotCatalog] = None
+
+
+def catalog() -> SnapshotCatalog:
+    """
+    Catalog shared by every thread of the process
+    :return:
+    """
+    global _catalog
+
+    with _lock:
+        if _catalog is None:
+            _catalog = SnapshotCatalog()
+        return _catalog
+
+
+def entry(data_path: Path) -> CatalogEntry:
+    """
+    Statistics of a snapshot from the shared catalog, safe to call from several threads
+    :param data_path:
+    :return:
+    """
+    return catalog().entry(data_path)
+
+
+def update(max_workers: Optional[int] = None) -> List[Path]:
+    """
+    Bring the shared catalog up to date with every archived snapshot
+    :param max_workers:
+    :return: snapshots computed
+    """
+    return catalog().update(max_workers=max_workers)
+
+
+if __name__ == '__main__':
+    logging.info(f'Computed: {len(update())}')
+    sys.exit(0)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from pandas.core.frame import DataFrame
+from fut_utils.fut_enums import FutAttr
+
+OCCURRENCE: str = 'Occurrence'
+OLD_SUFFIX: str = ' Old'
+NEW_SUFFIX: str = ' New'
+ADDED: str = 'Added'
+REMOVED: str = 'Removed'
+CHANGED: str = 'Changed'
+TRACKED_ATTRS: tuple = (FutAttr.rating, FutAttr.rarity, FutAttr.position, FutAttr.club)
+DIFF_COLUMNS: tuple = (FutAttr.id.value, FutAttr.name.value, FutAttr.surname.value, FutAttr.rating.value,
+                       FutAttr.rarity.value, FutAttr.position.value, FutAttr.club.value, FutAttr.league.value)
+
+
+class SnapshotDiff:
+    def __init__(self, added: DataFrame, removed: DataFrame, changed: DataFrame):
+        """
+        Players acquired, discarded and changed between two snapshots
+        :param added: rows only in the new snapshot
+        :param removed: rows only in the old snapshot
+        :param changed: rows in both with old and new values of the tracked attributes
+        """
+        self.added: DataFrame = added
+        self.removed: DataFrame = removed
+        self.changed: DataFrame = changed
+
+    def __repr__(self) -> str:
+        info = f'{ADDED}: {self.num_added}'
+        info += f'\n{REMOVED}: {self.num_removed}'
+        info += f'\n{CHANGED}: {self.num_changed}'
+        return info
+
+    @classmethod
+    def from_data(cls, old_data: DataFrame, new_data: DataFrame) -> 'SnapshotDiff':
+        """
+        Hash join two snapshots on Id with no row iteration
+        Repeated Ids (e.g. club and tradepile copies) are paired in order of occurrence
+        :param old_data:
+        :param new_data:
+        :return:
+        """
+        old_keyed, new_keyed = cls._keyed(old_data), cls._keyed(new_data)
+        keys = [FutAttr.id.value, OCCURRENCE]
+        old_index, new_index = pd.MultiIndex.from_frame(old_keyed[keys]), pd.MultiIndex.from_frame(new_keyed[keys])
+        added = new_keyed.loc[~new_index.isin(old_index)].drop(columns=OCCURRENCE).reset_index(drop=True)
+        removed = old_keyed.loc[~old_index.isin(new_index)].drop(columns=OCCURRENCE).reset_index(drop=True)
+        both = old_keyed.merge(new_keyed, how='inner', on=keys, suffixes=(OLD_SUFFIX, NEW_SUFFIX))
+        mask = np.zeros(len(both.index), dtype=bool)
+
+        for attr in TRACKED_ATTRS:
+            old_values = both[f'{attr.value}{OLD_SUFFIX}'].to_numpy(dtype=object)
+            new_values = both[f'{attr.value}{NEW_SUFFIX}'].to_numpy(dtype=object)
+            mask |= old_values != new_values
+
+        return cls(added=added, removed=removed, changed=both.loc[mask].drop(columns=OCCURRENCE).reset_index(drop=True))
+
+    @staticmethod
+    def _keyed(data: DataFrame) -> DataFrame:
+        """
+        Project the columns needed for the diff and number repeated Ids
+        :param data:
+        :return:
+        """
+        result = data[list(DIFF_COLUMNS)].sort_values(FutAttr.id.value, kind='stable')
+        result[OCCURRENCE] = result.groupby(FutAttr.id.value, sort=False).cumcount()
+        return result
+
+    @property
+    def num_added(self) -> int:
+        return len(self.added.index)
+
+    @property
+    def num_removed(self) -> int:
+        return len(self.removed.index)
+
+    @property
+    def num_changed(self) -> int:
+        return len(self.changed.index)
+
+    @property
+    def rating_deltas(self) -> np.ndarray:
+        old_ratings = self.changed[f'{FutAttr.rating.value}{OLD_SUFFIX}'].to_numpy(dtype=np.int64)
+        return self.changed[f'{FutAttr.rating.value}{NEW_SUFFIX}'].to_numpy(dtype=np.int64) - old_ratings
+
+    @property
+    def num_upgraded(self) -> int:
+        return int((self.rating_deltas > 0).sum())
+
+    @property
+    def num_downgraded(self) -> int:
+        return int((self.rating_deltas < 0).sum())
+
+    def breakdown(self, attr: FutAttr) -> DataFrame:
+        """
+        Counts of added, removed and changed players for each value of an attribute
+        Changed players are counted under their new value
+        :param attr:
+        :return:
+        """
+        columns = {
+            ADDED: self.added[attr.value],
+            REMOVED: self.removed[attr.value],
+            CHANGED: self.changed[f'{attr.value}{NEW_SUFFIX}'],
+        }
+        counts = {key: value.astype(object).value_counts() for key, value in columns.items()}
+        result = DataFrame(counts).fillna(0).astype(int)
+        return result.loc[result.sum(axis=1).sort_values(ascending=False).index]
+
@@ -0,0 +1,243 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, date
+from pandas.api.types import union_categoricals
+from pandas.core.frame import DataFrame
+from pandas.core.series import Series
+from pathlib import Path
+from typing import List, Optional
+
+from fut_utils import DATA_DIR, CACHE_DIR, DATA_FILE_STEM
+from fut_utils.fut_enums import FutAttr
+from fut_utils import snapshot_sidecar
+from fut_utils import snapshot_store
+from fut_utils import snapshot_summary
+from fut_utils.snapshot_summary import SnapshotSummary
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+HISTORY_PATH: Path = CACHE_DIR.joinpath('history.npz')
+SNAPSHOT_DATE: str = 'Snapshot Date'
+SNAPSHOT_DATE_FORMAT: str = '%Y_%m_%d'
+SNAPSHOTS_KEY: str = '__snapshots__'
+SIGNATURES_KEY: str = '__signatures__'
+
+
+def snapshot_date(data_path: Path) -> date:
+    """
+    Date of an archived data file taken from its name
+    :param data_path:
+    :return:
+    """
+    return datetime.strptime(data_path.stem[len(DATA_FILE_STEM) + 1:], SNAPSHOT_DATE_FORMAT).date()
+
+
+class SnapshotHistory:
+    def __init__(self, path: Path = HISTORY_PATH):
+        """
+        Every archived snapshot held as one long table keyed by (Snapshot Date, Id)
+        Only new or changed data files are parsed, but appending them rebuilds the table and saving rewrites the whole
+        file, so an update costs time proportional to the history and not just to the new snapshots
+        :param path: Path
+        """
+        self.path: Path = path
+        self._table: Optional[DataFrame] = None
+        self._signatures: dict = {}
+
+    def __repr__(self) -> str:
+        info = f'Snapshots: {len(self.snapshots)}'
+        info += f'\nRows: {len(self.table.index):,}'
+        return info
+
+    @property
+    def table(self) -> DataFrame:
+        if self._table is None:
+            self.load()
+        return self._table
+
+    @property
+    def snapshots(self) -> List[str]:
+        if self._table is None:
+            self.load()
+        return sorted(self._signatures)
+
+    @property
+    def dates(self) -> List[date]:
+        return [snapshot_date(Path(x)) for x in self.snapshots]
+
+    def load(self):
+        """
+        Read the persisted table, starting empty if there is none
+        """
+        if self.path.exists():
+            with np.load(self.path.as_posix()) as arrays:
+                self._table = snapshot_sidecar.decode_frame(arrays, categorical=True)
+                self._signatures = {name: tuple(signature.tolist()) for name, signature in
+                                    zip(arrays[SNAPSHOTS_KEY].tolist(), arrays[SIGNATURES_KEY])}
+        else:
+            self._table = DataFrame()
+            self._signatures = {}
+
+    def save(self):
+        """
+        Persist the table, rewriting the whole file
+        """
+        arrays = snapshot_sidecar.encode_frame(self.table)
+        names = sorted(self._signatures)
+        arrays[SNAPSHOTS_KEY] = np.array(names, dtype=str)
+        arrays[SIGNATURES_KEY] = np.array([self._signatures[x] for x in names], dtype=np.int64).reshape(-1, 2)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(f'.tmp{snapshot_sidecar.SIDECAR_EXTENSION}')
+        np.savez(temp_path.as_posix(), **arrays)
+        temp_path.replace(self.path)
+
+    def is_current(self, csv_path: Path) -> bool:
+        """
+        Returns True if the rows of this data file, or of its stored version, are already in the table
+        :param csv_path:
+        :return:
+        """
+        signature = tuple(snapshot_sidecar.source_signature(snapshot_store.resolve(csv_path)).tolist())
+        return self._signatures.get(csv_path.stem) == signature
+
+    def ingest(self, *csv_paths: Path):
+        """
+        Append the rows of data files in one go, replacing any rows previously ingested from them
+        Only these files are read, the table itself is rebuilt with their rows
+        :param csv_paths:
+        """
+        if self._table is None:
+            self.load()
+
+        frames = []
+
+        for csv_path in csv_paths:
+            data_date = np.datetime64(snapshot_date(csv_path), 'D')
+            rows = snapshot_store.load(csv_path).sort_values(FutAttr.id.value, kind='stable')
+            rows.insert(0, SNAPSHOT_DATE, np.full(len(rows.index), data_date))
+            frames.append(rows)
+
+            if csv_path.stem in self._signatures:
+                self._table = self._table.loc[self._table[SNAPSHOT_DATE] != data_date]
+
+            signature = snapshot_sidecar.source_signature(snapshot_store.resolve(csv_path))
+            self._signatures[csv_path.stem] = tuple(signature.tolist())
+
+        if frames:
+            self._table = self._append(self._table, pd.concat(frames, ignore_index=True))
+
+    @staticmethod
+    def _append(table: DataFrame, rows: DataFrame) -> DataFrame:
+        """
+        New table of the rows concatenated onto the table, merging the categories of string columns
+        Every column is copied, so this is linear in the size of the table
+        :param table:
+        :param rows:
+        :return:
+        """
+        if table.empty:
+            result = rows.reset_index(drop=True)
+        else:
+            columns = {}
+
+            for column in table.columns:
+                if isinstance(table[column].dtype, pd.CategoricalDtype):
+                    new_values = pd.Categorical(rows[column])
+                    columns[column] = union_categoricals([table[column].array, new_values])
+                else:
+                    columns[column] = np.concatenate([table[column].to_numpy(), rows[column].to_numpy()])
+
+            result = DataFrame(columns)
+
+        for column in result.columns:
+            if pd.api.types.is_string_dtype(result[column]) and \
+                    not isinstance(result[column].dtype, pd.CategoricalDtype):
+                result[column] = result[column].astype('category')
+
+        if not result[SNAPSHOT_DATE].is_monotonic_increasing:
+            result = result.sort_values([SNAPSHOT_DATE, FutAttr.id.value], kind='stable', ignore_index=True)
+
+        return result
+
+    def update(self, data_dir: Path = DATA_DIR, save: bool = True) -> List[Path]:
+        """
+        Ingest every archived data file that is new or has changed since the last update
+        Unchanged files are not read again, but the table is rebuilt and saved whole if anything was ingested
+        :param data_dir:
+        :param save: persist the table if anything was ingested
+        :return:
+        """
+        if self._table is None:
+            self.load()
+
+        result = [x for x in snapshot_store.snapshot_paths(data_dir=data_dir) if not self.is_current(x)]
+
+        self.ingest(*result)
+
+        if result:
+            logging.info(f'History ingested: {len(result)} snapshots')
+
+        if result and save:
+            self.save()
+
+        return result
+
+    def player_counts(self) -> Series:
+        """
+        Number of cards in each snapshot
+        :return:
+        """
+        return self.table.groupby(SNAPSHOT_DATE, observed=True).size()
+
+    def rating_trend(self) -> DataFrame:
+        """
+        Rating statistics for each snapshot
+        :return:
+        """
+        ratings = self.table.groupby(SNAPSHOT_DATE, observed=True)[FutAttr.rating.value]
+        return ratings.agg(['sum', 'mean', 'median', 'max'])
+
+    def counts_by(self, attr: FutAttr) -> DataFrame:
+        """
+        Frequencies of the values of an attribute with one row per snapshot
+        :param attr:
+        :return:
+        """
+        return self.table.groupby([SNAPSHOT_DATE, attr.value], observed=True).size().unstack(fill_value=0)
+
+    def summaries(self, dates: List[date]) -> List[SnapshotSummary]:
+        """
+        Summaries of several snapshots computed together from the table
+        :param dates: snapshot dates, each must be in the table
+        :return: one summary per date, in the order given
+        """
+        column = self.table[SNAPSHOT_DATE].to_numpy().astype('datetime64[D]')
+        wanted = np.array(dates, dtype='datetime64[D]')
+        groups = pd.Index(wanted).get_indexer(column)
+        rows = groups >= 0
+        missing = sorted(set(wanted.tolist()) - set(column[rows].tolist()))
+
+        if missing:
+            raise KeyError(f'Snapshots not in the history: {missing}')
+
+        return snapshot_summary.grouped_summaries(groups[rows], self.table[FutAttr.rating.value].to_numpy()[rows],
+                                                  self.table[FutAttr.rarity.value].to_numpy()[rows], len(wanted))
+
+    def player_history(self, player_id: int) -> DataFrame:
+        """
+        Every row of a card across the snapshots
+        :param player_id:
+        :return:
+        """
+        return self.table.loc[self.table[FutAttr.id.value] == player_id]
+
+
+if __name__ == '__main__':
+    history = SnapshotHistory()
+    history.update()
+    print(history)
+    # print(history.rating_trend())
+    # print(history.counts_by(FutAttr.league))
@@ -0,0 +1,234 @@
+import hashlib
+import io
+import logging
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+from core.instrumentation import instrument
+from core.lazy_import import lazy_import
+from fut_utils import DATA_DIR, DATA_FILE_STEM
+from fut_utils.fut_enums import FutAttr
+
+snapshot_store = lazy_import('fut_utils.snapshot_store')
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+CHUNK_SIZE: int = 50_000
+MIN_ROWS: int = 2
+EXPECTED_COLUMNS: tuple = (
+    'Id', 'Lastname', 'Name', 'Rating', 'Position', 'Rarity', 'Skill Moves', 'Weak Foot', 'Chemistry', 'Country',
+    'League', 'Club', 'Untradeable', 'Loans', 'Bought For', 'Price Range', 'Discard Value', 'Location',
+)
+INTEGER_COLUMNS: tuple = ('Id', 'Rating', 'Position', 'Skill Moves', 'Weak Foot', 'Loans', 'Bought For',
+                          'Discard Value')
+BOOL_COLUMNS: tuple = (FutAttr.untradeable.value,)
+HASH_BLOCK_SIZE: int = 1 << 20
+
+
+class IngestStatus(Enum):
+    ingested = 'ingested'
+    duplicate = 'duplicate'
+    invalid = 'invalid'
+
+
+class ValidationReport(NamedTuple):
+    rows: int
+    content_hash: str
+    duplicate_ids: int
+    errors: Tuple[str, ...]
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+class IngestResult(NamedTuple):
+    status: IngestStatus
+    report: ValidationReport
+    path: Optional[Path]
+
+
+class HashingReader(io.RawIOBase):
+    def __init__(self, source: BinaryIO, copy: Optional[BinaryIO] = None):
+        """
+        Binary stream hashing every byte read from the source and optionally copying it to a second file
+        :param source:
+        :param copy:
+        """
+        super(HashingReader, self).__init__()
+        self.source: BinaryIO = source
+        self.copy: Optional[BinaryIO] = copy
+        self.hash = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Override for readinto
+        :param buffer:
+        :return:
+        """
+        size = self.source.readinto(buffer)
+
+        if size:
+            view = memoryview(buffer)[:size]
+            self.hash.update(view)
+
+            if self.copy is not None:
+                self.copy.write(view)
+
+        return size
+
+    @property
+    def hexdigest(self) -> str:
+        return self.hash.hexdigest()
+
+
+def check_chunk(chunk: pd.DataFrame) -> List[str]:
+    """
+    Schema errors of one chunk of a data file
+    :param chunk:
+    :return:
+    """
+    errors = []
+
+    for column in INTEGER_COLUMNS:
+        if not pd.api.types.is_integer_dtype(chunk[column].dtype):
+            errors.append(f'{column} is not an integer column')
+
+    for column in BOOL_COLUMNS:
+        if not pd.api.types.is_bool_dtype(chunk[column].dtype):
+            errors.append(f'{column} is not a true/false column')
+
+    return errors
+
+
+@instrument
+def validate(csv_path: Path, copy: Optional[BinaryIO] = None, chunk_size: int = CHUNK_SIZE) -> ValidationReport:
+    """
+    Check the header, column types and ids of a data file in one chunked pass, hashing its content on the way
+    Repeated ids are counted rather than rejected, exports list a card once per location and may repeat rows
+    :param csv_path:
+    :param copy: file receiving the bytes read, to write the snapshot on the same pass
+    :param chunk_size: rows per chunk
+    :return:
+    """
+    errors, ids, rows = [], [], 0
+
+    with csv_path.open('rb') as source:
+        reader = HashingReader(source, copy=copy)
+
+        try:
+            chunks = pd.read_csv(io.BufferedReader(reader, buffer_size=HASH_BLOCK_SIZE), chunksize=chunk_size)
+
+            for chunk in chunks:
+                if not rows and tuple(chunk.columns) != EXPECTED_COLUMNS:
+                    missing = [x for x in EXPECTED_COLUMNS if x not in chunk.columns]
+                    extra = [x for x in chunk.columns if x not in EXPECTED_COLUMNS]
+                    errors.append(f'Unexpected header, missing: {missing}, extra: {extra}')
+                    break
+
+                errors.extend(x for x in check_chunk(chunk) if x not in errors)
+                ids.append(chunk[FutAttr.id.value].to_numpy())
+                rows += len(chunk.index)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as error:
+            errors.append(f'Unreadable csv: {error}')
+
+        while reader.readinto(bytearray(HASH_BLOCK_SIZE)):   # hash whatever the parser did not consume
+            pass
+
+    if not errors and rows < MIN_ROWS:
+        errors.append(f'Only {rows} rows')
+
+    duplicate_ids = 0
+
+    if ids and not errors:
+        all_ids = np.concatenate(ids)
+        duplicate_ids = len(all_ids) - len(np.unique(all_ids))
+
+    return ValidationReport(rows=rows, content_hash=reader.hexdigest, duplicate_ids=duplicate_ids,
+                            errors=tuple(errors))
+
+
+def file_hash(file_path: Path) -> str:
+    """
+    Content hash of a file, the same digest validate computes
+    :param file_path:
+    :return:
+    """
+    content_hash = hashlib.sha256()
+
+    with file_path.open('rb') as source:
+        for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+            content_hash.update(block)
+
+    return content_hash.hexdigest()
+
+
+def find_identical(content_hash: str, size: int, data_dir: Path = DATA_DIR) -> Optional[Path]:
+    """
+    Archived data file with the same content, only files of the same size are hashed
+    :param content_hash:
+    :param size:
+    :param data_dir:
+    :return:
+    """
+    for csv_path in sorted(data_dir.glob(f'{DATA_FILE_STEM}*.csv'), reverse=True):
+        if csv_path.stat().st_size == size and file_hash(csv_path) == content_hash:
+            return csv_path
+    return None
+
+
+@instrument
+def ingest(download_path: Path, target_path: Path, data_dir: Path = DATA_DIR) -> IngestResult:
+    """
+    Validate a downloaded data file and write it to the target in one read
+    The bytes are copied to a temporary file beside the target while validating and moved into place only if the
+    file is valid, keeping the download's modification time which dates the snapshot
+    A download identical to an archived snapshot, kept as a csv or stored as a delta, is removed without being written
+    :param download_path:
+    :param target_path:
+    :param data_dir: directory of the archived snapshots
+    :return:
+    """
+    handle, temp_name = tempfile.mkstemp(suffix='.tmp', dir=target_path.parent.as_posix())
+    temp_path = Path(temp_name)
+
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            report = validate(download_path, copy=temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        if not report.valid:
+            logging.error(f'Downloaded data file invalid: {"; ".join(report.errors)}')
+            return IngestResult(status=IngestStatus.invalid, report=report, path=None)
+
+        stat = download_path.stat()
+        identical = find_identical(report.content_hash, stat.st_size, data_dir=data_dir) or \
+            snapshot_store.find_identical(report.content_hash, stat.st_size)
+
+        if identical is not None:
+            logging.info(f'Downloaded data file identical to {identical.name}, skipped')
+            download_path.unlink()
+            return IngestResult(status=IngestStatus.duplicate, report=report, path=identical)
+
+        if report.duplicate_ids:
+            logging.info(f'Repeated ids: {report.duplicate_ids}')
+
+        os.chmod(temp_name, 0o644)
+        os.utime(temp_name, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        temp_path.replace(target_path)
+        download_path.unlink()
+        logging.info(f'Ingested {report.rows} rows from {download_path.name}')
+        return IngestResult(status=IngestStatus.ingested, report=report, path=target_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
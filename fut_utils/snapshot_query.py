@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from pandas.core.frame import DataFrame
+from typing import Iterable, Tuple, Union, Any, List
+
+from fut_utils import POSITION_DICT
+from fut_utils.fut_enums import FutAttr
+
+INDEXED_ATTRS: tuple = (FutAttr.league, FutAttr.club, FutAttr.position, FutAttr.rarity, FutAttr.country)
+INDEXED_COLUMNS: tuple = tuple(attr.value for attr in INDEXED_ATTRS)
+POSITION_CODES: dict = {value: key for key, value in POSITION_DICT.items()}
+MEMBERSHIP_TYPES: tuple = (list, tuple, set, frozenset)
+Predicate = Tuple[Union[FutAttr, str], Any]
+
+
+def normalize_predicate(predicate: Predicate) -> Tuple[str, Any]:
+    """
+    Convert a predicate to (column, value)
+    Values may be a single value or a list/tuple/set for membership
+    Positions may be passed by code or by name from POSITION_DICT
+    :param predicate:
+    :return:
+    """
+    attr, value = predicate
+    column = attr.value if isinstance(attr, FutAttr) else attr
+
+    if column == FutAttr.position.value:
+        if isinstance(value, MEMBERSHIP_TYPES):
+            value = type(value)(POSITION_CODES.get(x, x) for x in value)
+        else:
+            value = POSITION_CODES.get(value, value)
+
+    return column, value
+
+
+class SnapshotIndex:
+    def __init__(self, data: DataFrame):
+        """
+        Inverted indexes (value -> row positions) for the low-cardinality columns of a snapshot
+        Each index is built on first use
+        :param data: DataFrame
+        """
+        self.data: DataFrame = data
+        self._indexes: dict = {}
+
+    def __repr__(self) -> str:
+        return f'SnapshotIndex(rows={self.row_count}, indexed={list(self._indexes)})'
+
+    @property
+    def row_count(self) -> int:
+        return len(self.data.index)
+
+    def index(self, column: str) -> dict:
+        """
+        Row positions for each value of a column, sorted ascending
+        :param column:
+        :return:
+        """
+        if column not in self._indexes:
+            codes, uniques = pd.factorize(self.data[column])
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            postings = np.split(order[len(codes) - counts.sum():], np.cumsum(counts)[:-1])
+            self._indexes[column] = dict(zip(uniques.tolist(), postings))
+        return self._indexes[column]
+
+    def positions(self, column: str, value: Any) -> np.ndarray:
+        """
+        Row positions matching an equality or membership predicate on an indexed column
+        :param column:
+        :param value:
+        :return:
+        """
+        index = self.index(column)
+
+        if isinstance(value, MEMBERSHIP_TYPES):
+            postings = [index[x] for x in value if x in index]
+            return np.sort(np.concatenate(postings)) if postings else np.empty(0, dtype=np.intp)
+
+        return index.get(value, np.empty(0, dtype=np.intp))
+
+    def mask(self, predicates: Iterable[Predicate]) -> np.ndarray:
+        """
+        Compile predicates into one boolean row mask
+        Indexed predicates are intersected smallest first, the rest are evaluated on the surviving rows only
+        :param predicates:
+        :return:
+        """
+        indexed: List[np.ndarray] = []
+        scanned: List[Tuple[str, Any]] = []
+
+        for column, value in map(normalize_predicate, predicates):
+            if column in INDEXED_COLUMNS:
+                indexed.append(self.positions(column, value))
+            else:
+                scanned.append((column, value))
+
+        if indexed:
+            indexed.sort(key=len)
+            candidates = indexed[0]
+
+            for positions in indexed[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, positions, assume_unique=True)
+        else:
+            candidates = np.arange(self.row_count)
+
+        for column, value in scanned:
+            if not len(candidates):
+                break
+            values = self.data[column].to_numpy()[candidates]
+            keep = np.isin(values, list(value)) if isinstance(value, MEMBERSHIP_TYPES) else values == value
+            candidates = candidates[keep]
+
+        result = np.zeros(self.row_count, dtype=bool)
+        result[candidates] = True
+        return result
+
+    def query(self, predicates: Iterable[Predicate]) -> DataFrame:
+        """
+        Rows matching every predicate
+        :param predicates:
+        :return:
+        """
+        return self.data.loc[self.mask(predicates)]
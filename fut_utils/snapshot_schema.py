@@ -0,0 +1,132 @@
+import argparse
+import logging
+import pandas as pd
+import sys
+
+from pandas.core.frame import DataFrame
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+from core.lazy_import import lazy_import
+from fut_utils import DATA_DIR
+from fut_utils.fut_enums import FutAttr
+
+snapshot_store = lazy_import('fut_utils.snapshot_store')
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+CATEGORY: str = 'category'
+COLUMN_DTYPES: dict = {
+    FutAttr.id.value: 'int64',
+    FutAttr.rating.value: 'int8',
+    FutAttr.position.value: 'int8',
+    FutAttr.rarity.value: CATEGORY,
+    FutAttr.skill_moves.value: 'int8',
+    FutAttr.weak_foot.value: 'int8',
+    'Chemistry': CATEGORY,
+    FutAttr.country.value: CATEGORY,
+    FutAttr.league.value: CATEGORY,
+    FutAttr.club.value: CATEGORY,
+    FutAttr.untradeable.value: 'bool',
+    FutAttr.loans.value: 'int16',
+    'Bought For': 'int32',
+    FutAttr.discard_value.value: 'int32',
+    'Location': CATEGORY,
+}
+
+
+class MemoryReport(NamedTuple):
+    name: str
+    rows: int
+    default_bytes: int
+    compact_bytes: int
+
+    @property
+    def ratio(self) -> float:
+        return self.compact_bytes / self.default_bytes if self.default_bytes else 1.0
+
+
+def compact(data: DataFrame) -> DataFrame:
+    """
+    Apply COLUMN_DTYPES to the columns of a snapshot, leaving columns already of the right type untouched
+    Free text columns such as names keep the default string type
+    :param data:
+    :return:
+    """
+    dtypes = {column: dtype for column, dtype in COLUMN_DTYPES.items()
+              if column in data.columns and str(data[column].dtype) != dtype}
+    return data.astype(dtypes) if dtypes else data
+
+
+def read_csv(csv_path: Path, columns: Optional[Sequence[str]] = None) -> DataFrame:
+    """
+    Parse a data file straight into the compact types, optionally only some of its columns
+    :param csv_path:
+    :param columns: subset of columns to read, in file order
+    :return:
+    """
+    wanted = COLUMN_DTYPES if columns is None else {x: y for x, y in COLUMN_DTYPES.items() if x in columns}
+    return pd.read_csv(csv_path.as_posix(), usecols=None if columns is None else list(columns), dtype=wanted)
+
+
+def memory_usage(data: DataFrame) -> int:
+    """
+    Bytes held by a snapshot, counting the contents of string columns
+    :param data:
+    :return:
+    """
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def default_types(data: DataFrame) -> DataFrame:
+    """
+    A snapshot with the types a plain read_csv gives it, int64 integers and strings
+    :param data:
+    :return:
+    """
+    return data.astype({column: 'int64' if pd.api.types.is_integer_dtype(dtype) else 'str'
+                        for column, dtype in data.dtypes.items()
+                        if not pd.api.types.is_bool_dtype(dtype) and not pd.api.types.is_float_dtype(dtype)})
+
+
+def memory_report(data_paths: List[Path]) -> List[MemoryReport]:
+    """
+    Footprint of snapshots with the default types against the compact types they are loaded with
+    :param data_paths: csv paths, whether present as a csv or only stored
+    :return:
+    """
+    result = []
+
+    for data_path in data_paths:
+        data = snapshot_store.load(data_path)
+        result.append(MemoryReport(name=data_path.stem, rows=len(data.index),
+                                   default_bytes=memory_usage(default_types(data)),
+                                   compact_bytes=memory_usage(data)))
+
+    return result
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Memory footprint of snapshots with default and compact types')
+    parser.add_argument('data_paths', nargs='*', type=Path, help='data files, every archived snapshot by default')
+    options = parser.parse_args(args)
+    reports = memory_report(options.data_paths or snapshot_store.snapshot_paths(DATA_DIR))
+
+    if not reports:
+        logging.error('No snapshots')
+        return 1
+
+    for report in reports:
+        print(f'{report.name:<30}{report.rows:>8,} rows{report.default_bytes / 2**20:>9.2f} MB'
+              f'{report.compact_bytes / 2**20:>9.2f} MB{report.ratio:>8.1%}')
+
+    default_bytes = sum(x.default_bytes for x in reports)
+    compact_bytes = sum(x.compact_bytes for x in reports)
+    print(f'{"Total":<30}{sum(x.rows for x in reports):>8,} rows{default_bytes / 2**20:>9.2f} MB'
+          f'{compact_bytes / 2**20:>9.2f} MB{compact_bytes / default_bytes:>8.1%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
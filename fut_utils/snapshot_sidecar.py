@@ -0,0 +1,185 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from pandas.core.frame import DataFrame
+from pathlib import Path
+from typing import List, Optional
+
+from core.instrumentation import instrument
+from fut_utils import DATA_DIR, CACHE_DIR, DATA_FILE_STEM
+from fut_utils.fut_enums import FutAttr
+from fut_utils import snapshot_schema
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+SIDECAR_EXTENSION: str = '.npz'
+SIDECAR_VERSION: int = 1
+CATEGORICAL_COLUMNS: tuple = (FutAttr.league.value, FutAttr.club.value, FutAttr.country.value,
+                              FutAttr.rarity.value)
+SMALL_INT_COLUMNS: dict = {
+    FutAttr.rating.value: np.int8,
+    FutAttr.position.value: np.int8,
+    FutAttr.skill_moves.value: np.int8,
+    FutAttr.weak_foot.value: np.int8,
+}
+BOOL_COLUMNS: tuple = (FutAttr.untradeable.value,)
+COLUMNS_KEY: str = '__columns__'
+SOURCE_KEY: str = '__source__'
+VERSION_KEY: str = '__version__'
+CODES: str = 'codes'
+CATEGORIES: str = 'categories'
+
+
+def sidecar_path(csv_path: Path) -> Path:
+    """
+    Location of the sidecar for a data file
+    :param csv_path:
+    :return:
+    """
+    return CACHE_DIR.joinpath(f'{csv_path.stem}{SIDECAR_EXTENSION}')
+
+
+def source_signature(csv_path: Path) -> np.ndarray:
+    """
+    Modification time and size of the data file that a sidecar was written from
+    :param csv_path:
+    :return:
+    """
+    stat = csv_path.stat()
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def is_fresh(csv_path: Path) -> bool:
+    """
+    Returns True if the sidecar exists and was written from the current version of the data file
+    :param csv_path:
+    :return:
+    """
+    path = sidecar_path(csv_path)
+
+    if not path.exists() or not csv_path.exists():
+        return False
+
+    with np.load(path.as_posix()) as arrays:
+        if VERSION_KEY not in arrays or int(arrays[VERSION_KEY]) != SIDECAR_VERSION:
+            return False
+        return bool(np.array_equal(arrays[SOURCE_KEY], source_signature(csv_path)))
+
+
+def encode_frame(data: DataFrame) -> dict:
+    """
+    Convert a snapshot into typed column arrays
+    String columns are dictionary encoded as codes plus categories
+    :param data:
+    :return:
+    """
+    arrays = {COLUMNS_KEY: np.array(data.columns, dtype=str)}
+
+    for column in data.columns:
+        series = data[column]
+
+        if column in SMALL_INT_COLUMNS:
+            arrays[column] = series.to_numpy(dtype=SMALL_INT_COLUMNS[column])
+        elif column in BOOL_COLUMNS:
+            arrays[column] = series.to_numpy(dtype=bool)
+        elif column in CATEGORICAL_COLUMNS or pd.api.types.is_string_dtype(series) or \
+                isinstance(series.dtype, pd.CategoricalDtype):
+            codes, categories = pd.factorize(series)
+            code_type = np.int16 if len(categories) < np.iinfo(np.int16).max else np.int32
+            arrays[f'{column}.{CODES}'] = codes.astype(code_type)
+            arrays[f'{column}.{CATEGORIES}'] = np.array(categories, dtype=str)
+        else:
+            arrays[column] = series.to_numpy()
+
+    return arrays
+
+
+def decode_frame(arrays, columns: Optional[List[str]] = None, categorical: bool = False) -> DataFrame:
+    """
+    Rebuild a snapshot from typed column arrays
+    :param arrays: mapping of array names to arrays
+    :param columns: subset of columns to decode
+    :param categorical: decode every dictionary encoded column as a categorical
+    :return:
+    """
+    result = {}
+
+    for column in columns if columns is not None else arrays[COLUMNS_KEY].tolist():
+        if column in arrays:
+            result[column] = arrays[column]
+        else:
+            values = pd.Categorical.from_codes(arrays[f'{column}.{CODES}'],
+                                               categories=arrays[f'{column}.{CATEGORIES}'].astype(object),
+                                               validate=False)
+            keep = categorical or column in CATEGORICAL_COLUMNS
+            result[column] = values if keep else np.asarray(values, dtype=object)
+
+    return DataFrame(result)
+
+
+@instrument
+def write_sidecar(csv_path: Path, data: Optional[DataFrame] = None) -> Path:
+    """
+    Write the typed columnar sidecar for a data file
+    :param csv_path:
+    :param data: parsed data file, read from the csv if not passed
+    :return:
+    """
+    data = data if data is not None else pd.read_csv(csv_path.as_posix())
+    arrays = encode_frame(data)
+    arrays[SOURCE_KEY] = source_signature(csv_path)
+    arrays[VERSION_KEY] = np.array(SIDECAR_VERSION)
+    path = sidecar_path(csv_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f'.tmp{SIDECAR_EXTENSION}')
+    np.savez(temp_path.as_posix(), **arrays)
+    temp_path.replace(path)
+    return path
+
+
+@instrument
+def read_sidecar(csv_path: Path, columns: Optional[List[str]] = None) -> DataFrame:
+    """
+    Read the sidecar for a data file
+    :param csv_path:
+    :param columns: subset of columns to read
+    :return:
+    """
+    with np.load(sidecar_path(csv_path).as_posix()) as arrays:
+        return decode_frame(arrays, columns=columns)
+
+
+@instrument
+def load_snapshot(csv_path: Path, columns: Optional[List[str]] = None) -> DataFrame:
+    """
+    Load a data file from its sidecar when fresh, otherwise parse the csv
+    :param csv_path:
+    :param columns: subset of columns to read
+    :return:
+    """
+    if is_fresh(csv_path):
+        return read_sidecar(csv_path, columns=columns)
+    return snapshot_schema.read_csv(csv_path, columns=columns)
+
+
+def backfill(data_dir: Path = DATA_DIR, force: bool = False) -> List[Path]:
+    """
+    Write sidecars for every archived data file that is missing one or has a stale one
+    :param data_dir:
+    :param force: rewrite fresh sidecars too
+    :return:
+    """
+    result = []
+
+    for csv_path in sorted(data_dir.glob(f'{DATA_FILE_STEM}_*.csv')):
+        if force or not is_fresh(csv_path):
+            result.append(write_sidecar(csv_path))
+            logging.info(f'Sidecar written: {result[-1].name}')
+
+    return result
+
+
+if __name__ == '__main__':
+    backfill()
@@ -0,0 +1,512 @@
+import argparse
+import json
+import logging
+import numpy as np
+import pandas as pd
+import sys
+import threading
+
+from collections import OrderedDict
+from pandas.core.frame import DataFrame
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core import PROJECT_ROOT
+from core import git_utils
+from core.instrumentation import instrument
+from fut_utils import DATA_DIR, STORE_DIR, DATA_FILE_STEM
+from fut_utils.fut_enums import FutAttr
+from fut_utils import snapshot_ingest
+from fut_utils import snapshot_schema
+from fut_utils import snapshot_sidecar
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+STORE_EXTENSION: str = '.npz'
+STORE_VERSION: int = 1
+KEYFRAME_INTERVAL: int = 7
+KEYFRAME_RATIO: float = 0.5
+KEYFRAME_CACHE_SIZE: int = 4
+META_KEY: str = '__meta__'
+ORDER_KEY: str = '__order__'
+STRINGS_KEY: str = '__strings__'
+ADDED_VALUES_KEY: str = '__added_values__'
+ADDED_CODES_KEY: str = '__added_codes__'
+CHANGES_KEY: str = '__changes__'
+KEYFRAME: str = 'keyframe'
+DELTA: str = 'delta'
+STRING_DTYPE: str = 'object'
+STRING_SEPARATOR: str = '\x00'
+FLOAT_DTYPE: str = 'float64'
+
+
+class Columns(NamedTuple):
+    """
+    Snapshot as plain column arrays while it is rebuilt
+    Numeric columns are held as int64, floats by their bit pattern, and string columns as object arrays
+    """
+    names: Tuple[str, ...]
+    dtypes: Tuple[str, ...]
+    arrays: Dict[str, np.ndarray]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.arrays[self.names[0]]) if self.names else 0
+
+    def is_string(self, column: str) -> bool:
+        return self.dtypes[self.names.index(column)] == STRING_DTYPE
+
+
+class StoreMeta(NamedTuple):
+    kind: str
+    parent: Optional[str]
+    columns: Tuple[str, ...]
+    dtypes: Tuple[str, ...]
+    source_hash: str
+    source_size: int
+    version: int = STORE_VERSION
+
+
+_keyframes: OrderedDict = OrderedDict()
+_keyframes_lock: threading.Lock = threading.Lock()
+
+
+def store_path(csv_path: Path, store_dir: Path = STORE_DIR) -> Path:
+    """
+    Location of the stored version of a data file
+    :param csv_path:
+    :param store_dir:
+    :return:
+    """
+    return store_dir.joinpath(f'{csv_path.stem}{STORE_EXTENSION}')
+
+
+def resolve(data_path: Path, store_dir: Path = STORE_DIR) -> Path:
+    """
+    File to read a snapshot from: the csv if it is present, otherwise its stored version
+    :param data_path:
+    :param store_dir:
+    :return:
+    """
+    if data_path.suffix == STORE_EXTENSION or data_path.exists():
+        return data_path
+
+    stored = store_path(data_path, store_dir=store_dir)
+    return stored if stored.exists() else data_path
+
+
+def snapshot_paths(data_dir: Path = DATA_DIR, store_dir: Path = STORE_DIR) -> List[Path]:
+    """
+    Every archived snapshot as a csv path in the data directory, whether it is present as a csv or only stored
+    :param data_dir:
+    :param store_dir:
+    :return:
+    """
+    stems = {x.stem for x in data_dir.glob(f'{DATA_FILE_STEM}_*.csv')}
+    stems.update(x.stem for x in store_dir.glob(f'{DATA_FILE_STEM}_*{STORE_EXTENSION}'))
+    return [data_dir.joinpath(f'{x}.csv') for x in sorted(stems)]
+
+
+def column_dtype(data: DataFrame, column: str) -> str:
+    """
+    Type a column is stored and rebuilt with, integers are as compact as in the sidecars
+    :param data:
+    :param column:
+    :return:
+    """
+    dtype = data[column].dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return np.dtype(snapshot_sidecar.SMALL_INT_COLUMNS.get(column, np.int64)).name
+    if pd.api.types.is_float_dtype(dtype):
+        return FLOAT_DTYPE
+    return STRING_DTYPE
+
+
+def to_columns(data: DataFrame) -> Columns:
+    """
+    Split a snapshot into plain column arrays
+    :param data:
+    :return:
+    """
+    names = tuple(data.columns)
+    dtypes = tuple(column_dtype(data, x) for x in names)
+    arrays = {}
+
+    for column, dtype in zip(names, dtypes):
+        if dtype == STRING_DTYPE:
+            arrays[column] = data[column].to_numpy(dtype=object)
+        elif dtype == FLOAT_DTYPE:
+            arrays[column] = data[column].to_numpy(dtype=np.float64).view(np.int64)
+        else:
+            arrays[column] = data[column].to_numpy(dtype=np.int64)
+
+    return Columns(names=names, dtypes=dtypes, arrays=arrays)
+
+
+def to_frame(columns: Columns, names: Optional[Sequence[str]] = None) -> DataFrame:
+    """
+    Build the snapshot from its column arrays
+    :param columns:
+    :param names: subset of columns to build
+    :return:
+    """
+    result = {}
+
+    for column, dtype in zip(columns.names, columns.dtypes):
+        if names is not None and column not in names:
+            continue
+
+        values = columns.arrays[column]
+
+        if dtype == FLOAT_DTYPE:
+            result[column] = values.view(np.float64)
+        elif dtype == STRING_DTYPE:
+            result[column] = values
+        else:
+            result[column] = values.astype(dtype)
+
+    return DataFrame(result)
+
+
+def normalize(data: DataFrame) -> DataFrame:
+    """
+    Snapshot with the column types a stored snapshot is rebuilt with
+    :param data:
+    :return:
+    """
+    return to_frame(to_columns(data))
+
+
+def _row_keys(ids: np.ndarray) -> pd.MultiIndex:
+    """
+    Unique key of each row: the Id plus its occurrence, as an Id appears once per location
+    :param ids:
+    :return:
+    """
+    occurrence = pd.Series(ids).groupby(ids, sort=False).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([ids, occurrence])
+
+
+def _string_table(values: List[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Dictionary encode several string arrays against one shared table
+    The table is stored as utf-8 bytes separated by STRING_SEPARATOR, far smaller than a fixed width unicode array
+    :param values:
+    :return: table bytes, codes of each array (-1 for missing values)
+    """
+    if not values:
+        return np.array([], dtype=np.uint8), []
+
+    codes, table = pd.factorize(np.concatenate(values))
+    splits = np.cumsum([len(x) for x in values])[:-1]
+    encoded = STRING_SEPARATOR.join(str(x) for x in table).encode()
+    return np.frombuffer(encoded, dtype=np.uint8), np.split(codes.astype(np.int32), splits)
+
+
+def _lookup(table: np.ndarray) -> np.ndarray:
+    """
+    Object array of a string table with a trailing NaN so that code -1 maps to a missing value
+    :param table: table bytes
+    :return:
+    """
+    strings = table.tobytes().decode().split(STRING_SEPARATOR) if len(table) else []
+    return np.array(strings + [np.nan], dtype=object)
+
+
+def encode_delta(base: Optional[Columns], new: Columns) -> Optional[dict]:
+    """
+    Changes from a keyframe to a snapshot keyed on Id: the row order, the added rows and the changed fields
+    Without a base every row is added, which is how a keyframe itself is stored
+    Changes are held as one (row, column, value) array, string values as codes into the string table
+    :param base: keyframe snapshot
+    :param new: snapshot
+    :return: arrays, or None if the columns differ from the keyframe
+    """
+    if base is not None and (base.names, base.dtypes) != (new.names, new.dtypes):
+        return None
+
+    ids = new.arrays[FutAttr.id.value]
+    parent_index = np.full(len(ids), -1) if base is None else \
+        _row_keys(base.arrays[FutAttr.id.value]).get_indexer(_row_keys(ids))
+    added = parent_index < 0
+    order = parent_index.astype(np.int32)
+    order[added] = -1 - np.arange(int(added.sum()), dtype=np.int32)
+    matched_rows = np.flatnonzero(~added)
+    parent_rows = parent_index[matched_rows]
+    numeric = [x for x in new.names if not new.is_string(x)]
+    strings = [x for x in new.names if new.is_string(x)]
+    changes: List[Tuple[int, np.ndarray, np.ndarray]] = []
+
+    for index, column in enumerate(new.names if base is not None else ()):
+        old_values = base.arrays[column][parent_rows]
+        new_values = new.arrays[column][matched_rows]
+        changed = ~((old_values == new_values) | (pd.isna(old_values) & pd.isna(new_values)))
+
+        if changed.any():
+            changes.append((index, matched_rows[changed], new_values[changed]))
+
+    string_changes = [values for index, _, values in changes if new.is_string(new.names[index])]
+    table, codes = _string_table([new.arrays[x][added] for x in strings] + string_changes)
+    added_codes, changed_codes = codes[:len(strings)], iter(codes[len(strings):])
+    change_arrays = [np.stack([rows, np.full(len(rows), index),
+                               next(changed_codes) if new.is_string(new.names[index]) else values]).astype(np.int64)
+                     for index, rows, values in changes]
+
+    return {
+        ORDER_KEY: order,
+        STRINGS_KEY: table,
+        ADDED_VALUES_KEY: np.column_stack([new.arrays[x][added] for x in numeric] or
+                                          [np.empty(int(added.sum()), dtype=np.int64)])[:, :len(numeric)],
+        ADDED_CODES_KEY: np.column_stack(added_codes or [np.empty(int(added.sum()), dtype=np.int32)])[:, :len(strings)],
+        CHANGES_KEY: np.concatenate(change_arrays, axis=1) if change_arrays else np.empty((3, 0), dtype=np.int64),
+    }
+
+
+def apply_delta(base: Optional[Columns], meta: StoreMeta, arrays) -> Columns:
+    """
+    Rebuild a snapshot from its keyframe and a delta, or a keyframe from its own arrays
+    :param base: rebuilt keyframe
+    :param meta:
+    :param arrays: delta arrays
+    :return:
+    """
+    order = arrays[ORDER_KEY].astype(np.intp)
+    take = np.where(order >= 0, order, (base.row_count if base is not None else 0) - 1 - order)
+    strings = _lookup(arrays[STRINGS_KEY])
+    added_values, added_codes = arrays[ADDED_VALUES_KEY], arrays[ADDED_CODES_KEY]
+    changed_rows, changed_columns, changed_values = arrays[CHANGES_KEY]
+    result, numeric_index, string_index = {}, 0, 0
+
+    for index, (column, dtype) in enumerate(zip(meta.columns, meta.dtypes)):
+        if dtype == STRING_DTYPE:
+            added = strings[added_codes[:, string_index]]
+            string_index += 1
+        else:
+            added = added_values[:, numeric_index]
+            numeric_index += 1
+
+        values = np.concatenate([base.arrays[column], added])[take] if base is not None else added[take]
+        changed = changed_columns == index
+
+        if changed.any():
+            values[changed_rows[changed]] = strings[changed_values[changed]] if dtype == STRING_DTYPE else \
+                changed_values[changed]
+
+        result[column] = values
+
+    return Columns(names=meta.columns, dtypes=meta.dtypes, arrays=result)
+
+
+def _write(path: Path, meta: StoreMeta, arrays: dict):
+    """
+    Write compressed arrays and their metadata through a temporary file
+    :param path:
+    :param meta:
+    :param arrays:
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f'.tmp{STORE_EXTENSION}')
+    np.savez_compressed(temp_path.as_posix(), **arrays, **{META_KEY: np.array(json.dumps(meta._asdict()))})
+    temp_path.replace(path)
+
+
+def _read(path: Path) -> Tuple[StoreMeta, dict]:
+    """
+    Metadata and arrays of a stored snapshot
+    :param path:
+    :return:
+    """
+    with np.load(path.as_posix()) as arrays:
+        meta = read_meta(arrays)
+        return meta, {key: arrays[key] for key in arrays.files if key != META_KEY}
+
+
+def read_meta(arrays) -> StoreMeta:
+    """
+    Metadata of a stored snapshot, read without loading its arrays
+    :param arrays: opened npz file
+    :return:
+    """
+    meta = json.loads(str(arrays[META_KEY]))
+    return StoreMeta(**{**meta, 'columns': tuple(meta['columns']), 'dtypes': tuple(meta['dtypes'])})
+
+
+def _cache_key(path: Path) -> tuple:
+    stat = path.stat()
+    return path.resolve().as_posix(), stat.st_mtime_ns, stat.st_size
+
+
+def _cached_keyframe(key: tuple) -> Optional[Columns]:
+    with _keyframes_lock:
+        if key in _keyframes:
+            _keyframes.move_to_end(key)
+        return _keyframes.get(key)
+
+
+def _cache_keyframe(key: tuple, columns: Columns):
+    with _keyframes_lock:
+        _keyframes[key] = columns
+
+        while len(_keyframes) > KEYFRAME_CACHE_SIZE:
+            _keyframes.popitem(last=False)
+
+
+def read_columns(path: Path) -> Columns:
+    """
+    Rebuild the column arrays of a stored snapshot: its keyframe plus at most one delta
+    The most recent keyframes are kept in memory as every delta after them needs them
+    :param path: stored snapshot
+    :return:
+    """
+    key = _cache_key(path)
+    columns = _cached_keyframe(key)
+
+    if columns is not None:
+        return columns
+
+    meta, arrays = _read(path)
+
+    if meta.kind == KEYFRAME:
+        columns = apply_delta(None, meta, arrays)
+        _cache_keyframe(key, columns)
+        return columns
+
+    base = read_columns(path.with_name(f'{meta.parent}{STORE_EXTENSION}'))
+    return apply_delta(base, meta, arrays)
+
+
+@instrument
+def read_snapshot(path: Path, columns: Optional[Sequence[str]] = None) -> DataFrame:
+    """
+    Rebuild a stored snapshot
+    :param path: stored snapshot
+    :param columns: subset of columns to build
+    :return:
+    """
+    return to_frame(read_columns(path), names=columns)
+
+
+def load(data_path: Path, columns: Optional[Sequence[str]] = None) -> DataFrame:
+    """
+    Load a snapshot from its csv, sidecar or stored version, whichever is available, with the compact column types
+    :param data_path: csv path or stored snapshot
+    :param columns: subset of columns to load, every column by default
+    :return:
+    """
+    path = resolve(data_path)
+
+    if path.suffix == STORE_EXTENSION:
+        return snapshot_schema.compact(read_snapshot(path, columns=columns))
+    return snapshot_schema.compact(snapshot_sidecar.load_snapshot(path, columns=None if columns is None else
+                                                                  list(columns)))
+
+
+def find_identical(content_hash: str, size: int, store_dir: Path = STORE_DIR) -> Optional[Path]:
+    """
+    Stored snapshot written from a csv with the same content
+    :param content_hash:
+    :param size:
+    :param store_dir:
+    :return:
+    """
+    for path in sorted(store_dir.glob(f'{DATA_FILE_STEM}_*{STORE_EXTENSION}'), reverse=True):
+        with np.load(path.as_posix()) as arrays:
+            meta = read_meta(arrays)
+
+        if meta.source_size == size and meta.source_hash == content_hash:
+            return path
+
+    return None
+
+
+def _last_keyframe(stored: List[Path]) -> Tuple[Optional[Path], int]:
+    """
+    Keyframe that new deltas are written against and the number of deltas already written against it
+    :param stored: stored snapshots in date order
+    :return:
+    """
+    if not stored:
+        return None, 0
+
+    with np.load(stored[-1].as_posix()) as arrays:
+        meta = read_meta(arrays)
+
+    keyframe = stored[-1] if meta.kind == KEYFRAME else stored[-1].with_name(f'{meta.parent}{STORE_EXTENSION}')
+    return keyframe, len([x for x in stored if x.stem > keyframe.stem])
+
+
+@instrument
+def pack(data_dir: Path = DATA_DIR, store_dir: Path = STORE_DIR, remove_csv: bool = False) -> List[Path]:
+    """
+    Store the archived data files as keyframes plus deltas against the latest keyframe, one file per snapshot
+    Any snapshot is rebuilt from two files, a new keyframe is written every KEYFRAME_INTERVAL snapshots
+    or when a delta would touch most of the rows
+    Every stored snapshot is rebuilt and compared with its csv before the csv may be removed
+    Snapshots already stored are kept and only newer data files are added
+    :param data_dir:
+    :param store_dir:
+    :param remove_csv: delete each data file once it is stored and verified
+    :return: stored snapshots written
+    """
+    stored = sorted(store_dir.glob(f'{DATA_FILE_STEM}_*{STORE_EXTENSION}'))
+    csv_paths = [x for x in sorted(data_dir.glob(f'{DATA_FILE_STEM}_*.csv')) if not stored or x.stem > stored[-1].stem]
+    keyframe_path, since_keyframe = _last_keyframe(stored)
+    keyframe: Optional[Columns] = read_columns(keyframe_path) if keyframe_path is not None else None
+    result = []
+
+    for csv_path in csv_paths:
+        columns = to_columns(pd.read_csv(csv_path.as_posix()))
+        arrays = None
+
+        if keyframe is not None and since_keyframe < KEYFRAME_INTERVAL - 1:
+            arrays = encode_delta(keyframe, columns)
+
+            if arrays is not None:
+                touched = np.count_nonzero(arrays[ORDER_KEY] < 0) + len(np.unique(arrays[CHANGES_KEY][0]))
+                arrays = arrays if touched <= KEYFRAME_RATIO * columns.row_count else None
+
+        kind = DELTA if arrays is not None else KEYFRAME
+        meta = StoreMeta(kind=kind, parent=keyframe_path.stem if kind == DELTA else None, columns=columns.names,
+                         dtypes=columns.dtypes, source_hash=snapshot_ingest.file_hash(csv_path),
+                         source_size=csv_path.stat().st_size)
+        path = store_path(csv_path, store_dir=store_dir)
+        _write(path, meta, arrays if arrays is not None else encode_delta(None, columns))
+
+        if not read_snapshot(path).equals(to_frame(columns)):
+            path.unlink()
+            raise ValueError(f'Stored snapshot does not match {csv_path.name}')
+
+        if kind == KEYFRAME:
+            keyframe_path, keyframe, since_keyframe = path, columns, 0
+        else:
+            since_keyframe += 1
+
+        if remove_csv:
+            csv_path.unlink()
+
+        logging.info(f'Stored {path.name} as {kind}')
+        result.append(path)
+
+    return result
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Store the archived data files as keyframes plus deltas')
+    parser.add_argument('--remove-csv', action='store_true', help='delete each data file once stored and verified')
+    parser.add_argument('--no-stage', action='store_true', help='do not add the stored snapshots to the changelist')
+    options = parser.parse_args(args)
+    result = pack(remove_csv=options.remove_csv)
+
+    if result and not options.no_stage:
+        git_utils.git_manager().add_many([x.relative_to(PROJECT_ROOT) for x in result])
+
+    print(f'{len(result)} snapshots stored')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from pandas.core.frame import DataFrame
+from typing import NamedTuple
+
+from fut_utils.fut_enums import FutAttr, Rarity
+
+GOLD_MIN: int = 75
+SILVER_MIN: int = 65
+TOTS_RARITIES: tuple = (Rarity.tots.value, Rarity.tots_moments.value)
+SUMMARY_COLUMNS: tuple = (FutAttr.rating.value, FutAttr.rarity.value)
+FUTTIES_RARITIES: tuple = (Rarity.futties.value, Rarity.futties_premium.value, Rarity.futties_hero.value,
+                           Rarity.futties_icon.value)
+
+
+class SnapshotSummary(NamedTuple):
+    player_count: int
+    total_rating: int
+    mean_rating: float
+    median_rating: int
+    mode_rating: int
+    num_gold: int
+    num_silver: int
+    num_bronze: int
+    num_totw: int
+    num_tots: int
+    num_futties: int
+
+    @classmethod
+    def from_data(cls, data: DataFrame) -> 'SnapshotSummary':
+        """
+        Compute every summary value in one pass over the Rating and Rarity columns
+        :param data: DataFrame
+        :return:
+        """
+        ratings = data[FutAttr.rating.value].to_numpy(dtype=np.int64)
+        rating_counts = np.bincount(ratings, minlength=GOLD_MIN + 1)
+        return cls.from_counts(rating_counts, data[FutAttr.rarity.value].value_counts().to_dict())
+
+    @classmethod
+    def from_counts(cls, rating_counts: np.ndarray, rarity_counts: dict) -> 'SnapshotSummary':
+        """
+        Summary of a snapshot from its number of cards per rating and per rarity
+        :param rating_counts: count of each rating, indexed by rating
+        :param rarity_counts: {rarity: count}
+        :return:
+        """
+        rating_counts = np.pad(rating_counts, (0, max(GOLD_MIN + 1 - len(rating_counts), 0)))
+        player_count = int(rating_counts.sum())
+        total_rating = int(rating_counts @ np.arange(len(rating_counts)))
+        cumulative = np.cumsum(rating_counts)
+        lower, upper = np.searchsorted(cumulative, [(player_count - 1) // 2 + 1, player_count // 2 + 1])
+
+        return cls(
+            player_count=player_count,
+            total_rating=total_rating,
+            mean_rating=total_rating / player_count if player_count else 0.0,
+            median_rating=int((lower + upper) / 2),
+            mode_rating=int(rating_counts.argmax()),
+            num_gold=int(rating_counts[GOLD_MIN:].sum()),
+            num_silver=int(rating_counts[SILVER_MIN:GOLD_MIN].sum()),
+            num_bronze=int(rating_counts[:SILVER_MIN].sum()),
+            num_totw=int(rarity_counts.get(Rarity.totw.value, 0)),
+            num_tots=int(sum(rarity_counts.get(x, 0) for x in TOTS_RARITIES)),
+            num_futties=int(sum(rarity_counts.get(x, 0) for x in FUTTIES_RARITIES)),
+        )
+
+
+def grouped_summaries(groups: np.ndarray, ratings: np.ndarray, rarities: np.ndarray, group_count: int) -> list:
+    """
+    Summaries of several snapshots held in one table, counted in a single pass
+    Ratings and rarities are counted per group with one bincount each over the whole table
+    :param groups: group number of each row, 0 to group_count - 1
+    :param ratings: rating of each row
+    :param rarities: rarity of each row
+    :param group_count:
+    :return: one SnapshotSummary per group
+    """
+    ratings = ratings.astype(np.int64)
+    width = max(int(ratings.max()) + 1 if len(ratings) else 0, GOLD_MIN + 1)
+    rating_counts = np.bincount(groups * width + ratings, minlength=group_count * width).reshape(group_count, width)
+    rarity_codes, rarity_names = pd.factorize(rarities, use_na_sentinel=False)
+    rarity_counts = np.bincount(groups * len(rarity_names) + rarity_codes,
+                                minlength=group_count * len(rarity_names)).reshape(group_count, len(rarity_names))
+    return [SnapshotSummary.from_counts(rating_counts[x], dict(zip(rarity_names, rarity_counts[x].tolist())))
+            for x in range(group_count)]
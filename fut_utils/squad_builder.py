@@ -0,0 +1,518 @@
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+import sys
+
+from pandas.core.frame import DataFrame
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.lazy_import import lazy_import
+from fut_utils import POSITION_DICT
+from fut_utils.fut_enums import FutAttr, League
+
+fut_manager = lazy_import('fut_utils.fut_manager')
+sbc_solver = lazy_import('fut_utils.sbc_solver')
+
+logging.basicConfig()
+logging.getLogger().setLevel(logging.INFO)
+
+Formation = Tuple[int, ...]
+
+FORMATIONS: Dict[str, Formation] = {
+    '4-4-2': (0, 3, 5, 5, 7, 12, 14, 14, 16, 25, 25),
+    '4-3-3': (0, 3, 5, 5, 7, 14, 14, 14, 23, 25, 27),
+    '4-2-3-1': (0, 3, 5, 5, 7, 10, 10, 12, 18, 16, 25),
+    '4-1-2-1-2': (0, 3, 5, 5, 7, 10, 14, 14, 18, 25, 25),
+    '3-5-2': (0, 5, 5, 5, 10, 10, 12, 18, 16, 25, 25),
+    '5-3-2': (0, 2, 5, 5, 5, 8, 14, 14, 14, 25, 25),
+}
+BASE_ID_MODULUS: int = 2**24
+CLUB_THRESHOLDS: np.ndarray = np.array([2, 5, 7])
+LEAGUE_THRESHOLDS: np.ndarray = np.array([3, 5, 8])
+NATION_THRESHOLDS: np.ndarray = np.array([2, 5, 8])
+MAX_CHEMISTRY: int = 3
+ICON_NATION_WEIGHT: int = 2
+CHEMISTRY_WEIGHT: float = 1.0
+CANDIDATES_PER_POSITION: int = 24
+SEED_GROUPS: int = 8
+SEED_BONUS: float = 10.0
+MAX_ITERATIONS: int = 50
+MAX_NODES: int = 2_000
+SLOT: str = 'Slot'
+PLAYER_CHEMISTRY: str = 'Chemistry Points'
+
+
+class Squad(NamedTuple):
+    formation: Formation
+    players: DataFrame
+    total_rating: int
+    chemistry: int
+    score: float
+    proven: bool
+
+
+class CandidatePool(NamedTuple):
+    rows: np.ndarray
+    ratings: np.ndarray
+    base_ids: np.ndarray
+    clubs: np.ndarray
+    leagues: np.ndarray
+    nations: np.ndarray
+    icons: np.ndarray
+
+
+def base_ids(ids: np.ndarray) -> np.ndarray:
+    """
+    Player id shared by every version of a card, special versions add multiples of 2**24 to it
+    :param ids:
+    :return:
+    """
+    return ids % BASE_ID_MODULUS
+
+
+def chemistry_points(clubs: np.ndarray, leagues: np.ndarray, nations: np.ndarray, icons: np.ndarray) -> np.ndarray:
+    """
+    Chemistry of every player of one or more elevens from the Club, League and Country links within each eleven
+    Club, league and nation counts earn a point at each threshold, capped at MAX_CHEMISTRY per player
+    Icons always have full chemistry and count twice towards their nation but not towards a club or league
+    :param clubs: (..., 11) codes
+    :param leagues: (..., 11) codes
+    :param nations: (..., 11) codes
+    :param icons: (..., 11) bool
+    :return: (..., 11) points
+    """
+    counted = ~icons[..., None, :]
+    club_counts = ((clubs[..., :, None] == clubs[..., None, :]) & counted).sum(-1)
+    league_counts = ((leagues[..., :, None] == leagues[..., None, :]) & counted).sum(-1)
+    nation_weights = np.where(icons, ICON_NATION_WEIGHT, 1)[..., None, :]
+    nation_counts = ((nations[..., :, None] == nations[..., None, :]) * nation_weights).sum(-1)
+    points = (club_counts[..., None] >= CLUB_THRESHOLDS).sum(-1) + \
+        (league_counts[..., None] >= LEAGUE_THRESHOLDS).sum(-1) + \
+        (nation_counts[..., None] >= NATION_THRESHOLDS).sum(-1)
+    return np.where(icons, MAX_CHEMISTRY, np.minimum(points, MAX_CHEMISTRY))
+
+
+def candidate_pools(data: DataFrame, formation: Formation,
+                    candidates_per_position: int = CANDIDATES_PER_POSITION) -> Dict[int, CandidatePool]:
+    """
+    Best cards of each position in the formation, one card per player
+    Only the top cards of a position can be part of a strong eleven, so the search never sees the rest of the club
+    :param data:
+    :param formation:
+    :param candidates_per_position: cards kept per position, on top of the number of slots of the position
+    :return: {position code: CandidatePool}
+    """
+    positions = data[FutAttr.position.value].to_numpy()
+    ratings = data[FutAttr.rating.value].to_numpy(dtype=np.int64)
+    player_ids = base_ids(data[FutAttr.id.value].to_numpy(dtype=np.int64))
+    codes = {x: pd.factorize(data[x.value], use_na_sentinel=False)[0] for x in
+             (FutAttr.club, FutAttr.league, FutAttr.country)}
+    icons = (data[FutAttr.league.value] == League.icons.value).to_numpy()
+    result = {}
+
+    for position in sorted(set(formation)):
+        rows = np.flatnonzero(positions == position)
+        rows = rows[np.argsort(-ratings[rows], kind='stable')]
+        rows = rows[np.unique(player_ids[rows], return_index=True)[1]]
+        rows = rows[np.argsort(-ratings[rows], kind='stable')][:candidates_per_position + formation.count(position)]
+        result[position] = CandidatePool(rows=rows, ratings=ratings[rows], base_ids=player_ids[rows],
+                                         clubs=codes[FutAttr.club][rows], leagues=codes[FutAttr.league][rows],
+                                         nations=codes[FutAttr.country][rows], icons=icons[rows])
+
+    return result
+
+
+class _Search:
+    def __init__(self, formation: Formation, pools: Dict[int, CandidatePool], chemistry_weight: float):
+        """
+        Local search over elevens, each slot holding an index into the candidates of its position
+        :param formation:
+        :param pools:
+        :param chemistry_weight: rating points per chemistry point
+        """
+        self.formation: Formation = formation
+        self.pools: List[CandidatePool] = [pools[x] for x in formation]
+        self.chemistry_weight: float = chemistry_weight
+        self.order: List[int] = sorted(range(len(formation)), key=lambda x: len(self.pools[x].rows))
+
+    def attributes(self, picks: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Rating, base id, club, league, nation and icon flag of each slot
+        :param picks:
+        :return:
+        """
+        return tuple(np.array([getattr(pool, name)[pick] for pool, pick in zip(self.pools, picks)])
+                     for name in ('ratings', 'base_ids', 'clubs', 'leagues', 'nations', 'icons'))
+
+    def score(self, picks: np.ndarray) -> float:
+        ratings, _, clubs, leagues, nations, icons = self.attributes(picks)
+        return float(ratings.sum() + self.chemistry_weight * chemistry_points(clubs, leagues, nations, icons).sum())
+
+    def seed(self, bonus: Optional[Tuple[str, int]] = None) -> Optional[np.ndarray]:
+        """
+        Greedy eleven filling the tightest positions first, optionally favouring one club, league or nation
+        :param bonus: (pool attribute, code) earning SEED_BONUS
+        :return: picks, None if a position has too few players
+        """
+        picks = np.full(len(self.formation), -1)
+        used = set()
+
+        for slot in self.order:
+            pool = self.pools[slot]
+            value = pool.ratings.astype(float)
+
+            if bonus is not None:
+                value = value + SEED_BONUS * (getattr(pool, bonus[0]) == bonus[1])
+
+            value[np.isin(pool.base_ids, list(used))] = -np.inf
+
+            if not len(value) or np.isneginf(value.max()):
+                return None
+
+            picks[slot] = int(value.argmax())
+            used.add(pool.base_ids[picks[slot]])
+
+        return picks
+
+    def improve(self, picks: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Steepest ascent over single slot replacements, each slot scoring all of its candidates at once
+        :param picks:
+        :return: picks, score
+        """
+        best_score = self.score(picks)
+
+        for _ in range(MAX_ITERATIONS):
+            ratings, player_ids, clubs, leagues, nations, icons = self.attributes(picks)
+            best_move = None
+
+            for slot, pool in enumerate(self.pools):
+                count = len(pool.rows)
+                others = np.delete(player_ids, slot)
+                matrices = []
+
+                for values, candidates in ((clubs, pool.clubs), (leagues, pool.leagues), (nations, pool.nations),
+                                           (icons, pool.icons)):
+                    matrix = np.repeat(values[None, :], count, axis=0)
+                    matrix[:, slot] = candidates
+                    matrices.append(matrix)
+
+                chemistry = chemistry_points(*matrices).sum(-1)
+                scores = (ratings.sum() - ratings[slot] + pool.ratings + self.chemistry_weight * chemistry).astype(float)
+                scores[np.isin(pool.base_ids, others)] = -np.inf
+                candidate = int(scores.argmax())
+
+                if scores[candidate] > best_score + 1e-9 and (best_move is None or scores[candidate] > best_move[2]):
+                    best_move = (slot, candidate, scores[candidate])
+
+            if best_move is None:
+                break
+
+            picks = picks.copy()
+            picks[best_move[0]] = best_move[1]
+            best_score = best_move[2]
+
+        return picks, best_score
+
+    def seeds(self) -> List[Optional[Tuple[str, int]]]:
+        """
+        Pure rating plus the clubs, leagues and nations most common among the candidates
+        :return:
+        """
+        result: List[Optional[Tuple[str, int]]] = [None]
+
+        for name in ('leagues', 'nations', 'clubs'):
+            values = np.concatenate([getattr(pool, name) for pool in self.pools])
+            unique, counts = np.unique(values, return_counts=True)
+            result.extend((name, int(x)) for x in unique[np.argsort(-counts, kind='stable')][:SEED_GROUPS])
+
+        return result
+
+
+def rating_assignment(formation: Formation, pools: Dict[int, CandidatePool]) -> Optional[np.ndarray]:
+    """
+    Highest rated eleven of the candidates, each player at most once even when their versions cover several positions
+    Solved exactly as an assignment of slots to players
+    :param formation:
+    :param pools: candidate_pools
+    :return: index of the pick of each slot in the pool of its position, None if the club cannot fill the formation
+    """
+    players = np.unique(np.concatenate([pools[x].base_ids for x in formation]))
+
+    if len(players) < len(formation):
+        return None
+
+    unavailable = 1.0 + float(sum(pools[x].ratings.sum() for x in set(formation)))
+    costs = np.full((len(formation), len(players)), unavailable)
+
+    for slot, position in enumerate(formation):
+        costs[slot, np.searchsorted(players, pools[position].base_ids)] = -pools[position].ratings
+
+    columns = sbc_solver.min_cost_assignment(costs)
+
+    if (costs[np.arange(len(formation)), columns] >= unavailable).any():
+        return None
+    return np.array([int(np.flatnonzero(pools[position].base_ids == players[column])[0])
+                     for position, column in zip(formation, columns)])
+
+
+def _points_table(thresholds: np.ndarray, size: int) -> List[int]:
+    """
+    Chemistry points earned by each link count up to size
+    :param thresholds:
+    :param size:
+    :return:
+    """
+    return (np.arange(size + 1)[:, None] >= thresholds).sum(-1).tolist()
+
+
+class _BranchAndBound:
+    def __init__(self, formation: Formation, pools: Dict[int, CandidatePool], chemistry_weight: float, score: float,
+                 max_nodes: int = MAX_NODES):
+        """
+        Depth first search over elevens, one slot per level, the tightest positions first and candidates best rated
+        first, so the first elevens found are strong and the bound cuts most of the tree
+        Candidates rated too low to beat the known score even with full chemistry and the best of every other slot are
+        dropped up front, which also narrows the links the open slots can offer
+        Pools are sorted best rated first, so this keeps a prefix of each and picks index the pools unchanged
+        The bound adds the best rating left in each open slot to the most chemistry the eleven could still reach:
+        every open slot and icon at MAX_CHEMISTRY, every other player as if each open slot offering a card of
+        their club, league or nation took it
+        Slots of the same position take their candidates in increasing order, so no eleven is visited twice
+        :param formation:
+        :param pools:
+        :param chemistry_weight: rating points per chemistry point
+        :param score: score of a known eleven
+        :param max_nodes: nodes visited before giving up on proving the best eleven
+        """
+        ceiling = sum(int(pools[x].ratings.max(initial=0)) for x in formation) + \
+            chemistry_weight * MAX_CHEMISTRY * len(formation)
+        pools = {position: CandidatePool(*(x[pool.ratings > pool.ratings.max(initial=0) - (ceiling - score)]
+                                           for x in pool)) for position, pool in pools.items()}
+        self.order: List[int] = sorted(range(len(formation)), key=lambda x: (len(pools[formation[x]].rows),
+                                                                             formation[x]))
+        ordered = [pools[formation[x]] for x in self.order]
+        self.candidates: List[list] = [list(zip(*(getattr(pool, name).tolist() for name in
+                                                  ('ratings', 'base_ids', 'clubs', 'leagues', 'nations', 'icons'))))
+                                       for pool in ordered]
+        self.same_position: List[bool] = [depth > 0 and formation[x] == formation[self.order[depth - 1]]
+                                          for depth, x in enumerate(self.order)]
+        best_ratings = [int(pool.ratings.max(initial=0)) for pool in ordered]
+        self.rest: List[int] = [sum(best_ratings[depth:]) for depth in range(len(formation) + 1)]
+        self.offered: List[Tuple[Dict[int, int], ...]] = [self._offered(ordered[depth:])
+                                                          for depth in range(len(formation) + 1)]
+        size = 2 * ICON_NATION_WEIGHT * len(formation)
+        self.points: Tuple[List[int], ...] = tuple(_points_table(x, size) for x in
+                                                   (CLUB_THRESHOLDS, LEAGUE_THRESHOLDS, NATION_THRESHOLDS))
+        self.chemistry_weight: float = chemistry_weight
+        self.max_nodes: int = max_nodes
+        self.nodes: int = 0
+        self.picked: List[int] = []
+        self.players: List[tuple] = []
+        self.counts: Tuple[Dict[int, int], ...] = ({}, {}, {})
+        self.best_score: float = score
+        self.best_picks: List[int] = []
+
+    @staticmethod
+    def _offered(pools: List[CandidatePool]) -> Tuple[Dict[int, int], ...]:
+        """
+        Most links each club, league and nation can still gain from the open slots
+        Icons link to nations only, counting ICON_NATION_WEIGHT times
+        :param pools: candidates of the open slots
+        :return: ({club: links}, {league: links}, {nation: links})
+        """
+        result: Tuple[Dict[int, int], ...] = ({}, {}, {})
+
+        for pool in pools:
+            players = ~pool.icons
+            nations = {x: 1 for x in pool.nations[players].tolist()}
+            nations.update((x, ICON_NATION_WEIGHT) for x in pool.nations[pool.icons].tolist())
+
+            for links, codes in zip(result, ({x: 1 for x in pool.clubs[players].tolist()},
+                                             {x: 1 for x in pool.leagues[players].tolist()}, nations)):
+                for code, weight in codes.items():
+                    links[code] = links.get(code, 0) + weight
+
+        return result
+
+    def _add(self, candidate: tuple, sign: int):
+        _, _, club, league, nation, icon = candidate
+        club_counts, league_counts, nation_counts = self.counts
+
+        if not icon:
+            club_counts[club] = club_counts.get(club, 0) + sign
+            league_counts[league] = league_counts.get(league, 0) + sign
+
+        nation_counts[nation] = nation_counts.get(nation, 0) + sign * (ICON_NATION_WEIGHT if icon else 1)
+
+    def chemistry_bound(self, depth: int) -> int:
+        """
+        Most chemistry the eleven can reach with the slots from depth on open, its exact chemistry once complete
+        :param depth:
+        :return:
+        """
+        club_counts, league_counts, nation_counts = self.counts
+        club_offered, league_offered, nation_offered = self.offered[depth]
+        club_points, league_points, nation_points = self.points
+        total = MAX_CHEMISTRY * (len(self.order) - depth)
+
+        for _, _, club, league, nation, icon in self.players:
+            if icon:
+                total += MAX_CHEMISTRY
+                continue
+
+            points = club_points[club_counts[club] + club_offered.get(club, 0)]
+
+            if points < MAX_CHEMISTRY:
+                points += league_points[league_counts[league] + league_offered.get(league, 0)]
+
+                if points < MAX_CHEMISTRY:
+                    points += nation_points[nation_counts[nation] + nation_offered.get(nation, 0)]
+
+            total += min(points, MAX_CHEMISTRY)
+
+        return total
+
+    def run(self) -> Tuple[Optional[np.ndarray], bool]:
+        """
+        Search for an eleven beating the known score
+        :return: picks in formation order, None if none was found, and True if the search finished, so that no
+            eleven scores higher
+        """
+        complete = self._search(0, 0)
+
+        if not self.best_picks:
+            return None, complete
+
+        result = np.zeros(len(self.order), dtype=int)
+        result[self.order] = self.best_picks
+        return result, complete
+
+    def _search(self, depth: int, rating: int) -> bool:
+        """
+        :return: False if the node budget ran out
+        """
+        self.nodes += 1
+
+        if self.nodes > self.max_nodes:
+            return False
+
+        if depth == len(self.order):
+            score = rating + self.chemistry_weight * self.chemistry_bound(depth)
+
+            if score > self.best_score + 1e-9:
+                self.best_score, self.best_picks = score, list(self.picked)
+            return True
+
+        ceiling = rating + self.rest[depth + 1] + self.chemistry_weight * self.chemistry_bound(depth)
+        used = {x[1] for x in self.players}
+        start = self.picked[-1] + 1 if self.same_position[depth] else 0
+
+        for index in range(start, len(self.candidates[depth])):
+            candidate = self.candidates[depth][index]
+
+            if ceiling + candidate[0] <= self.best_score + 1e-9:
+                break
+
+            if candidate[1] in used:
+                continue
+
+            self.picked.append(index)
+            self.players.append(candidate)
+            self._add(candidate, 1)
+            bound = rating + candidate[0] + self.rest[depth + 1] + \
+                self.chemistry_weight * self.chemistry_bound(depth + 1)
+            complete = bound <= self.best_score + 1e-9 or self._search(depth + 1, rating + candidate[0])
+            self._add(candidate, -1)
+            self.players.pop()
+            self.picked.pop()
+
+            if not complete:
+                return False
+
+        return True
+
+
+def best_xi(data: DataFrame, formation: Sequence[int], chemistry_weight: float = CHEMISTRY_WEIGHT,
+            candidates_per_position: int = CANDIDATES_PER_POSITION) -> Optional[Squad]:
+    """
+    Highest scoring eleven for a formation, scored as total rating plus weighted chemistry
+    Candidates are pre-grouped by position and cut to the best of each. The highest rated eleven is solved exactly as
+    an assignment. With chemistry, it and greedy elevens built around the most common leagues, nations and clubs are
+    improved by vectorized single slot replacements, and the best of them starts a branch and bound over the
+    candidates which proves it or finds a better eleven
+    :param data:
+    :param formation: eleven POSITION_DICT codes
+    :param chemistry_weight: rating points per chemistry point
+    :param candidates_per_position:
+    :return: None if the club cannot fill the formation, Squad.proven is False if the branch and bound ran out of
+        nodes and the eleven is the best found
+    """
+    formation = tuple(formation)
+    unknown = [x for x in formation if x not in POSITION_DICT]
+
+    if len(formation) != 11 or unknown:
+        raise ValueError(f'Formation needs eleven known positions, got {formation}')
+
+    chemistry_weight = float(chemistry_weight)
+    pools = candidate_pools(data, formation, candidates_per_position)
+    best_picks = rating_assignment(formation, pools)
+
+    if best_picks is None:
+        return None
+
+    search = _Search(formation, pools, chemistry_weight)
+    best_score, proven = search.score(best_picks), True
+
+    if chemistry_weight:
+        best_picks, best_score = search.improve(best_picks)
+
+        for bonus in search.seeds():
+            picks = search.seed(bonus)
+
+            if picks is not None:
+                picks, score = search.improve(picks)
+
+                if score > best_score:
+                    best_picks, best_score = picks, score
+
+        picks, proven = _BranchAndBound(formation, pools, chemistry_weight, best_score).run()
+
+        if picks is not None:
+            best_picks, best_score = picks, search.score(picks)
+
+    rows = [pool.rows[pick] for pool, pick in zip(search.pools, best_picks)]
+    _, _, clubs, leagues, nations, icons = search.attributes(best_picks)
+    points = chemistry_points(clubs, leagues, nations, icons)
+    players = data.iloc[rows].reset_index(drop=True)
+    players.insert(0, SLOT, [POSITION_DICT[x] for x in formation])
+    players[PLAYER_CHEMISTRY] = points
+    return Squad(formation=formation, players=players, total_rating=int(players[FutAttr.rating.value].sum()),
+                 chemistry=int(points.sum()), score=float(best_score), proven=proven)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Best eleven of the club for a formation')
+    parser.add_argument('formation', nargs='?', default='4-3-3', choices=sorted(FORMATIONS))
+    parser.add_argument('--chemistry-weight', type=float, default=CHEMISTRY_WEIGHT,
+                        help='rating points per chemistry point')
+    options = parser.parse_args(args)
+    squad = fut_manager.FutManager().best_xi(FORMATIONS[options.formation], chemistry_weight=options.chemistry_weight)
+
+    if squad is None:
+        logging.error(f'The club cannot fill {options.formation}')
+        return 1
+
+    columns = [SLOT, FutAttr.surname.value, FutAttr.rating.value, FutAttr.club.value, FutAttr.league.value,
+               FutAttr.country.value, PLAYER_CHEMISTRY]
+    print(squad.players[columns].to_string(index=False))
+    print(f'Rating: {squad.total_rating}, chemistry: {squad.chemistry}')
+
+    if not squad.proven:
+        logging.info(f'Search stopped after {MAX_NODES} nodes, the best eleven found is not proven optimal')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
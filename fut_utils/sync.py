@@ -0,0 +1,42 @@
+import argparse
+import sys
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core import PROJECT_ROOT
+from core import git_utils
+from fut_utils import DATA_DIR, PLOTS_DIR, STORE_DIR
+
+SYNC_DIRECTORIES: Tuple[Path, ...] = (DATA_DIR.relative_to(PROJECT_ROOT), PLOTS_DIR.relative_to(PROJECT_ROOT),
+                                      STORE_DIR.relative_to(PROJECT_ROOT))
+
+
+def sync(directories: Tuple[Path, ...] = SYNC_DIRECTORIES, dry_run: bool = False) -> git_utils.DirectoryStatus:
+    """
+    Stage the new and modified snapshots, stored snapshots and plots in one index write
+    :param directories:
+    :param dry_run: report without staging
+    :return:
+    """
+    return git_utils.git_manager().sync(*directories, dry_run=dry_run)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Stage the new and modified FUT data files and plots')
+    parser.add_argument('directories', nargs='*', type=Path, default=list(SYNC_DIRECTORIES))
+    parser.add_argument('--dry-run', action='store_true', help='report without staging')
+    options = parser.parse_args(args)
+    status = sync(tuple(options.directories), dry_run=options.dry_run)
+    action = 'to stage' if options.dry_run else 'staged'
+
+    for label, file_paths in (('new', status.new), ('modified', status.modified), ('missing', status.missing)):
+        for file_path in file_paths:
+            print(f'{label}: {file_path.as_posix()}')
+
+    print(f'{len(status.changed)} files {action}, {len(status.missing)} missing')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import QLabel, QSizePolicy, QFrame
-from PySide6.QtGui import QPixmap, QPainter, QPaintEvent
+from PySide6.QtGui import QImage, QPixmap, QPainter, QPaintEvent
 from PySide6.QtCore import Qt, QPoint, QSize
 from pathlib import Path
 from typing import Optional
@@ -9,12 +9,15 @@ class ImageLabel(QLabel):
     def __init__(self, path: Optional[Path] = None, width: Optional[int] = None, height: Optional[int] = None):
         """
         QLabel containing an image
+        The image is rescaled only when the widget size or the image changes, not on every repaint
         :param path: Path
         :param width: int
         :param height: int
         """
         super(ImageLabel, self).__init__()
         self.setFrameStyle(QFrame.StyledPanel)
+        self._scaled_pixmap: Optional[QPixmap] = None
+        self._scaled_size: Optional[QSize] = None
         self.pixmap = None
         self.path: Path = path
         self.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.MinimumExpanding)
@@ -28,15 +31,39 @@ class ImageLabel(QLabel):
         Override for paintEvent
         :param event:
         """
-        if self.path is not None:
+        if self.pixmap is not None:
             size: QSize = self.size()
-            point = QPoint(0, 0)
-            scaled_pix = self.pixmap.scaled(size, aspectMode=Qt.AspectRatioMode.KeepAspectRatio,
-                                            mode=Qt.TransformationMode.SmoothTransformation)
-            point.setX((size.width() - scaled_pix.width()) / 2)
-            point.setY((size.height() - scaled_pix.height()) / 2)
+            scaled_pix = self.scaled_pixmap(size)
+            point = QPoint((size.width() - scaled_pix.width()) // 2, (size.height() - scaled_pix.height()) // 2)
             QPainter(self).drawPixmap(point, scaled_pix)
 
+    def scaled_pixmap(self, size: QSize) -> QPixmap:
+        """
+        The image fitted to a size, cached until the size or the image changes
+        :param size:
+        :return:
+        """
+        if self._scaled_pixmap is None or self._scaled_size != size:
+            self._scaled_pixmap = self.pixmap.scaled(size, aspectMode=Qt.AspectRatioMode.KeepAspectRatio,
+                                                     mode=Qt.TransformationMode.SmoothTransformation)
+            self._scaled_size = QSize(size)
+
+        return self._scaled_pixmap
+
+    def set_pixels(self, pixels, name: str = ''):
+        """
+        Show an image held in memory, such as the RGBA buffer of a rendered figure
+        The QImage wraps the buffer without copying it, the pixmap is converted from it directly
+        :param pixels: (height, width, 4) uint8 RGBA array
+        :param name: window title
+        """
+        height, width = pixels.shape[:2]
+        image = QImage(pixels.data, width, height, pixels.strides[0], QImage.Format.Format_RGBA8888)
+        self._path = None
+        self.pixmap = QPixmap.fromImage(image)
+        self.setWindowTitle(name)
+        self.update()
+
     @property
     def pixmap(self) -> QPixmap:
         return self._pixmap
@@ -44,6 +71,7 @@ class ImageLabel(QLabel):
     @pixmap.setter
     def pixmap(self, arg: QPixmap):
         self._pixmap = arg
+        self._scaled_pixmap = None
 
     @property
     def path(self) -> Path:
@@ -53,8 +81,9 @@ class ImageLabel(QLabel):
     def path(self, arg: Path or None):
         self._path = arg
 
+        self.pixmap = QPixmap(arg.as_posix()) if arg is not None else None
+
         if arg is not None:
-            self.pixmap = QPixmap(arg.as_posix())
             self.setWindowTitle(self.path.stem)
 
         self.update()
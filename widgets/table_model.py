@@ -0,0 +1,87 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class TableModel(QAbstractTableModel):
+    SORT_ROLE: int = Qt.ItemDataRole.UserRole
+
+    def __init__(self, headers: Sequence[str], parent: Optional[QObject] = None):
+        """
+        Read-only table model over column lists, replaced in one reset
+        Values are formatted only when a view asks for them so large tables cost nothing per row up front
+        Use SORT_ROLE as the sort role of a QSortFilterProxyModel to sort on the raw values
+        :param headers: Sequence[str]
+        :param parent: QObject
+        """
+        super(TableModel, self).__init__(parent)
+        self.headers: List[str] = list(headers)
+        self.columns: List[list] = [[] for _ in self.headers]
+        self.sort_columns: Dict[int, list] = {}
+        self.numeric: List[bool] = [False] * len(self.headers)
+
+    def set_columns(self, columns: Sequence[list], sort_columns: Optional[Dict[int, list]] = None,
+                    headers: Optional[Sequence[str]] = None):
+        """
+        Replace the contents of the model
+        :param columns: one list per header, all the same length
+        :param sort_columns: sort keys replacing the values of some columns when sorting
+        :param headers: new headers when the columns change
+        """
+        self.beginResetModel()
+
+        if headers is not None:
+            self.headers = list(headers)
+
+        self.columns = [list(x) for x in columns]
+        self.sort_columns = sort_columns or {}
+        self.numeric = [bool(x) and isinstance(x[0], (int, float)) and not isinstance(x[0], bool)
+                        for x in self.columns]
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """
+        Override for rowCount
+        :param parent:
+        :return:
+        """
+        return 0 if parent.isValid() or not self.columns else len(self.columns[0])
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """
+        Override for columnCount
+        :param parent:
+        :return:
+        """
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """
+        Override for data
+        :param index:
+        :param role:
+        :return:
+        """
+        if not index.isValid():
+            return None
+
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(self.columns[column][index.row()])
+        if role == self.SORT_ROLE:
+            return self.sort_columns.get(column, self.columns[column])[index.row()]
+        if role == Qt.ItemDataRole.TextAlignmentRole and self.numeric[column]:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        """
+        Override for headerData
+        :param section:
+        :param orientation:
+        :param role:
+        :return:
+        """
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
@@ -0,0 +1,152 @@
+import logging
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from typing import Callable, Optional
+
+
+class WorkerSignals(QObject):
+    finished = Signal(object, object)
+    failed = Signal(object, str)
+
+
+class Worker(QRunnable):
+    def __init__(self, channel: str, function: Callable, callback: Callable, *args, message: str = ''):
+        """
+        Runnable calling a function on a pool thread and emitting the result
+        :param channel: str
+        :param function: Callable
+        :param callback: Callable receiving the result on the GUI thread
+        :param args: arguments passed to the function
+        :param message: progress message
+        """
+        super(Worker, self).__init__()
+        self.channel: str = channel
+        self.function: Callable = function
+        self.callback: Callable = callback
+        self.args: tuple = args
+        self.message: str = message
+        self.signals: WorkerSignals = WorkerSignals()
+        self.cancelled: bool = False
+
+    def run(self):
+        """
+        Override for run
+        """
+        if self.cancelled:
+            self.signals.finished.emit(self, None)
+            return
+
+        try:
+            result = self.function(*self.args)
+        except Exception:
+            self.signals.failed.emit(self, traceback.format_exc())
+        else:
+            self.signals.finished.emit(self, result)
+
+
+class WorkerPool(QObject):
+    progress = Signal(str)
+
+    def __init__(self, max_threads: int = 2, parent: Optional[QObject] = None):
+        """
+        Runs tasks off the GUI thread with at most one live request per channel
+        Submitting to a busy channel cancels the previous request so its result is never delivered
+        :param max_threads: int
+        :param parent: QObject
+        """
+        super(WorkerPool, self).__init__(parent)
+        self.thread_pool: QThreadPool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._workers: dict = {}
+        self._started: set = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._workers)
+
+    def is_busy(self, channel: str) -> bool:
+        """
+        Returns True if the channel has a request queued or running
+        :param channel:
+        :return:
+        """
+        return channel in self._workers
+
+    def submit(self, channel: str, function: Callable, callback: Callable, *args, message: str = ''):
+        """
+        Run a function on the pool and pass its result to the callback on the GUI thread
+        :param channel: requests on the same channel replace each other
+        :param function: Callable run on a pool thread
+        :param callback: Callable receiving the result
+        :param args: arguments passed to the function
+        :param message: progress message
+        """
+        self.cancel(channel)
+        worker = Worker(channel, function, callback, *args, message=message)
+        worker.setAutoDelete(False)
+        worker.signals.finished.connect(self._finished)
+        worker.signals.failed.connect(self._failed)
+        self._workers[channel] = worker
+        self._started.add(worker)
+
+        if message:
+            self.progress.emit(f'{message}...')
+
+        self.thread_pool.start(worker)
+
+    def cancel(self, channel: str):
+        """
+        Cancel the live request of a channel
+        :param channel:
+        """
+        worker: Optional[Worker] = self._workers.pop(channel, None)
+
+        if worker is not None:
+            worker.cancelled = True
+
+            if self.thread_pool.tryTake(worker):
+                self._started.discard(worker)
+
+    def shutdown(self):
+        """
+        Cancel every request and wait for running tasks to finish
+        """
+        for channel in list(self._workers):
+            self.cancel(channel)
+
+        self.thread_pool.waitForDone()
+
+    @Slot(object, object)
+    def _finished(self, worker: Worker, result):
+        """
+        Deliver the result on the GUI thread unless the request has been replaced
+        :param worker:
+        :param result:
+        """
+        self._started.discard(worker)
+
+        if self._workers.get(worker.channel) is not worker:
+            return
+
+        del self._workers[worker.channel]
+        worker.callback(result)
+
+        if worker.message:
+            pending = f' ({self.pending} pending)' if self._workers else ''
+            self.progress.emit(f'{worker.message} done{pending}')
+
+    @Slot(object, str)
+    def _failed(self, worker: Worker, error: str):
+        """
+        Report a failed request
+        :param worker:
+        :param error:
+        """
+        self._started.discard(worker)
+
+        if self._workers.get(worker.channel) is worker:
+            del self._workers[worker.channel]
+
+        logging.error(error)
+        self.progress.emit(f'Error: {error.strip().splitlines()[-1]}')